@@ -0,0 +1,36 @@
+"""
+Configuracion de gunicorn para produccion, con workers ASGI de uvicorn:
+
+    python manage.py serve
+
+o directamente con gunicorn -c Platero/gunicorn.conf.py Platero.asgi:application
+
+Cada valor puede cambiarse con variables de entorno.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = 'uvicorn.workers.UvicornWorker'
+# Las vistas async de /api/dashboard/ atienden muchas peticiones a la vez en cada
+# worker, pero Django 3.2 corre las vistas sincronas del API de a una por worker en un
+# mismo hilo, asi que se mantienen tantos workers como con WSGI
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# Las vistas sincronas corren en el unico hilo de asgiref de cada worker y no usan
+# ASGI_THREADS. El pool que si consulta a la vez es el de /api/dashboard/, de
+# DASHBOARD_QUERY_THREADS hilos por worker, cada uno con su conexion a la base
+
+# Carga Django una vez en el proceso principal y los workers arrancan ya listos
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Reinicia los workers de vez en cuando para contener fugas de memoria
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+accesslog = '-'
+errorlog = '-'
@@ -41,14 +41,18 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework_simplejwt',
     'users',
     'core',
     'accounts',
     'transactions',
+    'budgets',
+    'dashboard',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryStatsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -78,6 +82,13 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'Platero.wsgi.application'
+ASGI_APPLICATION = 'Platero.asgi.application'
+
+# Las secciones del dashboard asincrono y las versiones async de los listados y
+# reportes (/api/dashboard/) consultan a la vez en un pool de hilos por proceso, cada
+# hilo con su conexion persistente
+DASHBOARD_CONCURRENT_QUERIES = True
+DASHBOARD_QUERY_THREADS = int(os.environ.get('DASHBOARD_QUERY_THREADS', 4))
 
 
 # Database
@@ -89,7 +100,69 @@ DATABASES = {
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME', 'platero'),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASS')
+        'PASSWORD': os.environ.get('DB_PASS'),
+        # Conexiones persistentes, se revisan al inicio de cada request (core.signals)
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60))
+    }
+}
+
+DB_HEALTH_CHECKS = os.environ.get('DB_HEALTH_CHECKS', '1').lower() in ('1', 'true')
+
+# Replica de solo lectura para los GET y reportes (core.routers). Sin DB_REPLICA_HOST
+# apunta a la misma base, para probar el ruteo localmente con DB_REPLICA_READS=1
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'HOST': os.environ.get('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+    'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+    'TEST': {'MIRROR': 'default'},
+}
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+DB_REPLICA_READS = os.environ.get(
+    'DB_REPLICA_READS',
+    '1' if os.environ.get('DB_REPLICA_HOST') else '0'
+).lower() in ('1', 'true')
+
+# Segundos que un usuario lee de 'default' despues de escribir
+READ_YOUR_WRITES_SECONDS = int(os.environ.get('READ_YOUR_WRITES_SECONDS', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Agregados por usuario (core.aggregates), acotado para no crecer sin limite. Es
+    # por proceso: los demas procesos ven un cambio cuando expira, TIMEOUT acota ese atraso
+    'aggregates': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'platero-aggregates',
+        'TIMEOUT': int(os.environ.get('AGGREGATES_CACHE_TIMEOUT', 30)),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'CULL_FREQUENCY': 4
+        }
+    },
+    # Usuarios autenticados por JWT (users.authentication), se invalidan al guardarlos.
+    # Es por proceso: los demas procesos ven un usuario desactivado cuando expira
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'platero-auth',
+        'TIMEOUT': int(os.environ.get('AUTH_CACHE_TIMEOUT', 30)),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000
+        }
+    },
+    # Compartido entre procesos, para fijar a 'default' al usuario que escribe
+    # (core.routers). La tabla la crea la migracion core 0025
+    'shared': {
+        'BACKEND': os.environ.get(
+            'SHARED_CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'
+        ),
+        'LOCATION': os.environ.get('SHARED_CACHE_LOCATION', 'platero_cache'),
     }
 }
 
@@ -136,10 +209,40 @@ AUTH_USER_MODEL = 'core.User'
 
 DEFAULT_CURRENCY = globals.CURRENCY.PEN
 
+# Segundos que cada proceso guarda los tipos de cambio en memoria (core.rates)
+EXCHANGE_RATES_TIMEOUT = 300
+
 CORS_ORIGIN_ALLOW_ALL = True
 
+# Conteo de consultas y latencia por request (core.middleware), desactivado por defecto
+QUERY_STATS = os.environ.get('QUERY_STATS', '').lower() in ('1', 'true')
+
+CORS_EXPOSE_HEADERS = [
+    'X-Query-Count',
+    'X-Query-Time-Ms',
+    'X-Slowest-Query-Ms',
+    'X-Response-Time-Ms',
+]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     )
 }
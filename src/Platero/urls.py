@@ -21,5 +21,7 @@ urlpatterns = [
     path('api/users/', include('users.urls')),
     path('api/categories/', include('categories.urls')),
     path('api/accounts/', include('accounts.urls')),
-    path('api/transactions/', include('transactions.urls'))
+    path('api/transactions/', include('transactions.urls')),
+    path('api/budgets/', include('budgets.urls')),
+    path('api/dashboard/', include('dashboard.urls'))
 ]
@@ -6,21 +6,42 @@ from core.models import Account
 class AccountSerializer(serializers.ModelSerializer):
     """Serializer para el modelo ACcount"""
     balance = serializers.SerializerMethodField()
+    balances = serializers.SerializerMethodField()
 
     class Meta:
         model = Account
-        fields = ('id', 'name', 'description', 'balance', 'currency', 'type')
+        fields = ('id', 'name', 'description', 'balance', 'balances', 'currency', 'type')
         extra_kwargs = {
             'type': {'required': True}
         }
 
+    def get_fields(self):
+        fields = super().get_fields()
+        # La grilla de saldos solo se retorna si se pidio un rango de meses
+        if 'balance_grid' not in self.context:
+            fields.pop('balances')
+
+        return fields
+
     def get_balance(self, account):
+        # AccountViewSet anota el saldo del mes pedido para evitar una consulta por cuenta
+        if hasattr(account, 'month_balance'):
+            return account.month_balance
+
+        request = self.context.get('request')
         filters = {
-            'year': self.context.get('request').query_params.get('year'),
-            'month': self.context.get('request').query_params.get('month')
+            'year': request.query_params.get('year') if request else None,
+            'month': request.query_params.get('month') if request else None
         }
         return account.get_balance(**filters)
 
+    def get_balances(self, account):
+        grid = self.context['balance_grid'].get(account.id, [])
+        return [
+            {'year': year, 'month': month, 'balance': balance}
+            for year, month, balance in grid
+        ]
+
     def create(self, validated_data):
         """Crea una nueva cuenta y lo retorna"""
         request = self.context.get('request')
@@ -1,15 +1,24 @@
+from datetime import date
+from decimal import Decimal
+
 from django.test import TestCase
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core import aggregates, rates
 from core.tests import utils
-from core.models import Account
+from core.models import Account, Category, ExchangeRate, Transaction
 from core.globals import CURRENCY
 
 
 LIST_CREATE_ACCOUNT_URL = reverse('accounts:account-list')
+NET_WORTH_URL = reverse('accounts:account-net-worth')
+
+# Consultas maximas del listado, sin importar cuantas cuentas haya
+LIST_QUERY_BUDGET = 1
+LIST_GRID_QUERY_BUDGET = 3
 
 
 def get_retrieve_update_destroy_account_url(lookup=None):
@@ -213,3 +222,140 @@ class PrivateTests(TestCase):
         )
 
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class BalanceTests(TestCase):
+    """Testea los saldos historicos en el API de cuentas"""
+
+    def setUp(self):
+        aggregates.get_cache().clear()
+        self.user = utils.get_test_user()
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.income = utils.get_test_category(user=self.user, type=Category.TYPE.INCOME)
+        self.accounts = []
+        for i in range(4):
+            account = utils.get_test_account(user=self.user, balance=100.0)
+            for month in (1, 3):
+                account.add_transaction(
+                    type=Transaction.TYPE.INCOME,
+                    amount=Decimal('10.00'),
+                    date='2021-0{}-15'.format(month),
+                    category=self.income,
+                    is_paid=True
+                )
+            self.accounts.append(account)
+
+    def test_list_balance_by_month(self):
+        """Testea el saldo de todas las cuentas a un mes en una sola consulta"""
+        with self.assertNumQueries(1):
+            res = self.client.get(LIST_CREATE_ACCOUNT_URL, {'year': 2021, 'month': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 4)
+        for account in res.data:
+            self.assertEqual(account['balance'], Decimal('110.00'))
+        self.assertNotIn('balances', res.data[0])
+
+    def test_list_accounts_query_budget(self):
+        """Testea que el listado de cuentas no pase su presupuesto de consultas"""
+        for i in range(10):
+            utils.get_test_account(user=self.user, balance=5.0)
+
+        res = utils.assert_query_budget(
+            self, LIST_QUERY_BUDGET, self.client.get, LIST_CREATE_ACCOUNT_URL
+        )
+        self.assertEqual(len(res.data), 14)
+
+        utils.assert_query_budget(
+            self, LIST_GRID_QUERY_BUDGET, self.client.get, LIST_CREATE_ACCOUNT_URL,
+            {'start': '2020-12', 'end': '2021-11'}
+        )
+
+    def test_list_balance_before_first_log(self):
+        """Testea el saldo de un mes anterior a cualquier movimiento"""
+        res = self.client.get(LIST_CREATE_ACCOUNT_URL, {'year': 2020, 'month': 12})
+
+        self.assertEqual(res.data[0]['balance'], Decimal('100.00'))
+
+    def test_list_balance_grid(self):
+        """Testea la grilla de saldos por mes con un numero constante de consultas"""
+        with self.assertNumQueries(3):
+            res = self.client.get(
+                LIST_CREATE_ACCOUNT_URL,
+                {'start': '2020-12', 'end': '2021-11'}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        balances = res.data[0]['balances']
+        self.assertEqual(len(balances), 12)
+        self.assertEqual(
+            balances[0],
+            {'year': 2020, 'month': 12, 'balance': Decimal('100.00')}
+        )
+        self.assertEqual(balances[1]['balance'], Decimal('110.00'))
+        self.assertEqual(balances[2]['balance'], Decimal('110.00'))
+        self.assertEqual(balances[3]['balance'], Decimal('120.00'))
+        self.assertEqual(balances[-1]['balance'], Decimal('120.00'))
+
+    def test_list_balance_grid_invalid_range(self):
+        """Testea que un rango de meses invalido sea rechazado"""
+        params = {'start': '2021-05', 'end': '2021-01'}
+        res = self.client.get(LIST_CREATE_ACCOUNT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        params = {'start': '2021-13', 'end': '2022-01'}
+        res = self.client.get(LIST_CREATE_ACCOUNT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NetWorthTests(TestCase):
+    """Testea el patrimonio neto en el API de cuentas"""
+
+    def setUp(self):
+        rates.clear_cache()
+        self.addCleanup(rates.clear_cache)
+        self.user = utils.get_test_user()
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        utils.get_test_account(user=self.user, currency=CURRENCY.PEN, balance=100.0)
+        utils.get_test_account(user=self.user, currency=CURRENCY.USD, balance=10.0)
+        utils.get_test_account(user=utils.get_test_user(), balance=999.0)
+        ExchangeRate.objects.create(
+            date=date(2021, 6, 1),
+            base_currency=CURRENCY.USD,
+            quote_currency=CURRENCY.PEN,
+            rate=Decimal('4.00')
+        )
+
+    def test_net_worth(self):
+        """Testea sumar los saldos en la moneda favorita del usuario"""
+        res = self.client.get(NET_WORTH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['currency'], self.user.favorite_currency)
+        self.assertEqual(res.data['total'], '140.00')
+        self.assertEqual(len(res.data['balances']), 2)
+
+    def test_net_worth_currency(self):
+        """Testea convertir el patrimonio a otra moneda con una sola consulta"""
+        self.client.get(NET_WORTH_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(NET_WORTH_URL, {'currency': CURRENCY.USD})
+
+        self.assertEqual(res.data['total'], '35.00')
+
+    def test_net_worth_without_rate(self):
+        """Testea que falte el tipo de cambio o la moneda sea desconocida"""
+        ExchangeRate.objects.all().delete()
+
+        res = self.client.get(NET_WORTH_URL)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(NET_WORTH_URL, {'currency': 'EUR'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,10 +1,126 @@
+from django.utils import timezone
+
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core import aggregates, rates
+from core.globals import CURRENCY
+from core.models import AccountLog
 from core.views import UserObjectViewSet
 from accounts.serializers import AccountSerializer
 
 
+# Maximo de meses que se pueden pedir en una grilla de saldos
+MAX_GRID_MONTHS = 120
+
+
+def parse_month(value, name):
+    """Convierte 'YYYY-MM' en la tupla (year, month)"""
+    try:
+        year, month = (int(part) for part in value.split('-'))
+    except ValueError:
+        raise ValidationError({name: 'Months must have the format YYYY-MM'})
+    if not 1 <= month <= 12:
+        raise ValidationError({name: 'Invalid month'})
+
+    return year, month
+
+
+def get_net_worth_data(user, currency):
+    """Retorna el patrimonio neto del usuario en currency, con los montos como texto"""
+    net_worth = rates.get_net_worth(user.accounts.all(), currency)
+
+    return {
+        'currency': net_worth['currency'],
+        'total': str(net_worth['total']),
+        'balances': [
+            {field: str(value) for field, value in row.items()}
+            for row in net_worth['balances']
+        ]
+    }
+
+
 class AccountViewSet(UserObjectViewSet):
     serializer_class = AccountSerializer
 
+    def get_balance_month(self):
+        """Retorna el mes pedido con year/month, como hace Account.get_balance"""
+        year = self.request.query_params.get('year')
+        month = self.request.query_params.get('month')
+        if not year and not month:
+            return None
+
+        try:
+            year = int(year or timezone.now().year)
+            month = int(month or timezone.now().month)
+        except ValueError:
+            raise ValidationError({'year': 'Year and month must be numbers'})
+
+        return year, month
+
+    def get_balance_range(self):
+        """Retorna el rango de meses pedido con start/end (YYYY-MM)"""
+        start = self.request.query_params.get('start')
+        end = self.request.query_params.get('end')
+        if not start and not end:
+            return None
+        if not start or not end:
+            raise ValidationError({'start': 'Both start and end are required'})
+
+        start = parse_month(start, 'start')
+        end = parse_month(end, 'end')
+        months = (end[0] - start[0]) * 12 + end[1] - start[1] + 1
+        if months < 1:
+            raise ValidationError({'end': 'End must not be before start'})
+        if months > MAX_GRID_MONTHS:
+            raise ValidationError({
+                'end': 'At most {} months can be requested'.format(MAX_GRID_MONTHS)
+            })
+
+        return start, end
+
     def get_queryset(self):
-        queryset = self.request.user.accounts
+        queryset = self.request.user.accounts.all()
+
+        # El saldo de todas las cuentas se anota en la misma consulta
+        balance_month = self.get_balance_month()
+        if balance_month:
+            queryset = queryset.annotate(
+                month_balance=AccountLog.objects.get_balance_expression(*balance_month)
+            )
+
         return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+
+        balance_range = self.get_balance_range()
+        if balance_range:
+            user = self.request.user
+            context['balance_grid'] = aggregates.get_or_compute(
+                user.id,
+                'balance_grid',
+                lambda: AccountLog.objects.get_balance_grid(
+                    user.accounts.all(),
+                    *balance_range
+                ),
+                *balance_range
+            )
+
+        return context
+
+    @action(detail=False, url_path='net-worth')
+    def net_worth(self, request):
+        """
+        Retorna la suma de los saldos de todas las cuentas convertida a la moneda
+        favorita del usuario (o a ?currency=)
+        """
+        currency = request.query_params.get('currency', request.user.favorite_currency)
+        if currency not in dict(CURRENCY.CHOICES):
+            raise ValidationError({'currency': 'Unknown currency {!r}'.format(currency)})
+
+        try:
+            return Response(get_net_worth_data(request.user, currency))
+        except ValueError as e:
+            raise ValidationError({'currency': str(e)})
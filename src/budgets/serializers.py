@@ -0,0 +1,28 @@
+from rest_framework import serializers
+
+from core.models import Budget
+
+
+class BudgetSerializer(serializers.ModelSerializer):
+    """Serializer para el modelo Budget"""
+
+    class Meta:
+        model = Budget
+        fields = ('id', 'start_date', 'end_date')
+
+    def create(self, validated_data):
+        """Crea un nuevo presupuesto y lo retorna"""
+        request = self.context.get('request')
+        budget = request.user.add_budget(**validated_data)
+
+        return budget
+
+
+class BudgetCategoryReportSerializer(serializers.Serializer):
+    """Serializer de una fila del reporte de presupuesto"""
+    id = serializers.IntegerField()
+    category = serializers.IntegerField()
+    name = serializers.CharField()
+    planned = serializers.DecimalField(max_digits=9, decimal_places=2)
+    spent = serializers.DecimalField(max_digits=9, decimal_places=2)
+    left = serializers.DecimalField(max_digits=9, decimal_places=2)
@@ -0,0 +1,160 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core import aggregates
+from core.tests import utils
+from core.models import Category, Transaction
+
+
+LIST_CREATE_BUDGET_URL = reverse('budgets:budget-list')
+
+# Presupuesto y reporte agrupado, sin importar cuantas categorias tenga
+REPORT_QUERY_BUDGET = 2
+
+
+def get_retrieve_update_destroy_budget_url(lookup=None):
+    return reverse('budgets:budget-detail', kwargs={'pk': lookup})
+
+
+def get_budget_report_url(lookup=None):
+    return reverse('budgets:budget-report', kwargs={'pk': lookup})
+
+
+class PublicTests(TestCase):
+    """Testea el API de presupuestos (publico)"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_create_list_url_unauthorized(self):
+        """Testea que necesita estar autenticado para usar el url de listado o creado"""
+        res = self.client.get(LIST_CREATE_BUDGET_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = self.client.post(LIST_CREATE_BUDGET_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_report_url_unauthorized(self):
+        """Testea que necesita autenticacion para ver el reporte"""
+        res = self.client.get(get_budget_report_url(1))
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateTests(TestCase):
+    """Testea el API de presupuestos (privado)"""
+
+    def setUp(self):
+        self.user = utils.get_test_user()
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.account = utils.get_test_account(user=self.user)
+        self.budget = self.user.add_budget(
+            start_date=date(2021, 7, 1),
+            end_date=date(2021, 7, 31)
+        )
+        self.categories = []
+        for i in range(5):
+            category = utils.get_test_category(user=self.user, type=Category.TYPE.EXPENSE)
+            self.budget.add_category(category, Decimal('100.00'))
+            self.categories.append(category)
+
+    def add_expense(self, category, amount, date):
+        return self.account.add_transaction(
+            type=Transaction.TYPE.EXPENSE,
+            amount=Decimal(amount),
+            date=date,
+            category=category
+        )
+
+    def test_list_budgets(self):
+        """Testea que un usuario pueda listar sus presupuestos"""
+        utils.get_test_budget(user=utils.get_test_user())
+
+        res = self.client.get(LIST_CREATE_BUDGET_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+
+    def test_create_budget(self):
+        """Testea que un usuario pueda crear un presupuesto"""
+        payload = {'start_date': '2021-08-01', 'end_date': '2021-08-31'}
+        res = self.client.post(LIST_CREATE_BUDGET_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.user.budgets.count(), 2)
+
+    def test_budget_report(self):
+        """Testea el reporte de lo planeado, gastado y restante por categoria"""
+        self.add_expense(self.categories[0], '30.00', '2021-07-05')
+        self.add_expense(self.categories[0], '20.00', '2021-07-31')
+        self.add_expense(self.categories[1], '10.00', '2021-07-10')
+        # Fuera de las fechas del presupuesto
+        self.add_expense(self.categories[1], '99.00', '2021-08-01')
+
+        res = self.client.get(get_budget_report_url(self.budget.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['planned'], '500.00')
+        self.assertEqual(res.data['spent'], '60.00')
+        self.assertEqual(res.data['left'], '440.00')
+
+        rows = {row['category']: row for row in res.data['categories']}
+        self.assertEqual(rows[self.categories[0].id]['spent'], '50.00')
+        self.assertEqual(rows[self.categories[0].id]['left'], '50.00')
+        self.assertEqual(rows[self.categories[1].id]['spent'], '10.00')
+        self.assertEqual(rows[self.categories[2].id]['spent'], '0.00')
+
+    def test_budget_report_query_count(self):
+        """Testea que el reporte no haga una consulta por categoria"""
+        for category in self.categories:
+            self.add_expense(category, '5.00', '2021-07-05')
+        aggregates.get_cache().clear()
+
+        utils.assert_query_budget(
+            self, REPORT_QUERY_BUDGET, self.client.get,
+            get_budget_report_url(self.budget.id)
+        )
+
+    def test_another_user_budget_report(self):
+        """Testea que un usuario no pueda ver el reporte de otro usuario"""
+        budget = utils.get_test_budget(user=utils.get_test_user())
+
+        res = self.client.get(get_budget_report_url(budget.id))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_budget_report_cached(self):
+        """Testea que el reporte se sirva del cache hasta que cambien los gastos"""
+        aggregates.get_cache().clear()
+        self.client.get(get_budget_report_url(self.budget.id))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(get_budget_report_url(self.budget.id))
+        self.assertEqual(res.data['spent'], '0.00')
+
+        self.add_expense(self.categories[0], '30.00', '2021-07-05')
+        res = self.client.get(get_budget_report_url(self.budget.id))
+        self.assertEqual(res.data['spent'], '30.00')
+
+    def test_budget_report_after_update(self):
+        """Testea que cambiar las fechas del presupuesto actualice el reporte"""
+        self.add_expense(self.categories[0], '30.00', '2021-08-05')
+        res = self.client.get(get_budget_report_url(self.budget.id))
+        self.assertEqual(res.data['spent'], '0.00')
+
+        res = self.client.put(
+            get_retrieve_update_destroy_budget_url(self.budget.id),
+            {'start_date': '2021-08-01', 'end_date': '2021-08-31'}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(get_budget_report_url(self.budget.id))
+        self.assertEqual(res.data['spent'], '30.00')
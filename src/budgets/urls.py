@@ -0,0 +1,10 @@
+from rest_framework import routers
+
+from budgets.views import BudgetViewSet
+
+router = routers.SimpleRouter()
+router.register(r'', BudgetViewSet, basename='budget')
+
+app_name = 'budgets'
+
+urlpatterns = router.urls
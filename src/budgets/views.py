@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from core import aggregates
+from core.views import UserObjectViewSet
+from budgets.serializers import BudgetSerializer, BudgetCategoryReportSerializer
+
+
+def get_report_data(budget):
+    """Retorna el presupuesto con sus totales y su reporte por categoria"""
+    report = aggregates.get_or_compute(
+        budget.user_id,
+        'budget_report',
+        budget.get_report,
+        budget.id
+    )
+
+    totals = {
+        field: sum((row[field] for row in report), Decimal('0.00'))
+        for field in ('planned', 'spent', 'left')
+    }
+
+    return {
+        **BudgetSerializer(budget).data,
+        **{field: str(total) for field, total in totals.items()},
+        'categories': BudgetCategoryReportSerializer(report, many=True).data
+    }
+
+
+class BudgetViewSet(UserObjectViewSet):
+    serializer_class = BudgetSerializer
+
+    def get_queryset(self):
+        return self.request.user.budgets
+
+    @action(detail=True)
+    def report(self, request, pk=None):
+        """Retorna lo planeado, gastado y restante por categoria del presupuesto"""
+        return Response(get_report_data(self.get_object()))
@@ -8,7 +8,8 @@ class CategorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Category
-        fields = ('id', 'name', 'description', 'type', 'parent')
+        fields = ('id', 'name', 'description', 'type', 'parent', 'level')
+        read_only_fields = ('level',)
         extra_kwargs = {
             'type': {'required': True},
             'parent': {'required': False}
@@ -20,3 +21,10 @@ class CategorySerializer(serializers.ModelSerializer):
         category = request.user.add_category(**validated_data)
 
         return category
+
+    def update(self, instance, validated_data):
+        """Actualiza la categoria, moviendo su subarbol si cambia de padre"""
+        try:
+            return super().update(instance, validated_data)
+        except ValueError as e:
+            raise serializers.ValidationError({'parent': str(e)})
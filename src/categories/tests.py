@@ -14,6 +14,10 @@ def get_retrieve_update_destroy_category_url(lookup=None):
     return reverse('categories:category-detail', kwargs={'pk': lookup})
 
 
+def get_category_action_url(action, lookup=None):
+    return reverse('categories:category-{}'.format(action), kwargs={'pk': lookup})
+
+
 class PublicTests(TestCase):
     """Testea el API de categorias (publico)"""
 
@@ -196,3 +200,49 @@ class PrivateTests(TestCase):
         )
 
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_list_subtree(self):
+        """Testea filtrar las categorias por subarbol"""
+        child = utils.get_test_category(user=self.user, parent=self.category)
+        utils.get_test_category(user=self.user, parent=child)
+        utils.get_test_category(user=self.user)
+
+        res = self.client.get(LIST_CREATE_CATEGORY_URL, {'subtree': self.category.id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 3)
+
+    def test_list_subtree_only_user_categories(self):
+        """Testea que el subarbol no incluya categorias de otro usuario con ese path"""
+        Category.objects.filter(pk=self.another_user_category.pk).update(
+            path=self.category.get_subtree_path()
+        )
+
+        res = self.client.get(LIST_CREATE_CATEGORY_URL, {'subtree': self.category.id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['id'] for c in res.data], [self.category.id])
+
+    def test_list_ancestors_descendants(self):
+        """Testea listar los ancestros y descendientes de una categoria"""
+        child = utils.get_test_category(user=self.user, parent=self.category)
+        grandchild = utils.get_test_category(user=self.user, parent=child)
+
+        res = self.client.get(get_category_action_url('ancestors', grandchild.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['id'] for c in res.data], [self.category.id, child.id])
+
+        res = self.client.get(get_category_action_url('descendants', self.category.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['id'] for c in res.data], [child.id, grandchild.id])
+
+    def test_move_category_inside_itself(self):
+        """Testea que no se pueda mover una categoria dentro de su subarbol"""
+        child = utils.get_test_category(user=self.user, parent=self.category)
+
+        res = self.client.patch(
+            get_retrieve_update_destroy_category_url(self.category.id),
+            {'parent': child.id}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,3 +1,9 @@
+from django.core.exceptions import PermissionDenied
+
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from core.models import Category
 from core.views import UserObjectViewSet
 from categories.serializers import CategorySerializer
 
@@ -6,4 +12,28 @@ class CategoryViewSet(UserObjectViewSet):
     serializer_class = CategorySerializer
 
     def get_queryset(self):
-        return self.request.user.categories
+        queryset = self.request.user.categories.all()
+
+        subtree = self.request.query_params.get('subtree')
+        if subtree and self.action == 'list':
+            try:
+                root = queryset.get(pk=subtree)
+            except (Category.DoesNotExist, ValueError):
+                raise PermissionDenied('You don\'t have access to that category')
+            queryset = root.get_subtree().filter(user=self.request.user)
+
+        return queryset
+
+    @action(detail=True)
+    def ancestors(self, request, pk=None):
+        """Lista los ancestros de la categoria desde la raiz"""
+        category = self.get_object()
+        queryset = category.get_ancestors().filter(user=request.user)
+        return Response(self.get_serializer(queryset, many=True).data)
+
+    @action(detail=True)
+    def descendants(self, request, pk=None):
+        """Lista todos los descendientes de la categoria"""
+        category = self.get_object()
+        queryset = category.get_descendants().filter(user=request.user).order_by('path')
+        return Response(self.get_serializer(queryset, many=True).data)
@@ -22,6 +22,19 @@ class AccountAdmin(admin.ModelAdmin):
     )
 
 
+class ExchangeRateAdmin(admin.ModelAdmin):
+    ordering = ['-date', 'base_currency', 'quote_currency']
+    list_display = ['date', 'base_currency', 'quote_currency', 'rate']
+    list_filter = ['base_currency', 'quote_currency']
+
+
+class RecurringTransactionAdmin(admin.ModelAdmin):
+    ordering = ['id']
+    list_display = ['account', 'description', 'amount', 'frequency', 'next_date']
+    list_filter = ['frequency', 'type']
+    readonly_fields = ['occurrences', 'next_date']
+
+
 class UserAdmin(BaseUserAdmin):
     ordering = ['id']
     list_display = ['email', 'name']
@@ -62,3 +75,5 @@ admin.site.register(models.User, UserAdmin)
 # admin.site.register(models.Budget, BudgetAdmin)
 admin.site.register(models.Account, AccountAdmin)
 admin.site.register(models.Tag)
+admin.site.register(models.ExchangeRate, ExchangeRateAdmin)
+admin.site.register(models.RecurringTransaction, RecurringTransactionAdmin)
@@ -0,0 +1,93 @@
+"""
+Cache de agregados por usuario (saldos, totales de presupuesto, gastos por categoria).
+
+Cada usuario tiene un numero de version que se incrementa cada vez que cambian sus
+transacciones, cuentas, categorias o presupuestos (ver core.signals), y la version
+forma parte de la llave de cada agregado, asi que invalidar es un solo incremento.
+
+Con el cache 'aggregates' en memoria (LocMemCache) cada proceso tiene sus propias
+versiones: invalidar solo alcanza al proceso que hizo el cambio, y los demas pueden
+servir un agregado anterior hasta que expire (TIMEOUT del cache, AGGREGATES_CACHE_TIMEOUT).
+Para invalidar en todos los procesos a la vez hay que usar un backend compartido.
+"""
+import hashlib
+import threading
+
+from django.core.cache import caches
+from django.db import transaction as db_transaction
+
+from core import versions
+
+CACHE_ALIAS = 'aggregates'
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _get_version_key(user_id):
+    return 'version:{}'.format(user_id)
+
+
+def get_version(user_id):
+    return versions.get_version(get_cache(), _get_version_key(user_id))
+
+
+def bump_version(user_id):
+    """Invalida todos los agregados del usuario"""
+    versions.bump_version(get_cache(), _get_version_key(user_id))
+
+
+def invalidate(user_id):
+    """
+    Invalida los agregados del usuario ahora y otra vez al confirmar la transaccion,
+    para descartar lo que otra peticion calcule con los datos anteriores mientras tanto
+    """
+    bump_version(user_id)
+    db_transaction.on_commit(lambda: bump_version(user_id))
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_stats():
+    """Retorna los contadores de aciertos y fallos de este proceso"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats['hits'] = 0
+        _stats['misses'] = 0
+
+
+def get_or_compute(user_id, name, compute, *args):
+    """
+    Retorna el agregado name del usuario para los argumentos args desde el cache,
+    o lo calcula con compute() y lo guarda
+    """
+    cache = get_cache()
+    # Los argumentos pueden tener espacios u otros caracteres invalidos en memcached
+    key = 'aggregate:{user}:{version}:{name}:{args}'.format(
+        user=user_id,
+        version=get_version(user_id),
+        name=name,
+        args=hashlib.md5(':'.join(str(arg) for arg in args).encode()).hexdigest()
+    )
+
+    value = cache.get(key)
+    if value is not None:
+        _count('hits')
+        return value
+
+    _count('misses')
+    value = compute()
+    cache.set(key, value)
+
+    return value
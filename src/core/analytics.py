@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+
+class PERIOD:
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+
+    CHOICES = [
+        (DAY, 'Day'),
+        (WEEK, 'Week'),
+        (MONTH, 'Month'),
+    ]
+
+
+TRUNCS = {
+    PERIOD.DAY: TruncDay,
+    PERIOD.WEEK: TruncWeek,
+    PERIOD.MONTH: TruncMonth,
+}
+
+
+def get_trunc(period):
+    try:
+        return TRUNCS[period.lower()]
+    except (KeyError, AttributeError):
+        raise ValueError('Unsupported period {!r}'.format(period))
+
+
+def _get_rollup_id(category_id, path, level):
+    """Retorna el ancestro de la categoria en el nivel indicado (1 es la raiz)"""
+    if category_id is None or not level:
+        return category_id
+
+    ids = [int(id) for id in path.split('/') if id] + [category_id]
+    return ids[min(level, len(ids)) - 1]
+
+
+def get_category_series(queryset, period, level=None):
+    """
+    Suma los montos de las transacciones por periodo y categoria en una sola consulta.
+    Con level, las subcategorias mas profundas se suman a su ancestro de ese nivel.
+
+    Retorna los periodos con movimientos y una serie de montos por categoria, con un
+    valor por periodo en el mismo orden:
+    {'buckets': [date, ...], 'series': [{'category': id, 'values': [Decimal, ...]}]}
+    """
+    trunc = get_trunc(period)
+    rows = queryset.annotate(
+        bucket=trunc('date')
+    ).values(
+        'bucket', 'category_id', 'category__path'
+    ).annotate(
+        total=Sum('amount')
+    ).order_by('bucket')
+
+    buckets = []
+    totals = {}
+    for row in rows:
+        if not buckets or buckets[-1] != row['bucket']:
+            buckets.append(row['bucket'])
+        category_id = _get_rollup_id(row['category_id'], row['category__path'], level)
+        key = (category_id, len(buckets) - 1)
+        totals[key] = totals.get(key, Decimal('0.00')) + row['total']
+
+    series = {}
+    for (category_id, index), total in totals.items():
+        values = series.setdefault(category_id, [Decimal('0.00')] * len(buckets))
+        values[index] = total
+
+    return {
+        'buckets': buckets,
+        'series': [
+            {'category': category_id, 'values': values}
+            for category_id, values in sorted(
+                series.items(),
+                key=lambda item: (item[0] is None, item[0] or 0)
+            )
+        ]
+    }
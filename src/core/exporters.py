@@ -0,0 +1,110 @@
+import csv
+import json
+import tempfile
+
+
+DEFAULT_CHUNK_SIZE = 2000
+# Bytes del archivo generado antes de enviarlo que se guardan en memoria, el resto a disco
+DEFAULT_SPOOL_SIZE = 5 * 1024 * 1024
+SPOOL_READ_SIZE = 64 * 1024
+
+
+class FORMAT:
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+
+    CHOICES = [
+        (CSV, 'CSV'),
+        (NDJSON, 'NDJSON'),
+    ]
+
+    CONTENT_TYPES = {
+        CSV: 'text/csv',
+        NDJSON: 'application/x-ndjson',
+    }
+
+
+# Columna exportada -> campo de la consulta
+FIELDS = [
+    ('id', 'id'),
+    ('date', 'date'),
+    ('type', 'type'),
+    ('amount', 'amount'),
+    ('description', 'description'),
+    ('is_paid', 'is_paid'),
+    ('account', 'account__name'),
+    ('category', 'category__name'),
+    ('linked_transaction', 'linked_transaction_id'),
+]
+
+
+def get_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Recorre las transacciones con un cursor del servidor, de chunk_size filas a la vez,
+    con los nombres de cuenta y categoria en la misma consulta
+    """
+    columns = [column for column, field in FIELDS]
+    rows = queryset.order_by('date', 'id').values_list(
+        *(field for column, field in FIELDS)
+    )
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(columns, row))
+
+
+class _Echo:
+    """Buffer que devuelve lo que se le escribe, para que csv.writer genere lineas"""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([column for column, field in FIELDS])
+    for row in rows:
+        yield writer.writerow(row.values())
+
+
+def export_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, default=str) + '\n'
+
+
+EXPORTERS = {
+    FORMAT.CSV: export_csv,
+    FORMAT.NDJSON: export_ndjson,
+}
+
+
+def get_exporter(format):
+    try:
+        return EXPORTERS[format.lower()]
+    except (KeyError, AttributeError):
+        raise ValueError('Unsupported export format {!r}'.format(format))
+
+
+def export_transactions(queryset, format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Retorna un generador con las lineas del archivo exportado"""
+    return get_exporter(format)(get_rows(queryset, chunk_size))
+
+
+def _read_chunks(file):
+    with file:
+        while True:
+            chunk = file.read(SPOOL_READ_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def spool(lines, max_size=DEFAULT_SPOOL_SIZE):
+    """
+    Genera todo el archivo en un archivo temporal, en memoria hasta max_size bytes, y
+    retorna un generador que lo lee por bloques sin consultar la base de datos
+    """
+    file = tempfile.SpooledTemporaryFile(max_size=max_size)
+    for line in lines:
+        file.write(line.encode())
+    file.seek(0)
+
+    return _read_chunks(file)
@@ -0,0 +1,249 @@
+import csv
+import re
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+
+from core.models import Category, Transaction
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class FORMAT:
+    CSV = 'csv'
+    OFX = 'ofx'
+    QIF = 'qif'
+
+    CHOICES = [
+        (CSV, 'CSV'),
+        (OFX, 'OFX'),
+        (QIF, 'QIF'),
+    ]
+
+
+def _parse_amount(value, line):
+    """Lee el monto, que debe ser finito y caber en Transaction.amount"""
+    field = Transaction._meta.get_field('amount')
+    try:
+        amount = Decimal(value.strip().replace(',', ''))
+    except (InvalidOperation, AttributeError):
+        amount = None
+    if (amount is None or not amount.is_finite() or
+            abs(amount) >= 10 ** (field.max_digits - field.decimal_places) or
+            amount != amount.quantize(Decimal(1).scaleb(-field.decimal_places))):
+        raise ValueError('Invalid amount {!r} on line {}'.format(value, line))
+
+    return amount
+
+
+def _parse_date(value, formats, line):
+    value = value.strip()
+    for date_format in formats:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError('Invalid date {!r} on line {}'.format(value, line))
+
+
+def _get_row(date, amount, description=None, category=None):
+    return {
+        'date': date,
+        'amount': amount,
+        'description': description or None,
+        'category': category or None
+    }
+
+
+def parse_csv(lines):
+    """Lee filas con columnas date, amount, description y category (opcional)"""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        line = reader.line_num
+        yield _get_row(
+            date=_parse_date(row.get('date') or '', ('%Y-%m-%d',), line),
+            amount=_parse_amount(row.get('amount'), line),
+            description=row.get('description'),
+            category=row.get('category')
+        )
+
+
+OFX_TAG = re.compile(r'<(/?)([A-Z0-9.]+)>([^<\r\n]*)')
+
+
+def parse_ofx(lines):
+    """Lee los bloques STMTTRN de un extracto OFX (SGML o XML)"""
+    record = None
+    for line_number, line in enumerate(lines, start=1):
+        for closing, tag, value in OFX_TAG.findall(line):
+            if tag == 'STMTTRN':
+                if not closing:
+                    record = {'line': line_number}
+                    continue
+                if record is not None:
+                    yield _get_ofx_row(record)
+                record = None
+            elif record is not None and not closing:
+                record[tag] = value.strip()
+    if record is not None:
+        yield _get_ofx_row(record)
+
+
+def _get_ofx_row(record):
+    line = record['line']
+    if 'DTPOSTED' not in record or 'TRNAMT' not in record:
+        raise ValueError('Incomplete transaction on line {}'.format(line))
+    return _get_row(
+        date=_parse_date(record['DTPOSTED'][:8], ('%Y%m%d',), line),
+        amount=_parse_amount(record['TRNAMT'], line),
+        description=record.get('MEMO') or record.get('NAME')
+    )
+
+
+def parse_qif(lines):
+    """Lee los registros de un extracto QIF separados por '^'"""
+    record = {}
+    for line_number, line in enumerate(lines, start=1):
+        line = line.rstrip('\r\n')
+        if not line or line.startswith('!'):
+            continue
+        code, value = line[0], line[1:]
+        if code == '^':
+            if record:
+                yield _get_qif_row(record, line_number)
+            record = {}
+        else:
+            record[code] = value
+    if record:
+        yield _get_qif_row(record, line_number)
+
+
+def _get_qif_row(record, line):
+    if 'D' not in record or 'T' not in record:
+        raise ValueError('Incomplete transaction on line {}'.format(line))
+    return _get_row(
+        date=_parse_date(
+            record['D'].replace("'", '/').replace(' ', ''),
+            ('%m/%d/%Y', '%m/%d/%y', '%Y-%m-%d'),
+            line
+        ),
+        amount=_parse_amount(record['T'], line),
+        description=record.get('M') or record.get('P'),
+        category=record.get('L')
+    )
+
+
+PARSERS = {
+    FORMAT.CSV: parse_csv,
+    FORMAT.OFX: parse_ofx,
+    FORMAT.QIF: parse_qif,
+}
+
+
+def get_parser(format):
+    try:
+        return PARSERS[format.lower()]
+    except (KeyError, AttributeError):
+        raise ValueError('Unsupported import format {!r}'.format(format))
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _get_categories(account, rows):
+    """
+    Resuelve las categorias de un lote con una sola consulta. Los nombres se repiten
+    entre tipos, asi que se indexan por (nombre, tipo); si un nombre tiene varias
+    categorias del mismo tipo se guarda None y la fila que lo use es ambigua.
+    """
+    names = {row['category'] for row in rows if row['category']}
+    if not names:
+        return {}
+
+    categories = {}
+    for category in Category.objects.filter(user_id=account.user_id, name__in=names):
+        key = (category.name, category.type)
+        categories[key] = None if key in categories else category
+    missing = names - {name for name, _type in categories}
+    if missing:
+        raise ValueError('Unknown categories: {}'.format(', '.join(sorted(missing))))
+
+    return categories
+
+
+def _get_category(row, logic_type, categories):
+    name = row['category']
+    if not name:
+        return None
+
+    key = (name, logic_type)
+    if key not in categories:
+        raise ValueError(
+            'Category {} doesn\'t match the transaction type'.format(name)
+        )
+    if categories[key] is None:
+        raise ValueError(
+            'Category {} is ambiguous, more than one category has that name'.format(name)
+        )
+
+    return categories[key]
+
+
+def _get_transaction(account, row, categories):
+    amount = row['amount']
+    if not amount:
+        raise ValueError('Transaction must have an amount')
+
+    if amount > 0:
+        logic_type = Transaction.LOGIC_TYPE.INCOME
+    else:
+        logic_type = Transaction.LOGIC_TYPE.EXPENSE
+
+    return Transaction(
+        amount=abs(amount),
+        description=row['description'],
+        date=row['date'],
+        category=_get_category(row, logic_type, categories),
+        account=account,
+        type=logic_type,
+        logic_type=logic_type,
+        is_paid=True
+    )
+
+
+def import_transactions(account, rows, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Importa las filas de un extracto como transacciones pagadas de la cuenta.
+    Las filas se consumen por lotes, asi que pueden venir de un generador.
+    Retorna un diccionario con las filas importadas y la velocidad de la importacion.
+    """
+    start = time.monotonic()
+    count = 0
+
+    with db_transaction.atomic():
+        for chunk in _chunks(rows, batch_size):
+            categories = _get_categories(account, chunk)
+            Transaction.objects.bulk_create_transactions(
+                [_get_transaction(account, row, categories) for row in chunk]
+            )
+            count += len(chunk)
+
+    account.refresh_from_db(fields=['balance'])
+
+    seconds = time.monotonic() - start
+    return {
+        'rows': count,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(count / seconds, 1) if seconds else None
+    }
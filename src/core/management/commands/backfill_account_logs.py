@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Account, AccountLog
+
+
+class Command(BaseCommand):
+    """Comando de Django que reconstruye los logs mensuales de saldo de las cuentas"""
+    help = 'Rebuilds the monthly balance snapshots from the paid transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'accounts',
+            nargs='*',
+            type=int,
+            help='Ids of the accounts to rebuild, all of them by default'
+        )
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.order_by('id')
+        if options['accounts']:
+            accounts = accounts.filter(pk__in=options['accounts'])
+
+        count = 0
+        for account in accounts.iterator():
+            AccountLog.objects.rebuild(account)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS('Rebuilt logs of {} accounts'.format(count)))
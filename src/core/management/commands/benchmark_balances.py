@@ -0,0 +1,100 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.models import Account, Category
+
+
+class Command(BaseCommand):
+    """Comando de Django que mide escrituras concurrentes sobre el saldo de una cuenta"""
+    help = (
+        'Applies transactions to a single account from many concurrent writers and '
+        'checks that no balance update was lost'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--transactions', type=int, default=100,
+                            help='Transactions applied by each writer')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the benchmark user and its data')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and options['writers'] > 1:
+            raise CommandError('SQLite doesn\'t support concurrent writers')
+
+        user = get_user_model().objects.create_user(
+            'benchmark-{}@platero.local'.format(int(time.time() * 1000))
+        )
+        account = user.add_account(
+            name='Benchmark',
+            balance=Decimal('0.00'),
+            type=Account.TYPE.CHECKING_ACCOUNT
+        )
+        income = user.add_category(name='Benchmark income', type=Category.TYPE.INCOME)
+        expense = user.add_category(name='Benchmark expense', type=Category.TYPE.EXPENSE)
+
+        try:
+            self.run_benchmark(account, income, expense, options)
+        finally:
+            if not options['keep']:
+                account.transactions.all().delete()
+                user.delete()
+
+    def run_benchmark(self, account, income, expense, options):
+        writers = options['writers']
+        count = options['transactions']
+        today = timezone.localdate()
+
+        def write(writer):
+            for i in range(count):
+                # Cada escritor usa su propia instancia (posiblemente obsoleta)
+                stale_account = Account.objects.get(pk=account.pk)
+                category = income if (writer + i) % 2 else expense
+                stale_account.add_transaction(
+                    type=category.type,
+                    amount=Decimal('1.00'),
+                    date=today,
+                    category=category,
+                    is_paid=True
+                )
+
+        def write_in_thread(writer):
+            try:
+                write(writer)
+            finally:
+                connection.close()
+
+        start = time.monotonic()
+        if writers > 1:
+            with ThreadPoolExecutor(max_workers=writers) as executor:
+                list(executor.map(write_in_thread, range(writers)))
+        else:
+            write(0)
+        seconds = time.monotonic() - start
+
+        transactions = account.transactions.all()
+        expected = sum(
+            (transaction.get_balance_delta() for transaction in transactions),
+            Decimal('0.00')
+        )
+        account.refresh_from_db()
+        log_balance = account.get_balance(today.year, today.month)
+        total = writers * count
+
+        self.stdout.write('{} writes in {:.2f}s ({:.1f} writes/s)'.format(
+            total, seconds, total / seconds if seconds else 0
+        ))
+        if transactions.count() != total or account.balance != expected:
+            raise CommandError('Lost updates: balance {} expected {}'.format(
+                account.balance, expected
+            ))
+        if log_balance != expected:
+            raise CommandError('Monthly log {} expected {}'.format(log_balance, expected))
+
+        self.stdout.write(self.style.SUCCESS('Balance {} is correct'.format(expected)))
@@ -0,0 +1,54 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import Account, LedgerEntry, LedgerCheckpoint
+
+
+class Command(BaseCommand):
+    """Comando de Django que guarda checkpoints periodicos del libro mayor"""
+    help = 'Stores a ledger checkpoint per account so balance reads only sum a short tail'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'accounts',
+            nargs='*',
+            type=int,
+            help='Ids of the accounts to checkpoint, all of them by default'
+        )
+        parser.add_argument(
+            '--date',
+            help='Checkpoint date (YYYY-MM-DD), today by default'
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Complete the ledger of accounts without an opening entry'
+        )
+
+    def handle(self, *args, **options):
+        date = timezone.localdate()
+        if options['date']:
+            try:
+                date = datetime.date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('Invalid date {}'.format(options['date']))
+
+        accounts = Account.objects.order_by('id')
+        if options['accounts']:
+            accounts = accounts.filter(pk__in=options['accounts'])
+
+        entries = 0
+        checkpoints = 0
+        for account in accounts.iterator():
+            if options['backfill']:
+                entries += LedgerEntry.objects.backfill(account)
+            if LedgerCheckpoint.objects.create_checkpoint(account, date):
+                checkpoints += 1
+
+        if options['backfill']:
+            self.stdout.write('Created {} ledger entries'.format(entries))
+        self.stdout.write(self.style.SUCCESS(
+            'Created {} checkpoints at {}'.format(checkpoints, date)
+        ))
@@ -0,0 +1,48 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import importers
+from core.models import Account
+
+
+class Command(BaseCommand):
+    """Comando de Django que importa un extracto bancario a una cuenta"""
+    help = 'Imports a CSV, OFX or QIF bank statement into an account'
+
+    def add_arguments(self, parser):
+        parser.add_argument('account', type=int, help='Id of the destination account')
+        parser.add_argument('path', help='Path of the statement file')
+        parser.add_argument(
+            '--format',
+            choices=[choice for choice, _ in importers.FORMAT.CHOICES],
+            help='Statement format, guessed from the file extension by default'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=importers.DEFAULT_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        try:
+            account = Account.objects.get(pk=options['account'])
+        except Account.DoesNotExist:
+            raise CommandError('Account {} doesn\'t exist'.format(options['account']))
+
+        path = options['path']
+        format = options['format'] or os.path.splitext(path)[1].lstrip('.')
+
+        try:
+            parser = importers.get_parser(format)
+            with open(path, newline='', encoding='utf-8') as statement:
+                result = importers.import_transactions(
+                    account,
+                    parser(statement),
+                    batch_size=options['batch_size']
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        message = 'Imported {rows} rows in {seconds}s ({rows_per_second} rows/s)'
+        self.stdout.write(self.style.SUCCESS(message.format(**result)))
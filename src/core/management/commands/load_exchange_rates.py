@@ -0,0 +1,57 @@
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import rates
+from core.globals import CURRENCY
+from core.models import ExchangeRate
+
+
+def parse_rows(lines):
+    """Lee filas con columnas date, base_currency, quote_currency y rate"""
+    currencies = {currency for currency, _ in CURRENCY.CHOICES}
+    field = ExchangeRate._meta.get_field('rate')
+    reader = csv.DictReader(lines)
+    for row in reader:
+        line = reader.line_num
+        try:
+            rate = Decimal(row['rate'])
+            # NaN no se puede comparar e Infinity no cabe en la columna
+            if (not rate.is_finite() or
+                    abs(rate) >= 10 ** (field.max_digits - field.decimal_places)):
+                raise ValueError(rate)
+            row = {
+                'date': date.fromisoformat(row['date']),
+                'base_currency': row['base_currency'].upper(),
+                'quote_currency': row['quote_currency'].upper(),
+                'rate': rate
+            }
+        except (KeyError, AttributeError, TypeError, ValueError, InvalidOperation):
+            raise ValueError('Invalid exchange rate on line {}'.format(line))
+        if not {row['base_currency'], row['quote_currency']} <= currencies:
+            raise ValueError('Unknown currency on line {}'.format(line))
+        if rate <= 0:
+            raise ValueError('Exchange rates must be positive, line {}'.format(line))
+        yield row
+
+
+class Command(BaseCommand):
+    """Comando de Django que carga tipos de cambio desde un CSV"""
+    help = 'Loads exchange rates from a CSV with date,base_currency,quote_currency,rate'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path of the CSV file')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], newline='', encoding='utf-8') as rates_file:
+                count = ExchangeRate.objects.load(parse_rows(rates_file))
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        # load() guarda en bloque, sin senales
+        rates.clear_cache()
+
+        self.stdout.write(self.style.SUCCESS('Loaded {} exchange rates'.format(count)))
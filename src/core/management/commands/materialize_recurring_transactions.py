@@ -0,0 +1,53 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import RecurringTransaction
+
+
+class Command(BaseCommand):
+    """Comando de Django que crea las transacciones pendientes de las reglas recurrentes"""
+    help = 'Creates the due transactions of every recurring transaction, in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Create the occurrences up to this date (YYYY-MM-DD), today by default'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Recurring transactions locked and processed per database transaction'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Rows per INSERT statement'
+        )
+
+    def handle(self, *args, **options):
+        date = timezone.localdate()
+        if options['date']:
+            try:
+                date = datetime.date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('Invalid date {}'.format(options['date']))
+        if options['chunk_size'] < 1:
+            raise CommandError('The chunk size must be a positive integer')
+
+        start = time.monotonic()
+        result = RecurringTransaction.objects.materialize(
+            date,
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size']
+        )
+        seconds = time.monotonic() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            'Created {} transactions from {} recurring transactions up to {} '
+            'in {:.2f}s'.format(result['transactions'], result['rules'], date, seconds)
+        ))
@@ -0,0 +1,130 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import reconcile
+
+
+def _init_worker():
+    # Con spawn el proceso hijo empieza sin Django configurado
+    if not apps.ready:
+        django.setup()
+
+
+def _reconcile_range(user_range, repair, batch_size):
+    try:
+        return reconcile.reconcile_range(*user_range, repair=repair, batch_size=batch_size)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """Comando de Django que verifica los saldos de las cuentas y puede corregirlos"""
+    help = (
+        'Recomputes every account balance from its opening balance and paid '
+        'transactions, reports the drift and the broken transfers'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Store the recomputed balance in the accounts that drifted'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processes that reconcile user ranges in parallel, one per CPU by default'
+        )
+        parser.add_argument(
+            '--users-per-range',
+            type=int,
+            default=reconcile.DEFAULT_USERS_PER_RANGE,
+            help='User ids reconciled by each task'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=reconcile.DEFAULT_BATCH_SIZE,
+            help='Accounts repaired per UPDATE'
+        )
+
+    def handle(self, *args, **options):
+        for option in ('workers', 'users_per_range', 'batch_size'):
+            if options[option] < 1:
+                raise CommandError('--{} must be a positive integer'.format(
+                    option.replace('_', '-')
+                ))
+
+        # Sin la apertura el saldo esperado no incluye el saldo inicial
+        without_ledger = reconcile.get_accounts_without_ledger().count()
+        if without_ledger:
+            raise CommandError(
+                '{} accounts have no opening ledger entry, complete them first with '
+                'checkpoint_ledgers --backfill'.format(without_ledger)
+            )
+
+        start = time.monotonic()
+        ranges = reconcile.get_user_ranges(options['users_per_range'])
+        arguments = (options['repair'], options['batch_size'])
+        if options['workers'] == 1:
+            results = (reconcile.reconcile_range(*r, *arguments) for r in ranges)
+            self.report(results, options['repair'], start)
+            return
+
+        # Los procesos hijos abren sus propias conexiones, no se heredan
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options['workers'],
+            initializer=_init_worker
+        ) as executor:
+            results = executor.map(
+                _reconcile_range,
+                ranges,
+                [options['repair']] * len(ranges),
+                [options['batch_size']] * len(ranges)
+            )
+            self.report(results, options['repair'], start)
+
+    def report(self, results, repair, start):
+        accounts = 0
+        drifts = 0
+        repaired = 0
+        without_ledger = 0
+        broken_transfers = 0
+        for result in results:
+            accounts += result['accounts']
+            for account_id, balance, expected in result['drifts']:
+                drifts += 1
+                self.stdout.write('Account {}: balance {}, expected {}, drift {}'.format(
+                    account_id, balance, expected, balance - expected
+                ))
+            for account_id in result['without_ledger']:
+                without_ledger += 1
+                self.stdout.write('Account {}: no ledger, skipped'.format(account_id))
+            for transaction_id in result['broken_transfers']:
+                broken_transfers += 1
+                self.stdout.write('Transfer {}: broken linked transaction'.format(
+                    transaction_id
+                ))
+            repaired += result['repaired']
+
+        seconds = time.monotonic() - start
+        summary = (
+            'Checked {} accounts in {:.2f}s: {} drifted, {} without ledger, '
+            '{} broken transfers'.format(
+                accounts, seconds, drifts, without_ledger, broken_transfers
+            )
+        )
+        if repair:
+            summary += ', {} repaired'.format(repaired)
+        if drifts or broken_transfers:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,174 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction as db_transaction
+
+from core.globals import CURRENCY
+from core.models import Account, Category, Transaction, LedgerEntry
+
+ACCOUNT_TYPES = [
+    (Account.TYPE.CHECKING_ACCOUNT, 5),
+    (Account.TYPE.SAVINGS, 3),
+    (Account.TYPE.WALLET, 2),
+    (Account.TYPE.INVESTMENTS, 1),
+]
+
+CATEGORY_TREES = {
+    Category.TYPE.INCOME: {
+        'Salary': ['Bonus', 'Overtime'],
+        'Investments': ['Dividends', 'Interest'],
+    },
+    Category.TYPE.EXPENSE: {
+        'Food': {'Groceries': [], 'Restaurants': ['Fast food', 'Delivery']},
+        'Home': {'Rent': [], 'Utilities': ['Electricity', 'Water', 'Internet']},
+        'Transport': {'Fuel': [], 'Public transport': []},
+        'Leisure': {'Games': [], 'Travel': ['Flights', 'Hotels']},
+        'Health': [],
+    },
+}
+
+
+class Command(BaseCommand):
+    """Comando de Django que genera datos sinteticos reproducibles"""
+    help = (
+        'Generates users with accounts, nested categories, budgets and transactions. '
+        'The same arguments always generate the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--transactions', type=int, default=10000,
+                            help='Transactions per user')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--months', type=int, default=24,
+                            help='Months of history to generate')
+        parser.add_argument('--end', type=date.fromisoformat, default=None,
+                            help='Last date of the history (YYYY-MM-DD), today by default')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.end = options['end'] or date.today()
+        self.start = self.end - timedelta(days=options['months'] * 30)
+
+        email = 'synthetic-{seed}-{{}}@platero.local'.format(seed=options['seed'])
+        if get_user_model().objects.filter(email=email.format(0)).exists():
+            raise CommandError('Seed {} was already generated'.format(options['seed']))
+
+        start = time.monotonic()
+        transactions = 0
+        for i in range(options['users']):
+            with db_transaction.atomic():
+                user = get_user_model().objects.create_user(email.format(i))
+                accounts = self.create_accounts(user)
+                categories = self.create_categories(user)
+                self.create_budgets(user, categories[Category.TYPE.EXPENSE])
+                transactions += self.create_transactions(
+                    accounts,
+                    categories,
+                    options['transactions']
+                )
+            self.stdout.write('User {} of {} generated'.format(i + 1, options['users']))
+
+        seconds = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            'Generated {} users and {} transactions in {:.1f}s ({:.0f} rows/s)'.format(
+                options['users'], transactions, seconds,
+                transactions / seconds if seconds else 0
+            )
+        ))
+
+    def get_amount(self, low, high):
+        return Decimal(self.random.randint(low * 100, high * 100)) / 100
+
+    def create_accounts(self, user):
+        types = [account_type for account_type, weight in ACCOUNT_TYPES]
+        weights = [weight for account_type, weight in ACCOUNT_TYPES]
+
+        Account.objects.bulk_create([
+            Account(
+                name='Account {}'.format(i + 1),
+                user=user,
+                currency=self.random.choice([CURRENCY.PEN, CURRENCY.PEN, CURRENCY.USD]),
+                balance=self.get_amount(0, 5000),
+                type=self.random.choices(types, weights)[0]
+            )
+            for i in range(self.random.randint(2, 5))
+        ])
+        # bulk_create no llama a save(), los saldos iniciales se registran aqui. Como en
+        # Account.save() se registran aunque sean cero
+        accounts = list(user.accounts.order_by('id'))
+        LedgerEntry.objects.bulk_create([
+            LedgerEntry(
+                account=account,
+                date=LedgerEntry.OPENING_DATE,
+                amount=account.balance
+            )
+            for account in accounts
+        ])
+
+        return accounts
+
+    def create_categories(self, user):
+        """Crea los arboles de categorias y retorna las hojas por tipo"""
+        leaves = {}
+
+        def create_tree(type, tree, parent=None):
+            if isinstance(tree, list):
+                tree = {name: [] for name in tree}
+            for name, children in tree.items():
+                category = user.add_category(name=name, type=type, parent=parent)
+                if children:
+                    create_tree(type, children, category)
+                else:
+                    leaves[type].append(category)
+
+        for type, tree in CATEGORY_TREES.items():
+            leaves[type] = []
+            create_tree(type, tree)
+
+        return leaves
+
+    def create_budgets(self, user, categories):
+        month = date(self.start.year, self.start.month, 1)
+        while month <= self.end:
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            budget = user.add_budget(
+                start_date=month,
+                end_date=next_month - timedelta(days=1)
+            )
+            for category in self.random.sample(categories, k=len(categories) // 2):
+                budget.add_category(category, self.get_amount(50, 1000))
+            month = next_month
+
+    def create_transactions(self, accounts, categories, count):
+        days = (self.end - self.start).days
+        created = 0
+        while created < count:
+            chunk = []
+            for i in range(min(self.batch_size, count - created)):
+                # Ingresos escasos pero grandes, para que los saldos no se disparen
+                if self.random.random() < 0.1:
+                    type = Transaction.TYPE.INCOME
+                    amount = self.get_amount(100, 809)
+                else:
+                    type = Transaction.TYPE.EXPENSE
+                    amount = self.get_amount(1, 100)
+                chunk.append(Transaction(
+                    amount=amount,
+                    date=self.start + timedelta(days=self.random.randint(0, days)),
+                    category=self.random.choice(categories[type]),
+                    account=self.random.choice(accounts),
+                    type=type,
+                    logic_type=type,
+                    is_paid=self.random.random() < 0.95
+                ))
+            Transaction.objects.bulk_create_transactions(chunk, batch_size=self.batch_size)
+            created += len(chunk)
+
+        return created
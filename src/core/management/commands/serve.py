@@ -0,0 +1,100 @@
+import importlib.util
+import os
+import sys
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.utils import OperationalError
+
+GUNICORN_CONFIG = os.path.join(settings.BASE_DIR, 'Platero', 'gunicorn.conf.py')
+
+
+class Command(BaseCommand):
+    """
+    Comando de Django que arranca el servidor de produccion: espera a que la base de
+    datos acepte conexiones, migra solo si hay migraciones pendientes y reemplaza el
+    proceso por gunicorn con workers ASGI
+    """
+    help = 'Waits for the database, migrates if needed and starts gunicorn'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--wait', type=float, default=60,
+                            help='Seconds to wait for the database')
+        parser.add_argument('--no-migrate', action='store_true')
+        parser.add_argument('--bind', help='Address to listen on, 0.0.0.0:8000 by default')
+        parser.add_argument('--workers', type=int,
+                            help='Worker processes, 2 * CPUs + 1 by default')
+        parser.add_argument('--threads', type=int,
+                            help='Query threads per worker for the async views, '
+                                 'DASHBOARD_QUERY_THREADS by default')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Prints the server command instead of running it')
+
+    def wait_for_db(self, alias, wait):
+        """Abre una conexion real con reintentos cada vez mas espaciados"""
+        connection = connections[alias]
+        deadline = time.monotonic() + wait
+        delay = 0.5
+        while True:
+            try:
+                connection.ensure_connection()
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                return
+            except OperationalError as e:
+                connection.close()
+                if time.monotonic() + delay > deadline:
+                    raise CommandError('Database unavailable: {}'.format(e))
+                self.stdout.write('Database unavailable, waiting {:.1f}s...'.format(delay))
+                time.sleep(delay)
+                delay = min(delay * 2, 5)
+
+    def has_pending_migrations(self, alias):
+        executor = MigrationExecutor(connections[alias])
+        return bool(executor.migration_plan(executor.loader.graph.leaf_nodes()))
+
+    def get_server_command(self, options):
+        # Con el interprete actual, gunicorn no necesita estar en el PATH
+        command = [
+            sys.executable, '-m', 'gunicorn',
+            '--config', GUNICORN_CONFIG,
+        ]
+        if options['bind']:
+            command += ['--bind', options['bind']]
+        if options['workers']:
+            command += ['--workers', str(options['workers'])]
+        command.append('Platero.asgi:application')
+
+        return command
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        self.wait_for_db(alias, options['wait'])
+        self.stdout.write(self.style.SUCCESS('Database available!'))
+
+        if options['no_migrate']:
+            pass
+        elif self.has_pending_migrations(alias):
+            call_command('migrate', database=alias, interactive=False)
+        else:
+            self.stdout.write('Migrations are up to date')
+
+        command = self.get_server_command(options)
+        if options['dry_run']:
+            self.stdout.write(' '.join(command))
+            return
+        if importlib.util.find_spec('gunicorn') is None:
+            raise CommandError('gunicorn is not installed, install requirements.txt')
+
+        if options['threads']:
+            # Lo lee settings al cargar la aplicacion en gunicorn
+            os.environ['DASHBOARD_QUERY_THREADS'] = str(options['threads'])
+
+        # Los workers abren sus propias conexiones despues del fork
+        connections.close_all()
+        os.execv(command[0], command)
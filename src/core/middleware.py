@@ -0,0 +1,93 @@
+"""
+Instrumentacion de consultas SQL por request.
+
+Se activa con QUERY_STATS = True en los settings (variable de entorno QUERY_STATS=1).
+Cada respuesta lleva la cantidad de consultas, el tiempo total de SQL, la consulta mas
+lenta y el tiempo de respuesta en headers, y se registra una linea JSON en el logger
+'core.middleware'.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+HEADER_QUERY_COUNT = 'X-Query-Count'
+HEADER_QUERY_TIME = 'X-Query-Time-Ms'
+HEADER_SLOWEST_QUERY_TIME = 'X-Slowest-Query-Ms'
+HEADER_RESPONSE_TIME = 'X-Response-Time-Ms'
+
+HEADERS = [
+    HEADER_QUERY_COUNT,
+    HEADER_QUERY_TIME,
+    HEADER_SLOWEST_QUERY_TIME,
+    HEADER_RESPONSE_TIME,
+]
+
+SLOWEST_SQL_LENGTH = 500
+
+
+class QueryStats:
+    """Wrapper de ejecucion que acumula las consultas de un request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_sql = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            seconds = time.perf_counter() - start
+            self.count += 1
+            self.seconds += seconds
+            if self.slowest_sql is None or seconds > self.slowest_seconds:
+                self.slowest_seconds = seconds
+                self.slowest_sql = sql
+
+
+def _milliseconds(seconds):
+    return round(seconds * 1000, 3)
+
+
+class QueryStatsMiddleware:
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_STATS', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        seconds = time.perf_counter() - start
+
+        response[HEADER_QUERY_COUNT] = str(stats.count)
+        response[HEADER_QUERY_TIME] = str(_milliseconds(stats.seconds))
+        response[HEADER_SLOWEST_QUERY_TIME] = str(_milliseconds(stats.slowest_seconds))
+        response[HEADER_RESPONSE_TIME] = str(_milliseconds(seconds))
+
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.count,
+            'query_ms': _milliseconds(stats.seconds),
+            'slowest_query_ms': _milliseconds(stats.slowest_seconds),
+            'slowest_query': (stats.slowest_sql or '')[:SLOWEST_SQL_LENGTH] or None,
+            'response_ms': _milliseconds(seconds),
+        }))
+
+        return response
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:44
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def delete_manual_logs(apps, schema_editor):
+    # Los logs anteriores eran manuales; se reconstruyen con backfill_account_logs
+    AccountLog = apps.get_model('core', 'AccountLog')
+    AccountLog.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_accountlog'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_manual_logs, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='accountlog',
+            name='change',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=9),
+        ),
+        migrations.AlterField(
+            model_name='accountlog',
+            name='month',
+            field=models.PositiveSmallIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='accountlog',
+            name='year',
+            field=models.PositiveSmallIntegerField(),
+        ),
+        migrations.AddConstraint(
+            model_name='accountlog',
+            constraint=models.UniqueConstraint(fields=('account', 'year', 'month'), name='unique_account_log_month'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:47
+
+from django.db import migrations, models
+
+
+def build_paths(apps, schema_editor):
+    # Recorre el arbol por niveles desde las raices
+    Category = apps.get_model('core', 'Category')
+    parents = {None: ('', 0)}
+    pending = list(Category.objects.values_list('id', 'parent_id'))
+    while pending:
+        remaining = []
+        for id, parent_id in pending:
+            if parent_id not in parents:
+                remaining.append((id, parent_id))
+                continue
+            path, level = parents[parent_id]
+            Category.objects.filter(pk=id).update(path=path, level=level + 1)
+            parents[id] = ('{}{}/'.format(path, id), level + 1)
+        if len(remaining) == len(pending):
+            break
+        pending = remaining
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_transaction_account_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='level',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='category_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:51
+
+import datetime
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+OPENING_DATE = datetime.date(1, 1, 1)
+
+
+def backfill_ledgers(apps, schema_editor):
+    """Crea el libro mayor de las cuentas existentes: la apertura y sus transacciones"""
+    Account = apps.get_model('core', 'Account')
+    Transaction = apps.get_model('core', 'Transaction')
+    LedgerEntry = apps.get_model('core', 'LedgerEntry')
+
+    for account in Account.objects.order_by('id').iterator():
+        entries = [
+            LedgerEntry(
+                account_id=account.id,
+                transaction_id=transaction_id,
+                date=date,
+                amount=-amount if logic_type == 'E' else amount
+            )
+            for transaction_id, date, amount, logic_type in Transaction.objects.filter(
+                account_id=account.id,
+                is_paid=True
+            ).order_by('date', 'id').values_list(
+                'id', 'date', 'amount', 'logic_type'
+            ).iterator()
+        ]
+        entries.insert(0, LedgerEntry(
+            account_id=account.id,
+            date=OPENING_DATE,
+            amount=account.balance - sum(
+                (entry.amount for entry in entries), Decimal('0.00')
+            )
+        ))
+        LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_category_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=9)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='core.account')),
+                ('transaction', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='core.transaction')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LedgerCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('entry_id', models.BigIntegerField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=9)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_checkpoints', to='core.account')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['account', 'id'], name='ledger_account_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['account', 'date'], name='ledger_account_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgercheckpoint',
+            index=models.Index(fields=['account', 'date', 'entry_id'], name='ledger_checkpoint_idx'),
+        ),
+        migrations.RunPython(backfill_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('base_currency', models.CharField(choices=[('PEN', 'PEN'), ('USD', 'USD')], max_length=3)),
+                ('quote_currency', models.CharField(choices=[('PEN', 'PEN'), ('USD', 'USD')], max_length=3)),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='exchangerate',
+            constraint=models.UniqueConstraint(fields=('base_currency', 'quote_currency', 'date'), name='unique_exchange_rate_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='exchangerate',
+            constraint=models.CheckConstraint(check=models.Q(('rate__gt', 0)), name='exchange_rate_positive'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:10
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from core import search
+
+
+def install_index(apps, schema_editor):
+    search.install_index(schema_editor)
+
+
+def uninstall_index(apps, schema_editor):
+    search.uninstall_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_exchange_rate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_index, uninstall_index),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from core import search
+
+
+def install_search_index(apps, schema_editor):
+    # SQLite reconstruye core_transaction al agregar la columna y pierde los triggers,
+    # en los demas motores el indice sigue intacto y reinstalarlo reescribe la tabla
+    if schema_editor.connection.vendor == 'sqlite':
+        search.install_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_transaction_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringTransaction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=9)),
+                ('description', models.CharField(blank=True, max_length=255, null=True)),
+                ('type', models.CharField(choices=[('T', 'Transfer'), ('I', 'Income'), ('E', 'Expense')], max_length=1)),
+                ('is_paid', models.BooleanField(default=True)),
+                ('frequency', models.CharField(choices=[('D', 'Daily'), ('W', 'Weekly'), ('M', 'Monthly'), ('Y', 'Yearly')], max_length=1)),
+                ('interval', models.PositiveSmallIntegerField(default=1)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('count', models.PositiveIntegerField(blank=True, null=True)),
+                ('occurrences', models.PositiveIntegerField(default=0)),
+                ('next_date', models.DateField(null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_transactions', to='core.account'),
+        ),
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='recurring_transactions', to='core.category'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='recurring_transaction',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='core.recurringtransaction'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(fields=('recurring_transaction', 'date'), name='unique_recurring_transaction_date'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringtransaction',
+            index=models.Index(fields=['next_date', 'id'], name='recurring_next_date_idx'),
+        ),
+        migrations.RunPython(install_search_index, migrations.RunPython.noop),
+    ]
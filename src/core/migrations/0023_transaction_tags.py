@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def delete_tags_without_user(apps, schema_editor):
+    # Las etiquetas anteriores no tenian usuario ni estaban relacionadas a nada
+    Tag = apps.get_model('core', 'Tag')
+    Tag.objects.filter(user__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_recurring_transaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='user',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tags', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(delete_tags_without_user, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tag',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tags', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_user_tag_name'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='transactions', to='core.Tag'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_transaction_tags'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recurringtransaction',
+            name='type',
+            field=models.CharField(choices=[('I', 'Income'), ('E', 'Expense')], max_length=1),
+        ),
+    ]
@@ -1,10 +1,17 @@
+import calendar
+import datetime
 from decimal import Decimal
 
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connections, models, transaction as db_transaction
+from django.db.models import F, Q, Sum, Case, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Concat, ExtractYear, ExtractMonth, Substr
 from django.utils import timezone
 
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 
+from core import aggregates
 from core.globals import CURRENCY
 from users.models import AbstractUser
 
@@ -105,25 +112,287 @@ class Category(models.Model):
 
     type = models.CharField(max_length=1, choices=TYPE.CHOICES, default=TYPE.EXPENSE)
 
+    # Ids de los ancestros desde la raiz, por ejemplo '1/5/' (materialized path)
+    path = models.CharField(max_length=255, blank=True, default='')
+    level = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['path'],
+                name='category_path_idx',
+                opclasses=['varchar_pattern_ops']
+            )
+        ]
+
+    def get_subtree_path(self):
+        """Retorna el prefijo del path de todos los descendientes"""
+        return '{path}{id}/'.format(path=self.path, id=self.id)
+
+    def save(self, *args, **kwargs):
+        """Mantiene el path y el nivel de la categoria y de sus descendientes"""
+        old_subtree_path = self.get_subtree_path() if self.pk else None
+        old_level = self.level
+
+        if self.parent:
+            if self.pk and (
+                self.parent_id == self.pk or
+                self.parent.path.startswith(old_subtree_path)
+            ):
+                raise ValueError('A category can\'t be moved inside itself')
+            self.path = self.parent.get_subtree_path()
+            self.level = self.parent.level + 1
+        else:
+            self.path = ''
+            self.level = 1
+
+        with db_transaction.atomic():
+            super().save(*args, **kwargs)
+
+            if old_subtree_path and old_subtree_path != self.get_subtree_path():
+                Category.objects.filter(path__startswith=old_subtree_path).update(
+                    path=Concat(
+                        Value(self.get_subtree_path()),
+                        Substr('path', len(old_subtree_path) + 1)
+                    ),
+                    level=F('level') + (self.level - old_level)
+                )
+
     def get_level(self):
         """Retorna el nivel de profundidad de la categoria"""
-        if not self.parent:
-            return 1
+        return self.level
+
+    def get_ancestor_ids(self):
+        return [int(id) for id in self.path.split('/') if id]
 
-        return self.parent.get_level() + 1
+    def get_ancestors(self):
+        """Retorna los ancestros de la categoria desde la raiz"""
+        return Category.objects.filter(pk__in=self.get_ancestor_ids()).order_by('level')
+
+    def get_descendants(self):
+        """Retorna todos los descendientes de la categoria"""
+        return Category.objects.filter(path__startswith=self.get_subtree_path())
+
+    def get_subtree(self):
+        """Retorna la categoria junto con todos sus descendientes"""
+        return Category.objects.filter(
+            Q(pk=self.pk) | Q(path__startswith=self.get_subtree_path())
+        )
 
 
 # Account
+def get_previous_month(year, month):
+    if month == 1:
+        return year - 1, 12
+    return year, month - 1
+
+
+def get_next_month(year, month):
+    if month == 12:
+        return year + 1, 1
+    return year, month + 1
+
+
+class AccountLogManager(models.Manager):
+    """Manager del modelo de log de cuenta"""
+    def _get_opening_balance(self, account_id, year, month):
+        """Retorna el saldo de la cuenta al empezar el mes"""
+        logs = self.filter(account_id=account_id)
+        previous = logs.filter(
+            Q(year__lt=year) | Q(year=year, month__lt=month)
+        ).order_by('-year', '-month').first()
+        if previous:
+            return previous.balance
+
+        following = logs.order_by('year', 'month').first()
+        if following:
+            return following.balance - following.change
+
+        return Account.objects.values_list('balance', flat=True).get(pk=account_id)
+
+    def add_changes(self, changes):
+        """
+        Suma los cambios de saldo {(account_id, year, month): delta} al log de ese mes
+        y a los de todos los meses siguientes.
+        Debe llamarse antes de actualizar el saldo de la cuenta.
+        """
+        for (account_id, year, month), delta in sorted(changes.items()):
+            if not delta:
+                continue
+
+            logs = self.filter(account_id=account_id)
+            updated = logs.filter(year=year, month=month).update(
+                balance=F('balance') + delta,
+                change=F('change') + delta
+            )
+            if not updated:
+                opening_balance = self._get_opening_balance(account_id, year, month)
+                self.create(
+                    account_id=account_id,
+                    year=year,
+                    month=month,
+                    balance=opening_balance + delta,
+                    change=delta
+                )
+
+            logs.filter(Q(year__gt=year) | Q(year=year, month__gt=month)).update(
+                balance=F('balance') + delta
+            )
+
+    def get_balance_expression(self, year, month):
+        """
+        Expresion del saldo de la cuenta (OuterRef('pk')) al cierre del mes, para
+        anotar varias cuentas en una sola consulta. Equivale a Account.get_balance.
+        """
+        logs = self.filter(account=OuterRef('pk'))
+        closing = logs.filter(
+            Q(year__lt=year) | Q(year=year, month__lte=month)
+        ).order_by('-year', '-month').values('balance')[:1]
+        opening = logs.order_by('year', 'month').annotate(
+            opening=F('balance') - F('change')
+        ).values('opening')[:1]
+
+        return Coalesce(
+            Subquery(closing),
+            Subquery(opening),
+            F('balance'),
+            output_field=models.DecimalField(max_digits=9, decimal_places=2)
+        )
+
+    def get_balance_grid(self, accounts, start, end):
+        """
+        Retorna {account_id: [(year, month, balance), ...]} con el saldo de cierre de
+        cada mes entre start y end (tuplas (year, month)) en dos consultas.
+        """
+        start_year, start_month = start
+        end_year, end_month = end
+        previous_year, previous_month = get_previous_month(start_year, start_month)
+
+        accounts = accounts.annotate(
+            start_balance=self.get_balance_expression(previous_year, previous_month)
+        ).values_list('id', 'start_balance')
+
+        month_logs = self.filter(
+            account__in=accounts.values('id')
+        ).filter(
+            Q(year__gt=start_year) | Q(year=start_year, month__gte=start_month)
+        ).filter(
+            Q(year__lt=end_year) | Q(year=end_year, month__lte=end_month)
+        ).values_list('account_id', 'year', 'month', 'balance')
+
+        logs = {}
+        for account_id, year, month, balance in month_logs:
+            logs[(account_id, year, month)] = balance
+
+        grid = {}
+        for account_id, balance in accounts:
+            grid[account_id] = []
+            year, month = start
+            while (year, month) <= (end_year, end_month):
+                balance = logs.get((account_id, year, month), balance)
+                grid[account_id].append((year, month, balance))
+                year, month = get_next_month(year, month)
+
+        return grid
+
+    def rebuild(self, account):
+        """Reconstruye todos los logs de la cuenta a partir de sus transacciones pagadas"""
+        with db_transaction.atomic():
+            # Con la cuenta bloqueada el saldo y las transacciones no cambian
+            Account.objects.lock([account.pk])
+            account.refresh_from_db(fields=['balance'])
+            changes = account.transactions.filter(is_paid=True).annotate(
+                year=ExtractYear('date'),
+                month=ExtractMonth('date')
+            ).values('year', 'month').annotate(
+                change=Sum(Transaction.get_signed_amount())
+            ).order_by('year', 'month')
+
+            logs = []
+            balance = account.balance - sum(log['change'] for log in changes)
+            for log in changes:
+                balance += log['change']
+                logs.append(AccountLog(account=account, balance=balance, **log))
+
+            self.filter(account=account).delete()
+            self.bulk_create(logs)
+
+        return logs
+
+
+class AccountManager(models.Manager):
+    """Manager del modelo de cuenta"""
+    def lock(self, account_ids):
+        """
+        Bloquea las cuentas siempre en orden de id para que dos operaciones sobre las
+        mismas cuentas no se bloqueen mutuamente. Debe llamarse dentro de un atomic.
+        Retorna los ids de los usuarios duenos de las cuentas.
+        """
+        return set(self.select_for_update().filter(
+            pk__in=account_ids
+        ).order_by('pk').values_list('user_id', flat=True))
+
+    def apply_transactions(self, transactions, sign=1):
+        """
+        Aplica (o deshace, con sign=-1) el efecto de las transacciones en la base de datos:
+        agrega sus asientos al libro mayor, actualiza los logs mensuales y suma con F()
+        solo sobre el saldo de cada cuenta.
+        """
+        transactions = list(transactions)
+        changes = Transaction.get_balance_changes(transactions, sign)
+        deltas = {}
+        for (account_id, year, month), delta in changes.items():
+            deltas[account_id] = deltas.get(account_id, Decimal('0.00')) + delta
+
+        with db_transaction.atomic():
+            user_ids = self.lock(deltas)
+
+            LedgerEntry.objects.bulk_create([
+                LedgerEntry(
+                    account_id=transaction.account_id,
+                    transaction_id=transaction.pk,
+                    date=transaction.get_date(),
+                    amount=transaction.get_balance_delta() * sign
+                )
+                for transaction in transactions
+            ])
+            AccountLog.objects.add_changes(changes)
+            for account_id in sorted(deltas):
+                if deltas[account_id]:
+                    self.filter(pk=account_id).update(
+                        balance=F('balance') + deltas[account_id]
+                    )
+
+            # Los updates en bloque no envian senales, se invalida aqui
+            for user_id in user_ids:
+                aggregates.invalidate(user_id)
+
+
 class AccountLog(models.Model):
-    """Modelo de log de cuenta"""
+    """Saldo de la cuenta al cierre de cada mes con movimientos"""
     account = models.ForeignKey('Account', related_name='logs', on_delete=models.CASCADE)
-    year = models.PositiveSmallIntegerField(max_length=4, default=timezone.now().year)
-    month = models.PositiveSmallIntegerField(max_length=2, default=timezone.now().month)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
     balance = models.DecimalField(
         max_digits=9,
         decimal_places=2,
         default=Decimal('0.00')
     )
+    change = models.DecimalField(
+        max_digits=9,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+
+    objects = AccountLogManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['account', 'year', 'month'],
+                name='unique_account_log_month'
+            )
+        ]
 
     def __str__(self):
         return 'Account {account} {year}-{month}'.format(
@@ -172,9 +441,33 @@ class Account(models.Model):
         default=TYPE.CHECKING_ACCOUNT
     )
 
+    objects = AccountManager()
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """Al crear la cuenta registra su saldo inicial en el libro mayor"""
+        adding = self._state.adding
+
+        with db_transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # Se registra aunque sea cero: marca que el libro mayor esta completo
+            if adding:
+                LedgerEntry.objects.create(
+                    account=self,
+                    date=LedgerEntry.OPENING_DATE,
+                    amount=self.balance
+                )
+
+    def get_ledger_balance(self, date=None):
+        """
+        Retorna el saldo segun el libro mayor al final de la fecha, o el actual sin fecha.
+        Parte del ultimo checkpoint y solo suma los asientos posteriores a el.
+        """
+        return LedgerCheckpoint.objects.get_balance(self.pk, date)
+
     def add_transaction(self, type=None, **kwargs):
         if not type:
             raise ValueError('Transaction requires a type')
@@ -191,36 +484,40 @@ class Account(models.Model):
 
         return f(account=self, **kwargs)
 
+    def add_recurring_transaction(self, **kwargs):
+        return RecurringTransaction.objects.create_recurring_transaction(
+            account=self, **kwargs
+        )
+
     def get_balance(self, year=None, month=None):
+        """Retorna el saldo al cierre del mes, o el saldo actual sin especificar fecha"""
+        if not year and not month:
+            return self.balance
         if not year:
             year = timezone.now().year
         if not month:
             month = timezone.now().month
 
-        account_log = self.logs.filter(year=year, month=month)
-        if account_log.exists():
-            balance = account_log.get().balance
-        else:
-            balance = self.balance
+        account_log = self.logs.filter(
+            Q(year__lt=year) | Q(year=year, month__lte=month)
+        ).order_by('-year', '-month').first()
+        if account_log:
+            return account_log.balance
 
-        return balance
-
-    def log(self, year=None, month=None, **attr):
-        if not year:
-            year = timezone.now().year
-        if not month:
-            month = timezone.now().month
+        # Antes del primer mes con movimientos el saldo es el de apertura
+        account_log = self.logs.order_by('year', 'month').first()
+        if account_log:
+            return account_log.balance - account_log.change
 
-        AccountLog.objects.update_or_create(
-            account=self, year=year, month=month, defaults=attr
-        )
+        return self.balance
 
 
 # Transaction
 class TransactionManager(models.Manager):
     """Manager del modelo de transaccion"""
-    def create_transaction(self, amount=None, description=None, date=None, category=None,
-                           account=None, type=None, logic_type=None, is_paid=False):
+    def build_transaction(self, amount=None, description=None, date=None, category=None,
+                          account=None, type=None, logic_type=None, is_paid=False):
+        """Valida y retorna una transaccion sin guardar"""
         if not amount:
             raise ValueError('Transaction must have an amount')
         if not date:
@@ -230,50 +527,188 @@ class TransactionManager(models.Manager):
         if not type:
             raise ValueError('Transaction must have an type')
 
-        transaction = Transaction(
+        return Transaction(
             amount=amount,
             description=description,
             date=date,
             category=category,
             account=account,
             type=type,
-            logic_type=logic_type
+            logic_type=logic_type,
+            is_paid=bool(is_paid)
         )
 
-        transaction.save()
+    def create_transaction(self, **kwargs):
+        transaction = self.build_transaction(**kwargs)
 
-        if is_paid:
-            transaction.apply()
+        with db_transaction.atomic():
+            transaction.save()
+
+            if transaction.is_paid:
+                Account.objects.apply_transactions([transaction])
+
+        if transaction.is_paid:
+            transaction.refresh_account_balance()
 
         return transaction
 
     def create_transfer(self, **kwargs):
         """Funcion de manager que crea transferencias"""
+        return self.create_transfers([kwargs])[0]
+
+    def _insert(self, transactions, batch_size=None):
+        """
+        Inserta en bloque y deja los ids en las transacciones. Debe llamarse dentro de
+        un atomic. Si la base de datos no retorna los ids se leen despues del insert en
+        SQLite, o se inserta una por una en las demas.
+        """
+        connection = connections[self.db]
+        if connection.features.can_return_rows_from_bulk_insert:
+            self.bulk_create(transactions, batch_size=batch_size)
+        elif connection.vendor == 'sqlite' and transactions:
+            # SQLite bloquea toda la base al escribir, asi que los ids del lote son los
+            # ultimos y consecutivos hasta que termine la transaccion
+            self.bulk_create(transactions, batch_size=batch_size)
+            last = self.aggregate(last=models.Max('pk'))['last']
+            first = last - len(transactions) + 1
+            for pk, transaction in enumerate(transactions, start=first):
+                transaction.pk = pk
+        else:
+            for transaction in transactions:
+                transaction.save()
+
+    def create_transfers(self, transfers, batch_size=None):
+        """
+        Crea varias transferencias en un solo atomic. Cada transferencia es un diccionario
+        con account, destination_account, amount, date y opcionalmente description,
+        category e is_paid. Retorna las transacciones de salida, enlazadas a las entradas.
+
+        Las cuentas se bloquean en orden de id antes de insertar, asi que dos lotes sobre
+        las mismas cuentas no se bloquean mutuamente, y el numero de sentencias no depende
+        del numero de transferencias: un insert por pierna, un update para el enlace y
+        los de Account.objects.apply_transactions.
+        """
+        outputs = []
+        inputs = []
+        for transfer in transfers:
+            transfer = dict(transfer)
+            destination_account = transfer.pop('destination_account', None)
+            if not destination_account:
+                raise ValueError('Transfer must have a destination account')
+            description = transfer.pop('description', None)
+
+            outputs.append(self.build_transaction(
+                **transfer,
+                description=description or 'Transfer output',
+                type=Transaction.TYPE.TRANSFER,
+                logic_type=Transaction.LOGIC_TYPE.EXPENSE
+            ))
+            transfer['account'] = destination_account
+            inputs.append(self.build_transaction(
+                **transfer,
+                description=description or 'Transfer input',
+                type=Transaction.TYPE.TRANSFER,
+                logic_type=Transaction.LOGIC_TYPE.INCOME
+            ))
+        transactions = outputs + inputs
+        if not transactions:
+            return []
+
+        with db_transaction.atomic():
+            Account.objects.lock({transaction.account_id for transaction in transactions})
+
+            self._insert(outputs, batch_size)
+            for output, input in zip(outputs, inputs):
+                input.linked_transaction = output
+            self._insert(inputs, batch_size)
+
+            # Cada salida apunta a la entrada que la referencia
+            self.filter(pk__in=[output.pk for output in outputs]).update(
+                linked_transaction=Subquery(
+                    self.filter(linked_transaction=OuterRef('pk')).values('pk')[:1]
+                )
+            )
+            for output, input in zip(outputs, inputs):
+                output.linked_transaction = input
 
-        account = kwargs.pop('account')
-        destination_account = kwargs.pop('destination_account')
+            Account.objects.apply_transactions(
+                transaction for transaction in transactions if transaction.is_paid
+            )
 
-        transaction1 = self.create_transaction(
-            **kwargs,
-            account=account,
-            description='Transfer output',
-            type=Transaction.TYPE.TRANSFER,
-            logic_type=Transaction.LOGIC_TYPE.EXPENSE
-        )
+        Transaction.refresh_account_balances(transactions)
+
+        return outputs
+
+    def apply_transactions(self, transactions):
+        """
+        Aplica el saldo de varias transacciones sin pagar con un solo bloqueo de sus
+        cuentas, por ejemplo las dos piernas de una transferencia
+        """
+        transactions = list(transactions)
+        if not transactions:
+            return
+
+        with db_transaction.atomic():
+            updated = self.filter(
+                pk__in=[transaction.pk for transaction in transactions],
+                is_paid=False
+            ).update(is_paid=True)
+            if updated != len(transactions):
+                raise ValueError('The transasction has been applied')
+            Account.objects.apply_transactions(transactions)
+
+        for transaction in transactions:
+            transaction.is_paid = True
+        Transaction.refresh_account_balances(transactions)
+
+    def unapply_transactions(self, transactions):
+        """
+        Deshace el saldo de varias transacciones pagadas con un solo bloqueo de sus
+        cuentas, por ejemplo las dos piernas de una transferencia
+        """
+        transactions = list(transactions)
+        if not transactions:
+            return
+
+        with db_transaction.atomic():
+            updated = self.filter(
+                pk__in=[transaction.pk for transaction in transactions],
+                is_paid=True
+            ).update(is_paid=False)
+            if updated != len(transactions):
+                raise ValueError('The transasction has not been applied')
+            Account.objects.apply_transactions(transactions, sign=-1)
+
+        for transaction in transactions:
+            transaction.is_paid = False
+        Transaction.refresh_account_balances(transactions)
+
+    def bulk_create_transactions(self, transactions, batch_size=None):
+        """Inserta transacciones en bloque y aplica las pagadas con un update por cuenta"""
+        transactions = list(transactions)
+        with db_transaction.atomic():
+            # Se bloquea antes de insertar, las llaves foraneas tambien toman las cuentas
+            Account.objects.lock({
+                transaction.account_id for transaction in transactions
+                if transaction.is_paid
+            })
+            self._insert(transactions, batch_size)
+            Account.objects.apply_transactions(
+                transaction for transaction in transactions if transaction.is_paid
+            )
 
-        transaction2 = self.create_transaction(
-            **kwargs,
-            account=destination_account,
-            description='Transfer input',
-            type=Transaction.TYPE.TRANSFER,
-            logic_type=Transaction.LOGIC_TYPE.INCOME
-        )
-        transaction1.linked_transaction = transaction2
-        transaction2.linked_transaction = transaction1
-        transaction1.save()
-        transaction2.save()
+            # apply_transactions solo invalida a los duenos de las cuentas con pagadas
+            unpaid_account_ids = {
+                transaction.account_id for transaction in transactions
+                if not transaction.is_paid
+            }
+            if unpaid_account_ids:
+                for user_id in set(Account.objects.filter(
+                    pk__in=unpaid_account_ids
+                ).values_list('user_id', flat=True)):
+                    aggregates.invalidate(user_id)
 
-        return transaction1
+        return transactions
 
     def create_income(self, **kwargs):
         """Funcion de manager que crea ingresos"""
@@ -361,68 +796,771 @@ class Transaction(models.Model):
         ]
     type = models.CharField(max_length=1, choices=TYPE.CHOICES)
     is_paid = models.BooleanField(default=False)
+    # Lo mantiene un trigger de PostgreSQL con la descripcion, ver core.search
+    search_vector = SearchVectorField(null=True, editable=False)
+    tags = models.ManyToManyField('Tag', related_name='transactions', blank=True)
+    recurring_transaction = models.ForeignKey(
+        'RecurringTransaction',
+        related_name='transactions',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
 
     objects = TransactionManager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['account', 'date', 'id'],
+                name='transaction_account_date_idx'
+            ),
+            # Filtros del listado de transacciones (transactions.views)
+            models.Index(
+                fields=['account', 'type', 'date'],
+                name='transaction_account_type_idx'
+            ),
+            models.Index(
+                fields=['account', 'is_paid', 'date'],
+                name='transaction_account_paid_idx'
+            ),
+            models.Index(
+                fields=['category', 'type', 'date'],
+                name='transaction_category_type_idx'
+            ),
+        ]
+        constraints = [
+            # Una regla recurrente crea una sola transaccion por fecha
+            models.UniqueConstraint(
+                fields=['recurring_transaction', 'date'],
+                name='unique_recurring_transaction_date'
+            )
+        ]
+
+    @staticmethod
+    def get_signed_amount():
+        """Expression with the amount signed by logic type, for aggregations"""
+        return Case(
+            When(logic_type=Transaction.LOGIC_TYPE.EXPENSE, then=-F('amount')),
+            default=F('amount'),
+            output_field=models.DecimalField(max_digits=9, decimal_places=2)
+        )
+
+    def get_date(self):
+        """Returns the date as a date object, even if it was assigned as a string"""
+        return self._meta.get_field('date').to_python(self.date)
+
+    def get_balance_delta(self):
+        """Returns the signed change this transaction makes to its account balance"""
+        if self.logic_type == Transaction.LOGIC_TYPE.EXPENSE:
+            return -self.amount
+
+        return self.amount
+
+    @staticmethod
+    def get_balance_changes(transactions, sign=1):
+        """Groups the balance deltas of the transactions by account and month"""
+        changes = {}
+        for transaction in transactions:
+            date = transaction.get_date()
+            key = (transaction.account_id, date.year, date.month)
+            delta = transaction.get_balance_delta() * sign
+            changes[key] = changes.get(key, Decimal('0.00')) + delta
+
+        return changes
+
+    def refresh_account_balance(self):
+        """Reloads the balance of the account if it was already loaded"""
+        if self._meta.get_field('account').is_cached(self):
+            self.account.refresh_from_db(fields=['balance'])
+
+    @staticmethod
+    def refresh_account_balances(transactions):
+        """Reloads the balances of the loaded accounts with a single query"""
+        field = Transaction._meta.get_field('account')
+        accounts = [
+            transaction.account for transaction in transactions
+            if field.is_cached(transaction)
+        ]
+        if not accounts:
+            return
+
+        balances = dict(Account.objects.filter(
+            pk__in={account.pk for account in accounts}
+        ).values_list('pk', 'balance'))
+        for account in accounts:
+            account.balance = balances[account.pk]
+
     def apply(self):
         """Applies the changes in balance of an unpaid transaction"""
         if self.is_paid:
             raise ValueError('The transasction has been applied')
 
-        amount = self.amount
-
-        if self.logic_type == Transaction.LOGIC_TYPE.EXPENSE:
-            amount *= -1
+        with db_transaction.atomic():
+            # Solo una peticion concurrente puede marcarla como pagada
+            updated = Transaction.objects.filter(pk=self.pk, is_paid=False).update(
+                is_paid=True
+            )
+            if not updated:
+                raise ValueError('The transasction has been applied')
+            Account.objects.apply_transactions([self])
 
-        self.account.balance += amount
-        self.account.save()
         self.is_paid = True
-        self.save()
+        self.refresh_account_balance()
 
     def unapply(self):
         """Undoes the changes in balance of a paid transaction"""
         if not self.is_paid:
             raise ValueError('The transasction has not been applied')
 
-        amount = self.amount
-
-        if self.type == Transaction.LOGIC_TYPE.INCOME:
-            amount *= -1
+        with db_transaction.atomic():
+            updated = Transaction.objects.filter(pk=self.pk, is_paid=True).update(
+                is_paid=False
+            )
+            if not updated:
+                raise ValueError('The transasction has not been applied')
+            Account.objects.apply_transactions([self], sign=-1)
 
-        self.account.balance += amount
-        self.account.save()
         self.is_paid = False
-        self.save()
+        self.refresh_account_balance()
+
+
+# Recurring transaction
+def add_months(date, months):
+    """Suma meses a la fecha, con el dia limitado al ultimo dia del mes resultante"""
+    month = date.month - 1 + months
+    year = date.year + month // 12
+    month = month % 12 + 1
+    day = min(date.day, calendar.monthrange(year, month)[1])
+    return datetime.date(year, month, day)
+
+
+class RecurringTransactionManager(models.Manager):
+    """Manager del modelo de transaccion recurrente"""
+    def create_recurring_transaction(self, account=None, category=None, amount=None,
+                                     type=None, frequency=None, start_date=None,
+                                     interval=1, description=None, end_date=None,
+                                     count=None, is_paid=True):
+        if not account:
+            raise ValueError('Recurring transaction must have an account')
+        if not amount or amount < 0:
+            raise ValueError('Recurring transaction must have a positive amount')
+        if type not in (Transaction.TYPE.INCOME, Transaction.TYPE.EXPENSE):
+            raise ValueError('Recurring transaction must be an income or an expense')
+        if not category or category.type != type:
+            raise ValueError('Recurring transaction must have a category of its type')
+        if category.user_id != account.user_id:
+            raise ValueError('The category must belong to the owner of the account')
+        if frequency not in dict(RecurringTransaction.FREQUENCY.CHOICES):
+            raise ValueError('Incorrect frequency for recurring transaction')
+        if not start_date:
+            raise ValueError('Recurring transaction must have a start date')
+        if not interval or interval < 1:
+            raise ValueError('The interval must be a positive integer')
+        if end_date and end_date < start_date:
+            raise ValueError('The end date must not be before the start date')
+        if count is not None and count < 1:
+            raise ValueError('The count must be a positive integer')
+
+        recurring_transaction = self.model(
+            account=account,
+            category=category,
+            amount=amount,
+            description=description,
+            type=type,
+            is_paid=is_paid,
+            frequency=frequency,
+            interval=interval,
+            start_date=start_date,
+            end_date=end_date,
+            count=count
+        )
+        recurring_transaction.save()
+
+        return recurring_transaction
+
+    def materialize(self, date=None, chunk_size=1000, batch_size=None):
+        """
+        Crea las transacciones de todas las reglas con ocurrencias hasta la fecha
+        (hoy por defecto). Las reglas se procesan por lotes de chunk_size en orden de
+        id: cada lote se bloquea, inserta sus transacciones con bulk_create, aplica los
+        saldos con un update por cuenta y avanza next_date en un mismo atomic, asi que
+        volver a correrlo no duplica ocurrencias. Los lotes bloqueados por otro
+        proceso se saltan. Retorna las reglas procesadas y las transacciones creadas.
+        """
+        if not date:
+            date = timezone.localdate()
+
+        rules = 0
+        transactions = 0
+        last_id = 0
+        while True:
+            with db_transaction.atomic():
+                chunk = list(self.select_for_update(skip_locked=True).filter(
+                    next_date__lte=date,
+                    pk__gt=last_id
+                ).order_by('pk')[:chunk_size])
+                if not chunk:
+                    break
+                last_id = chunk[-1].pk
+
+                occurrences = []
+                for recurring_transaction in chunk:
+                    occurrences.extend(recurring_transaction.get_due_transactions(date))
+                occurrences = self._exclude_materialized(occurrences)
+                try:
+                    with db_transaction.atomic():
+                        Transaction.objects.bulk_create_transactions(
+                            occurrences, batch_size
+                        )
+                except IntegrityError:
+                    occurrences, failed = self._create_each(occurrences, batch_size)
+                    chunk = [rule for rule in chunk if rule.pk not in failed]
+                self.bulk_update(chunk, ['occurrences', 'next_date'], batch_size)
+
+            rules += len(chunk)
+            transactions += len(occurrences)
+
+        return {'rules': rules, 'transactions': transactions}
+
+    def _exclude_materialized(self, occurrences):
+        """
+        Descarta las ocurrencias que la regla ya creo, por ejemplo si se edito su
+        calendario sin pasar por clean(); igual cuentan como ocurrencias
+        """
+        if not occurrences:
+            return occurrences
+
+        dates = [occurrence.date for occurrence in occurrences]
+        existing = set(Transaction.objects.filter(
+            recurring_transaction_id__in={
+                occurrence.recurring_transaction_id for occurrence in occurrences
+            },
+            date__range=(min(dates), max(dates))
+        ).values_list('recurring_transaction_id', 'date'))
+
+        return [
+            occurrence for occurrence in occurrences
+            if (occurrence.recurring_transaction_id, occurrence.date) not in existing
+        ]
+
+    def _create_each(self, occurrences, batch_size):
+        """
+        Inserta las ocurrencias de cada regla en su propio savepoint, para que una regla
+        que falla no frene al resto del lote. Retorna las transacciones creadas y los
+        ids de las reglas que fallaron, que quedan como estaban.
+        """
+        by_rule = {}
+        for occurrence in occurrences:
+            # Pueden traer el id del insert del lote que se deshizo
+            occurrence.pk = None
+            occurrence._state.adding = True
+            by_rule.setdefault(occurrence.recurring_transaction_id, []).append(occurrence)
+
+        created = []
+        failed = set()
+        for rule_id, rule_occurrences in by_rule.items():
+            try:
+                with db_transaction.atomic():
+                    Transaction.objects.bulk_create_transactions(
+                        rule_occurrences, batch_size
+                    )
+            except IntegrityError:
+                failed.add(rule_id)
+            else:
+                created.extend(rule_occurrences)
+
+        return created, failed
+
+
+class RecurringTransaction(models.Model):
+    """Regla de un ingreso o egreso que se repite, al estilo de un RRULE"""
+    account = models.ForeignKey(
+        'Account',
+        related_name='recurring_transactions',
+        on_delete=models.CASCADE
+    )
+    category = models.ForeignKey(
+        'Category',
+        related_name='recurring_transactions',
+        on_delete=models.PROTECT
+    )
+    amount = models.DecimalField(max_digits=9, decimal_places=2)
+    description = models.CharField(max_length=255, blank=True, null=True)
+    # Solo ingresos y egresos, las transferencias no se repiten
+    type = models.CharField(max_length=1, choices=[
+        (type, name) for type, name in Transaction.TYPE.CHOICES
+        if type != Transaction.TYPE.TRANSFER
+    ])
+    is_paid = models.BooleanField(default=True)
+
+    class FREQUENCY:
+        DAILY = 'D'
+        WEEKLY = 'W'
+        MONTHLY = 'M'
+        YEARLY = 'Y'
+
+        CHOICES = [
+            (DAILY, 'Daily'),
+            (WEEKLY, 'Weekly'),
+            (MONTHLY, 'Monthly'),
+            (YEARLY, 'Yearly')
+        ]
+    frequency = models.CharField(max_length=1, choices=FREQUENCY.CHOICES)
+    interval = models.PositiveSmallIntegerField(default=1)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+
+    # Ocurrencias ya creadas y fecha de la siguiente, nula cuando la regla termino
+    occurrences = models.PositiveIntegerField(default=0)
+    next_date = models.DateField(null=True)
+
+    # Campos que definen las fechas de las ocurrencias
+    SCHEDULE_FIELDS = ('frequency', 'interval', 'start_date')
+
+    objects = RecurringTransactionManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['next_date', 'id'],
+                name='recurring_next_date_idx'
+            )
+        ]
+
+    def clean(self):
+        """Valida la categoria y el calendario, por ejemplo desde el admin"""
+        if self.category_id and self.type and self.category.type != self.type:
+            raise ValidationError({'category': 'The category must be of the rule type'})
+        if (self.category_id and self.account_id and
+                self.category.user_id != self.account.user_id):
+            raise ValidationError({
+                'category': 'The category must belong to the owner of the account'
+            })
+        if self.amount is not None and self.amount <= 0:
+            raise ValidationError({'amount': 'The amount must be positive'})
+        if self.interval is not None and self.interval < 1:
+            raise ValidationError({'interval': 'The interval must be a positive integer'})
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValidationError({
+                'end_date': 'The end date must not be before the start date'
+            })
+        if self.count is not None and self.count < 1:
+            raise ValidationError({'count': 'The count must be a positive integer'})
+        if self.pk and self.occurrences:
+            # next_date sale del indice de la ocurrencia, con otro calendario apuntaria
+            # a fechas que no corresponden a las ya creadas
+            original = type(self).objects.filter(pk=self.pk).values(
+                *self.SCHEDULE_FIELDS
+            ).first() or {}
+            changed = [
+                field for field in self.SCHEDULE_FIELDS
+                if field in original and getattr(self, field) != original[field]
+            ]
+            if changed:
+                raise ValidationError({
+                    field: 'The schedule cannot change once the rule has occurrences'
+                    for field in changed
+                })
+
+    def save(self, *args, **kwargs):
+        """Calcula la siguiente ocurrencia, que depende del calendario y de occurrences"""
+        self.next_date = self.get_next_date()
+        super().save(*args, **kwargs)
+
+    def get_occurrence_date(self, index):
+        """Retorna la fecha de la ocurrencia index (0 es start_date)"""
+        step = index * self.interval
+        if self.frequency == self.FREQUENCY.DAILY:
+            return self.start_date + datetime.timedelta(days=step)
+        if self.frequency == self.FREQUENCY.WEEKLY:
+            return self.start_date + datetime.timedelta(weeks=step)
+        if self.frequency == self.FREQUENCY.MONTHLY:
+            return add_months(self.start_date, step)
+        return add_months(self.start_date, step * 12)
+
+    def get_next_date(self):
+        """Retorna la fecha de la siguiente ocurrencia, o None si la regla termino"""
+        if self.count is not None and self.occurrences >= self.count:
+            return None
+        date = self.get_occurrence_date(self.occurrences)
+        if self.end_date and date > self.end_date:
+            return None
+
+        return date
+
+    def get_due_transactions(self, date):
+        """
+        Retorna las transacciones sin guardar de las ocurrencias hasta la fecha y
+        avanza occurrences y next_date, sin guardar la regla
+        """
+        transactions = []
+        while self.next_date and self.next_date <= date:
+            transactions.append(Transaction(
+                amount=self.amount,
+                description=self.description,
+                date=self.next_date,
+                category_id=self.category_id,
+                account_id=self.account_id,
+                type=self.type,
+                logic_type=self.type,
+                is_paid=self.is_paid,
+                recurring_transaction_id=self.pk
+            ))
+            self.occurrences += 1
+            self.next_date = self.get_next_date()
+
+        return transactions
+
+
+# Ledger
+class LedgerEntryManager(models.Manager):
+    """Manager de asientos del libro mayor"""
+    def get_openings(self):
+        """Asientos de apertura, cada cuenta con uno tiene su libro mayor completo"""
+        return self.filter(date=LedgerEntry.OPENING_DATE, transaction__isnull=True)
+
+    def backfill(self, account, batch_size=1000):
+        """
+        Completa el libro mayor de una cuenta sin asiento de apertura, como las creadas
+        antes del libro mayor, aunque ya tenga asientos de transacciones posteriores.
+        Agrega por transaccion lo que su efecto actual no explica con sus asientos y
+        despues la apertura con el resto del saldo. Retorna los asientos creados.
+        """
+        with db_transaction.atomic():
+            Account.objects.lock([account.pk])
+            if self.get_openings().filter(account=account).exists():
+                return 0
+
+            account.refresh_from_db(fields=['balance'])
+
+            # Efecto y fecha de cada transaccion segun los asientos que ya tiene
+            recorded = {}
+            total = Decimal('0.00')
+            for transaction_id, date, amount in self.filter(account=account).values_list(
+                'transaction_id', 'date', 'amount'
+            ).iterator(chunk_size=batch_size):
+                total += amount
+                previous = recorded.get(transaction_id, (date, Decimal('0.00')))
+                recorded[transaction_id] = (date, previous[1] + amount)
+
+            entries = []
+            transactions = account.transactions.filter(is_paid=True).order_by('date', 'id')
+            for transaction in transactions.only(
+                'id', 'date', 'amount', 'logic_type', 'account_id'
+            ).iterator(chunk_size=batch_size):
+                amount = recorded.pop(transaction.pk, (None, Decimal('0.00')))[1]
+                entries.append(LedgerEntry(
+                    account=account,
+                    transaction_id=transaction.pk,
+                    date=transaction.date,
+                    amount=transaction.get_balance_delta() - amount
+                ))
+            # Transacciones que ya no estan pagadas en la cuenta: su efecto actual es cero
+            recorded.pop(None, None)
+            for transaction_id, (date, amount) in sorted(recorded.items()):
+                entries.append(LedgerEntry(
+                    account=account,
+                    transaction_id=transaction_id,
+                    date=date,
+                    amount=-amount
+                ))
+            entries = [entry for entry in entries if entry.amount]
+
+            opening_balance = account.balance - total - sum(
+                (entry.amount for entry in entries), Decimal('0.00')
+            )
+            entries.insert(0, LedgerEntry(
+                account=account,
+                date=LedgerEntry.OPENING_DATE,
+                amount=opening_balance
+            ))
+            self.bulk_create(entries, batch_size=batch_size)
+
+        return len(entries)
+
+
+class LedgerEntry(models.Model):
+    """Asiento del libro mayor de una cuenta, nunca se modifica ni se borra"""
+    # Fecha de los saldos iniciales, anterior a cualquier transaccion
+    OPENING_DATE = datetime.date(1, 1, 1)
+
+    account = models.ForeignKey(
+        'Account',
+        related_name='ledger_entries',
+        on_delete=models.CASCADE
+    )
+    # Se conserva el id aunque la transaccion se borre, para poder auditar
+    transaction = models.ForeignKey(
+        'Transaction',
+        related_name='ledger_entries',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True
+    )
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=9, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = LedgerEntryManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account', 'id'], name='ledger_account_id_idx'),
+            models.Index(fields=['account', 'date'], name='ledger_account_date_idx')
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            raise ValueError('Ledger entries can\'t be modified')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('Ledger entries can\'t be deleted')
+
+
+class LedgerCheckpointManager(models.Manager):
+    """Manager de checkpoints del libro mayor"""
+    def get_balance(self, account_id, date=None, last_entry_id=None):
+        """
+        Saldo al final de la fecha (o actual sin fecha) contando solo los asientos
+        con id hasta last_entry_id (o todos).
+        Un checkpoint cubre los asientos con id <= entry_id y fecha <= date, asi que
+        solo falta sumar los asientos nuevos y los fechados despues del checkpoint.
+        """
+        checkpoints = self.filter(account_id=account_id)
+        entries = LedgerEntry.objects.filter(account_id=account_id)
+        if date:
+            checkpoints = checkpoints.filter(date__lte=date)
+            entries = entries.filter(date__lte=date)
+        if last_entry_id is not None:
+            checkpoints = checkpoints.filter(entry_id__lte=last_entry_id)
+            entries = entries.filter(id__lte=last_entry_id)
+
+        checkpoint = checkpoints.order_by('-date', '-entry_id').first()
+        balance = Decimal('0.00')
+        if checkpoint:
+            balance = checkpoint.balance
+            entries = entries.filter(
+                Q(id__gt=checkpoint.entry_id) | Q(date__gt=checkpoint.date)
+            )
+
+        tail = entries.aggregate(total=Sum('amount')).get('total')
+
+        return balance + (tail or Decimal('0.00'))
+
+    def create_checkpoint(self, account, date):
+        """Guarda el saldo de la cuenta al final de la fecha con todos sus asientos"""
+        with db_transaction.atomic():
+            # Con la cuenta bloqueada no quedan asientos por confirmar
+            Account.objects.lock([account.pk])
+            entry_id = LedgerEntry.objects.filter(account=account).aggregate(
+                last=models.Max('id')
+            ).get('last')
+            if entry_id is None:
+                return None
+
+            return self.create(
+                account=account,
+                date=date,
+                entry_id=entry_id,
+                balance=self.get_balance(account.pk, date, entry_id)
+            )
+
+
+class LedgerCheckpoint(models.Model):
+    """Saldo de la cuenta con los asientos hasta entry_id y fechados hasta date"""
+    account = models.ForeignKey(
+        'Account',
+        related_name='ledger_checkpoints',
+        on_delete=models.CASCADE
+    )
+    date = models.DateField()
+    entry_id = models.BigIntegerField()
+    balance = models.DecimalField(max_digits=9, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = LedgerCheckpointManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['account', 'date', 'entry_id'],
+                name='ledger_checkpoint_idx'
+            )
+        ]
+
+
+# Exchange rate
+class ExchangeRateManager(models.Manager):
+    """Manager de tipos de cambio"""
+    def get_rates(self, date=None):
+        """
+        Retorna {(base_currency, quote_currency): rate} con el ultimo tipo de cambio de
+        cada par hasta la fecha, incluyendo los pares inversos, en una sola consulta
+        """
+        if not date:
+            date = timezone.localtime(timezone.now()).date()
+
+        latest_date = self.filter(
+            base_currency=OuterRef('base_currency'),
+            quote_currency=OuterRef('quote_currency'),
+            date__lte=date
+        ).order_by('-date').values('date')[:1]
+
+        rates = {}
+        for base, quote, rate in self.filter(date=Subquery(latest_date)).values_list(
+            'base_currency', 'quote_currency', 'rate'
+        ):
+            rates[base, quote] = rate
+            rates.setdefault((quote, base), 1 / rate)
+
+        return rates
+
+    def load(self, rows):
+        """
+        Guarda los tipos de cambio de rows (date, base_currency, quote_currency, rate),
+        reemplazando los del mismo par y fecha. Retorna cuantos guardo.
+        """
+        rates = {
+            (row['date'], row['base_currency'], row['quote_currency']): row['rate']
+            for row in rows
+        }
+        if not rates:
+            return 0
+
+        with db_transaction.atomic():
+            existing = self.filter(date__in={date for date, base, quote in rates})
+            updated = []
+            for exchange_rate in existing:
+                key = (
+                    exchange_rate.date,
+                    exchange_rate.base_currency,
+                    exchange_rate.quote_currency
+                )
+                if key in rates:
+                    exchange_rate.rate = rates.pop(key)
+                    updated.append(exchange_rate)
+            self.bulk_update(updated, ['rate'])
+            self.bulk_create([
+                ExchangeRate(
+                    date=date,
+                    base_currency=base,
+                    quote_currency=quote,
+                    rate=rate
+                )
+                for (date, base, quote), rate in rates.items()
+            ])
+
+        return len(updated) + len(rates)
+
+
+class ExchangeRate(models.Model):
+    """Cuantas unidades de quote_currency vale una unidad de base_currency en date"""
+    date = models.DateField()
+    base_currency = models.CharField(max_length=3, choices=CURRENCY.CHOICES)
+    quote_currency = models.CharField(max_length=3, choices=CURRENCY.CHOICES)
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+
+    objects = ExchangeRateManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['base_currency', 'quote_currency', 'date'],
+                name='unique_exchange_rate_date'
+            ),
+            models.CheckConstraint(
+                check=Q(rate__gt=0),
+                name='exchange_rate_positive'
+            )
+        ]
+
+    def __str__(self):
+        return '{date} {base}/{quote} {rate}'.format(
+            date=self.date,
+            base=self.base_currency,
+            quote=self.quote_currency,
+            rate=self.rate
+        )
 
 
 # Tag
 class TagManager(models.Manager):
     """Manager de etiqueta"""
-    def create_tag(self, name):
+    def create_tag(self, user, name):
         if not name:
             raise ValueError('Tags must have a name')
-        tag = self.model(name=name)
+        tag = self.model(user=user, name=name)
         tag.save()
 
         return tag
 
-    def get_or_create_tag(self, name):
+    def get_or_create_tag(self, user, name):
         if not name:
             raise ValueError('Tags must have a name')
-        try:
-            tag = Tag.objects.get(name=name)
-        except Tag.DoesNotExist:
-            tag = self.create_tag(name)
-        tag.save()
+        tag, created = self.get_or_create(user=user, name=name)
+
         return tag
 
+    def upsert_tags(self, user, names):
+        """
+        Crea las etiquetas del usuario que no existan con un solo insert (ON CONFLICT
+        DO NOTHING) y retorna todas las etiquetas de los nombres con una consulta
+        """
+        names = {name.strip() for name in names if name and name.strip()}
+        if not names:
+            return []
+        if any(len(name) > Tag._meta.get_field('name').max_length for name in names):
+            raise ValueError('Tag names must have at most 255 characters')
+
+        self.bulk_create(
+            [self.model(user=user, name=name) for name in sorted(names)],
+            ignore_conflicts=True
+        )
+
+        return list(self.filter(user=user, name__in=names).order_by('name'))
+
+    def tag_transactions(self, user, transactions, names):
+        """
+        Agrega las etiquetas (por nombre, se crean si no existen) a las transacciones
+        del usuario. Las relaciones que ya existian se ignoran. Retorna las etiquetas.
+        """
+        transaction_ids = {transaction.pk for transaction in transactions}
+        Through = Transaction.tags.through
+        with db_transaction.atomic():
+            tags = self.upsert_tags(user, names)
+            Through.objects.bulk_create(
+                [
+                    Through(transaction_id=transaction_id, tag_id=tag.pk)
+                    for transaction_id in sorted(transaction_ids)
+                    for tag in tags
+                ],
+                ignore_conflicts=True
+            )
+            aggregates.invalidate(user.pk)
+
+        return tags
+
 
 class Tag(models.Model):
-    """Modelo de etiquetas"""
+    """Modelo de etiquetas, unicas por nombre para cada usuario"""
+    user = models.ForeignKey(
+        'User',
+        related_name='tags',
+        on_delete=models.CASCADE
+    )
     name = models.CharField(max_length=255)
 
     objects = TagManager()
 
+    class Meta:
+        constraints = [
+            # Tambien es el indice para buscar las etiquetas del usuario por nombre
+            models.UniqueConstraint(fields=['user', 'name'], name='unique_user_tag_name')
+        ]
+
     def __str__(self):
         return self.name
 
@@ -466,6 +1604,48 @@ class Budget(models.Model):
 
         return budget_tag
 
+    def get_expenses(self):
+        """Returns the user's expenses inside the budget dates"""
+        return Transaction.objects.filter(
+            account__user_id=self.user_id,
+            type=Transaction.TYPE.EXPENSE,
+            date__gte=self.start_date,
+            date__lte=self.end_date
+        )
+
+    def get_report(self):
+        """Returns planned, spent and left for every category of the budget in one query"""
+        # Subconsulta por categoria: las fechas filtran el WHERE y pueden usar indices,
+        # en lugar de recorrer todo el historial de la categoria con un FILTER
+        spent = self.get_expenses().filter(
+            category_id=OuterRef('category_id')
+        ).values('category_id').annotate(
+            total=Sum('amount')
+        ).values('total')
+        output_field = models.DecimalField(max_digits=9, decimal_places=2)
+        categories = self.categories.values(
+            'id', 'category_id', 'category__name', 'planned_spending'
+        ).annotate(
+            spent=Coalesce(
+                Subquery(spent, output_field=output_field),
+                Decimal('0.00'),
+                output_field=output_field
+            )
+        ).order_by('category__name', 'id')
+
+        report = []
+        for category in categories:
+            report.append({
+                'id': category['id'],
+                'category': category['category_id'],
+                'name': category['category__name'],
+                'planned': category['planned_spending'],
+                'spent': category['spent'],
+                'left': category['planned_spending'] - category['spent']
+            })
+
+        return report
+
     def get_total_by_category(self, category=None):
         """Returns the planned spending of the category"""
         if not category:
@@ -473,7 +1653,7 @@ class Budget(models.Model):
 
         try:
             category = self.categories.get(category=category)
-        except Category.DoesNotExist:
+        except BudgetCategory.DoesNotExist:
             raise ValueError(
                 'That category doesn\'t exist in the budget'
             )
@@ -485,13 +1665,9 @@ class Budget(models.Model):
         if not category:
             raise ValueError('Category is required')
 
-        transactions = Transaction.objects.filter(
-            account__in=self.user.accounts.all(),
-            category=category,
-            type=Transaction.TYPE.EXPENSE
-        )
+        transactions = self.get_expenses().filter(category=category)
         return transactions.aggregate(
-            total=models.Sum('amount')
+            total=Coalesce(models.Sum('amount'), Decimal('0.00'))
         ).get('total')
 
     def get_left_by_category(self, name):
@@ -508,12 +1684,8 @@ class Budget(models.Model):
 
     @property
     def spent(self):
-        transactions = Transaction.objects.filter(
-            account__in=self.user.accounts.all(),
-            type=Transaction.TYPE.EXPENSE
-        )
-        return transactions.aggregate(
-            total=models.Sum('amount')
+        return self.get_expenses().aggregate(
+            total=Coalesce(models.Sum('amount'), Decimal('0.00'))
         ).get('total')
 
     @property
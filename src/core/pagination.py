@@ -0,0 +1,154 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import date
+
+from django.db.models import Q
+
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class DateCursorPagination(pagination.BasePagination):
+    """
+    Paginacion por cursor (keyset) ordenada por (date, id) de mas reciente a mas antiguo.
+    El cursor guarda la fecha y el id del ultimo elemento de la pagina, asi que
+    cada pagina cuesta lo mismo que la primera y no se mueve si se insertan filas.
+    """
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by('-date', '-id')
+        position = self.decode_cursor(request)
+        if position:
+            position_date, position_id = position
+            queryset = queryset.filter(
+                Q(date__lt=position_date) | Q(date=position_date, id__lt=position_id)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        self.next_position = None
+        if self.has_next:
+            last = results[-1]
+            self.next_position = (last.date, last.id)
+
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            position = b64decode(encoded.encode('ascii')).decode('ascii')
+            position_date, position_id = position.split('|')
+            return date.fromisoformat(position_date), int(position_id)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        position_date, position_id = position
+        value = '{}|{}'.format(position_date.isoformat(), position_id)
+        return b64encode(value.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.next_position:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class PageNumberNoCountPagination(pagination.BasePagination):
+    """
+    Paginacion por numero de pagina para resultados ordenados por relevancia, donde
+    no hay una clave estable para un cursor. No cuenta el total de resultados: trae
+    una fila de mas para saber si hay una pagina siguiente.
+    """
+    page_size = 20
+    max_page_size = 100
+    max_page = 50
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+    invalid_page_message = 'Invalid page'
+
+    get_page_size = DateCursorPagination.get_page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.page = self.get_page(request)
+
+        offset = (self.page - 1) * self.page_size
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.has_next = len(results) > self.page_size and self.page < self.max_page
+
+        return results[:self.page_size]
+
+    def get_page(self, request):
+        value = request.query_params.get(self.page_query_param, 1)
+        try:
+            page = int(value)
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+
+        if page < 1 or page > self.max_page:
+            raise NotFound(self.invalid_page_message)
+
+        return page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page + 1)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data)
+        ]))
+
+    get_paginated_response_schema = DateCursorPagination.get_paginated_response_schema
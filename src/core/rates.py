@@ -0,0 +1,94 @@
+"""
+Cache en memoria del proceso de los tipos de cambio (core.models.ExchangeRate).
+
+La tabla cambia a lo mucho una vez al dia, asi que cada proceso guarda los tipos de
+cambio de cada fecha por EXCHANGE_RATES_TIMEOUT segundos y los reportes convierten
+montos sin consultar la base de datos. Los cambios hechos en este proceso limpian el
+cache (ver core.signals); los de otros procesos se ven al expirar.
+"""
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.models import ExchangeRate
+
+DEFAULT_TIMEOUT = 300
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def get_rates(date=None):
+    """Retorna {(base_currency, quote_currency): rate} vigentes en la fecha"""
+    if not date:
+        date = timezone.localtime(timezone.now()).date()
+
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(date)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    rates = ExchangeRate.objects.get_rates(date)
+    timeout = getattr(settings, 'EXCHANGE_RATES_TIMEOUT', DEFAULT_TIMEOUT)
+    with _cache_lock:
+        _cache[date] = (now + timeout, rates)
+
+    return rates
+
+
+def get_rate(base_currency, quote_currency, rates):
+    if base_currency == quote_currency:
+        return Decimal('1')
+    try:
+        return rates[base_currency, quote_currency]
+    except KeyError:
+        raise ValueError('There is no exchange rate from {} to {}'.format(
+            base_currency, quote_currency
+        ))
+
+
+def convert(amount, base_currency, quote_currency, date=None):
+    """Convierte el monto a quote_currency, redondeado a centimos"""
+    rate = get_rate(base_currency, quote_currency, get_rates(date))
+    return (amount * rate).quantize(Decimal('0.01'))
+
+
+def get_net_worth(accounts, currency, date=None):
+    """
+    Suma los saldos de las cuentas convertidos a currency. Los saldos se agrupan por
+    moneda en una sola consulta y cada grupo se convierte con los tipos de cambio en
+    memoria, sin consultas por fila.
+    """
+    rates = get_rates(date)
+    balances = accounts.values('currency').annotate(
+        balance=Sum('balance')
+    ).order_by('currency')
+
+    total = Decimal('0.00')
+    by_currency = []
+    for row in balances:
+        rate = get_rate(row['currency'], currency, rates)
+        converted = (row['balance'] * rate).quantize(Decimal('0.01'))
+        total += converted
+        by_currency.append({
+            'currency': row['currency'],
+            'balance': row['balance'],
+            'rate': rate,
+            'converted': converted
+        })
+
+    return {
+        'currency': currency,
+        'total': total,
+        'balances': by_currency
+    }
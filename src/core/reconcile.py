@@ -0,0 +1,167 @@
+"""
+Conciliacion de los saldos guardados en Account.balance.
+
+El saldo esperado de una cuenta es su saldo inicial (los asientos de apertura del libro
+mayor) mas el monto con signo de sus transacciones pagadas. Se calcula con subconsultas
+agrupadas por cuenta, sin recorrer transacciones en Python, y el trabajo se divide en
+rangos de ids de usuario para repartirlo entre procesos.
+
+Solo se verifican las cuentas con asiento de apertura (libro mayor completo). Las que
+no lo tienen, creadas antes del libro mayor, pueden tener asientos de transacciones
+posteriores pero no su saldo inicial: se reportan aparte, nunca se corrigen, y se
+deben completar antes con checkpoint_ledgers --backfill.
+"""
+from decimal import Decimal
+
+from django.db import models, transaction as db_transaction
+from django.db.models import Exists, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from core import aggregates
+from core.models import Account, LedgerEntry, Transaction
+
+DEFAULT_USERS_PER_RANGE = 10000
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHUNK_SIZE = 2000
+
+CENT = Decimal('0.01')
+
+
+def _sum_by_account(queryset, amount):
+    """Subconsulta con la suma de amount de las filas de cada cuenta"""
+    output_field = models.DecimalField(max_digits=9, decimal_places=2)
+    return Coalesce(
+        Subquery(
+            queryset.filter(account_id=OuterRef('pk')).values('account_id').annotate(
+                total=Sum(amount)
+            ).values('total'),
+            output_field=output_field
+        ),
+        Decimal('0.00'),
+        output_field=output_field
+    )
+
+
+def get_expected_balance():
+    """Expresion del saldo esperado de cada cuenta, para anotar o actualizar Account"""
+    opening = _sum_by_account(LedgerEntry.objects.get_openings(), 'amount')
+    paid = _sum_by_account(
+        Transaction.objects.filter(is_paid=True),
+        Transaction.get_signed_amount()
+    )
+    return opening + paid
+
+
+def get_accounts_without_ledger():
+    """Cuentas sin asiento de apertura, que checkpoint_ledgers --backfill debe completar"""
+    return Account.objects.exclude(
+        Exists(LedgerEntry.objects.get_openings().filter(account_id=OuterRef('pk')))
+    )
+
+
+def get_user_ranges(users_per_range=DEFAULT_USERS_PER_RANGE):
+    """Divide los ids de los usuarios con cuentas en rangos [first, last)"""
+    bounds = Account.objects.aggregate(
+        first=models.Min('user_id'),
+        last=models.Max('user_id')
+    )
+    if bounds['first'] is None:
+        return []
+
+    return [
+        (first, min(first + users_per_range, bounds['last'] + 1))
+        for first in range(bounds['first'], bounds['last'] + 1, users_per_range)
+    ]
+
+
+def get_broken_transfers(transactions):
+    """
+    Retorna los ids de las transferencias sin su pierna enlazada, o cuya pierna no
+    apunta de vuelta, tiene otro monto, el mismo sentido u otro estado de pago
+    """
+    return list(transactions.filter(type=Transaction.TYPE.TRANSFER).annotate(
+        partner_link=F('linked_transaction__linked_transaction_id'),
+        partner_amount=F('linked_transaction__amount'),
+        partner_logic_type=F('linked_transaction__logic_type'),
+        partner_is_paid=F('linked_transaction__is_paid')
+    ).filter(
+        Q(linked_transaction__isnull=True) |
+        Q(partner_link__isnull=True) |
+        ~Q(partner_link=F('pk')) |
+        ~Q(partner_amount=F('amount')) |
+        Q(partner_logic_type=F('logic_type')) |
+        ~Q(partner_is_paid=F('is_paid'))
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def repair_balances(account_ids, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Guarda el saldo esperado en las cuentas, por lotes. Cada lote bloquea sus cuentas
+    y recalcula el saldo dentro del mismo UPDATE, asi que no pisa transacciones
+    aplicadas desde que se detecto la diferencia.
+    """
+    repaired = 0
+    for batch in _chunks(sorted(account_ids), batch_size):
+        with db_transaction.atomic():
+            user_ids = Account.objects.lock(batch)
+            repaired += Account.objects.filter(pk__in=batch).update(
+                balance=get_expected_balance()
+            )
+            for user_id in user_ids:
+                aggregates.invalidate(user_id)
+
+    return repaired
+
+
+def reconcile_range(first_user_id, last_user_id, repair=False,
+                    batch_size=DEFAULT_BATCH_SIZE, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Compara el saldo guardado con el esperado de las cuentas de los usuarios con id en
+    [first_user_id, last_user_id) y verifica sus transferencias. Con repair corrige
+    los saldos con diferencias. Retorna un resumen con las diferencias encontradas.
+    """
+    accounts = Account.objects.filter(
+        user_id__gte=first_user_id,
+        user_id__lt=last_user_id
+    )
+
+    count = 0
+    drifts = []
+    without_ledger = []
+    rows = accounts.annotate(
+        expected=get_expected_balance(),
+        has_ledger=Exists(LedgerEntry.objects.get_openings().filter(
+            account_id=OuterRef('pk')
+        ))
+    ).order_by('pk').values_list('pk', 'balance', 'expected', 'has_ledger')
+    for account_id, balance, expected, has_ledger in rows.iterator(chunk_size=chunk_size):
+        count += 1
+        if not has_ledger:
+            without_ledger.append(account_id)
+            continue
+        # SQLite suma con punto flotante, se compara en centimos
+        expected = Decimal(expected).quantize(CENT)
+        if Decimal(balance).quantize(CENT) != expected:
+            drifts.append((account_id, balance, expected))
+
+    repaired = 0
+    if repair and drifts:
+        repaired = repair_balances([drift[0] for drift in drifts], batch_size)
+
+    return {
+        'accounts': count,
+        'drifts': drifts,
+        'without_ledger': without_ledger,
+        'repaired': repaired,
+        'broken_transfers': get_broken_transfers(
+            Transaction.objects.filter(
+                account__user_id__gte=first_user_id,
+                account__user_id__lt=last_user_id
+            )
+        ),
+    }
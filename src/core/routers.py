@@ -0,0 +1,111 @@
+"""
+Ruteo de lecturas a la replica de la base de datos.
+
+Las escrituras siempre van a 'default'. Las lecturas van a la replica solo dentro de
+use_replica(), que activan los GET de las vistas con ReplicaReadMixin (core.views) y
+los reportes del dashboard, y solo si DB_REPLICA_READS esta activo. Dentro de una
+transaccion abierta en el bloque se lee de 'default', para ver sus propios cambios.
+
+Para leer lo que acaba de escribir, un usuario que escribe queda fijado a 'default'
+por READ_YOUR_WRITES_SECONDS (mas que el retraso de la replica). La marca se guarda
+en el cache 'shared', que comparten todos los workers (por defecto en la base, y se lee
+siempre de 'default'), asi la respeta el proceso que atienda la siguiente lectura.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+PIN_CACHE_ALIAS = 'shared'
+# app_label del modelo con el que DatabaseCache rutea sus consultas
+CACHE_APP_LABEL = 'django_cache'
+DEFAULT_READ_YOUR_WRITES_SECONDS = 10
+
+# Profundidad de transacciones de 'default' al activar la replica, None si no esta activa
+_replica_depth = ContextVar('replica_depth', default=None)
+
+
+def is_enabled():
+    return (
+        getattr(settings, 'DB_REPLICA_READS', False) and
+        REPLICA_DB_ALIAS in settings.DATABASES
+    )
+
+
+def _get_atomic_depth():
+    connection = connections[DEFAULT_DB_ALIAS]
+    return int(connection.in_atomic_block) + len(connection.savepoint_ids)
+
+
+def start_replica_reads(enabled=True):
+    """Envia a la replica las lecturas siguientes, retorna el token para terminar"""
+    return _replica_depth.set(_get_atomic_depth() if enabled else None)
+
+
+def stop_replica_reads(token):
+    _replica_depth.reset(token)
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Envia a la replica las lecturas hechas dentro del bloque"""
+    token = start_replica_reads(enabled)
+    try:
+        yield
+    finally:
+        stop_replica_reads(token)
+
+
+def _get_pin_key(user_id):
+    return 'replica-pin:{}'.format(user_id)
+
+
+def pin_user(user_id):
+    """Lee las consultas del usuario de 'default' hasta que la replica lo alcance"""
+    if not is_enabled():
+        return
+    seconds = getattr(
+        settings, 'READ_YOUR_WRITES_SECONDS', DEFAULT_READ_YOUR_WRITES_SECONDS
+    )
+    caches[PIN_CACHE_ALIAS].set(_get_pin_key(user_id), True, timeout=seconds)
+
+
+def is_pinned(user_id):
+    return bool(caches[PIN_CACHE_ALIAS].get(_get_pin_key(user_id)))
+
+
+def can_use_replica(user):
+    """Indica si las lecturas de un request del usuario pueden ir a la replica"""
+    return is_enabled() and not (user and user.is_authenticated and is_pinned(user.pk))
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == CACHE_APP_LABEL:
+            # La marca de pin_user() debe verse apenas se escribe
+            return None
+        depth = _replica_depth.get()
+        if depth is None or not is_enabled():
+            return None
+        if _get_atomic_depth() > depth:
+            return None
+
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La replica tiene los mismos datos que 'default'
+        databases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La replica recibe el esquema de 'default'
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,173 @@
+"""
+Busqueda de texto en las transacciones.
+
+En PostgreSQL la descripcion se indexa en Transaction.search_vector (tsvector
+mantenido por un trigger, con indice GIN) y en un indice de trigramas para tolerar
+errores de tipeo. En SQLite, para correr localmente, se usa una tabla FTS5 con el
+contenido de core_transaction, sincronizada con triggers. Los indices los crea la
+migracion 0020 con install_index; no se declaran en Transaction.Meta porque solo
+existen en su motor.
+
+Tambien se encuentran las transacciones cuya categoria o cuenta coincide con el texto.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+from core.models import Account, Category
+
+SEARCH_CONFIG = 'simple'
+
+FTS_TABLE = 'core_transaction_fts'
+
+POSTGRESQL_INSTALL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS transaction_search_idx '
+    'ON core_transaction USING GIN (search_vector)',
+    'CREATE INDEX IF NOT EXISTS transaction_description_trgm_idx '
+    'ON core_transaction USING GIN (description gin_trgm_ops)',
+    'DROP TRIGGER IF EXISTS transaction_search_update ON core_transaction',
+    'CREATE TRIGGER transaction_search_update '
+    'BEFORE INSERT OR UPDATE OF description, search_vector ON core_transaction '
+    'FOR EACH ROW EXECUTE PROCEDURE '
+    "tsvector_update_trigger(search_vector, 'pg_catalog.{}', description)".format(
+        SEARCH_CONFIG
+    ),
+    "UPDATE core_transaction SET search_vector = to_tsvector('{}', "
+    "coalesce(description, ''))".format(SEARCH_CONFIG),
+]
+
+POSTGRESQL_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS transaction_search_update ON core_transaction',
+    'DROP INDEX IF EXISTS transaction_description_trgm_idx',
+    'DROP INDEX IF EXISTS transaction_search_idx',
+]
+
+SQLITE_INSTALL = [
+    'CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5('
+    "description, content='core_transaction', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    'CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON core_transaction '
+    'BEGIN INSERT INTO {table}(rowid, description) '
+    'VALUES (new.id, new.description); END',
+    'CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON core_transaction '
+    "BEGIN INSERT INTO {table}({table}, rowid, description) "
+    "VALUES ('delete', old.id, old.description); END",
+    'CREATE TRIGGER IF NOT EXISTS {table}_update '
+    'AFTER UPDATE OF description ON core_transaction '
+    "BEGIN INSERT INTO {table}({table}, rowid, description) "
+    "VALUES ('delete', old.id, old.description); "
+    'INSERT INTO {table}(rowid, description) VALUES (new.id, new.description); END',
+    "INSERT INTO {table}({table}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS {table}_update',
+    'DROP TRIGGER IF EXISTS {table}_delete',
+    'DROP TRIGGER IF EXISTS {table}_insert',
+    'DROP TABLE IF EXISTS {table}',
+]
+
+
+def _execute(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql.format(table=FTS_TABLE))
+
+
+def install_index(schema_editor):
+    """
+    Crea los indices y triggers de busqueda del motor, y los llena con las filas
+    existentes. Es idempotente: en SQLite se debe volver a llamar despues de una
+    migracion que reconstruya core_transaction, porque eso borra sus triggers.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _execute(schema_editor, POSTGRESQL_INSTALL)
+    elif vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_INSTALL)
+
+
+def uninstall_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _execute(schema_editor, POSTGRESQL_UNINSTALL)
+    elif vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_UNINSTALL)
+
+
+def get_terms(text):
+    return re.findall(r'\w+', text or '')
+
+
+def _filter_postgresql(text):
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    rank = Coalesce(
+        SearchRank(F('search_vector'), query), Value(0.0), output_field=FloatField()
+    ) + Coalesce(
+        TrigramSimilarity('description', text), Value(0.0), output_field=FloatField()
+    )
+
+    return Q(search_vector=query) | Q(description__trigram_similar=text), rank
+
+
+def _filter_sqlite(text):
+    # Todos los terminos, cada uno como prefijo: "caf" encuentra "Cafe"
+    match = ' AND '.join('"{}"*'.format(term) for term in get_terms(text))
+    table = FTS_TABLE
+    matches = RawSQL(
+        'SELECT rowid FROM {table} WHERE {table} MATCH %s'.format(table=table),
+        (match,)
+    )
+    # bm25 es menor mientras mas relevante
+    rank = Coalesce(
+        RawSQL(
+            'SELECT -bm25({table}) FROM {table} WHERE {table} MATCH %s '
+            'AND rowid = core_transaction.id'.format(table=table),
+            (match,),
+            output_field=FloatField()
+        ),
+        Value(0.0),
+        output_field=FloatField()
+    )
+
+    return Q(id__in=matches), rank
+
+
+def _filter_default(text):
+    condition = Q()
+    for term in get_terms(text):
+        condition &= Q(description__icontains=term)
+
+    return condition, Value(0.0, output_field=FloatField())
+
+
+FILTERS = {
+    'postgresql': _filter_postgresql,
+    'sqlite': _filter_sqlite,
+}
+
+
+def search_transactions(queryset, text, user):
+    """
+    Filtra las transacciones que coinciden con el texto en la descripcion o en el
+    nombre de su categoria o cuenta (del usuario), anotadas con su relevancia (rank)
+    y ordenadas de la mas relevante a la menos. Es una sola consulta, que usa los
+    indices de busqueda en lugar de recorrer la tabla.
+    """
+    if not get_terms(text):
+        return queryset.none()
+
+    vendor = connections[queryset.db].vendor
+    condition, rank = FILTERS.get(vendor, _filter_default)(text)
+
+    names = Q()
+    for term in get_terms(text):
+        names &= Q(name__icontains=term)
+    condition |= Q(category_id__in=Category.objects.filter(names, user=user).values('id'))
+    condition |= Q(account_id__in=Account.objects.filter(names, user=user).values('id'))
+
+    return queryset.filter(condition).annotate(rank=rank).order_by('-rank', '-date', '-id')
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core import aggregates, rates
+from core.models import (
+    Account, Category, Transaction, Budget, BudgetCategory, ExchangeRate
+)
+
+
+def _get_account_user_id(account_id):
+    return Account.objects.filter(pk=account_id).values_list('user_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Account)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Budget)
+def invalidate_user_aggregates(sender, instance, **kwargs):
+    aggregates.invalidate(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Transaction)
+def invalidate_transaction_aggregates(sender, instance, **kwargs):
+    if Transaction.account.is_cached(instance):
+        user_id = instance.account.user_id
+    else:
+        user_id = _get_account_user_id(instance.account_id)
+    if user_id:
+        aggregates.invalidate(user_id)
+
+
+@receiver([post_save, post_delete], sender=BudgetCategory)
+def invalidate_budget_aggregates(sender, instance, **kwargs):
+    aggregates.invalidate(instance.budget.user_id)
+
+
+@receiver([post_save, post_delete], sender=ExchangeRate)
+def clear_exchange_rates(sender, instance, **kwargs):
+    rates.clear_cache()
+
+
+@receiver(request_started)
+def check_persistent_connections(sender, **kwargs):
+    """Cierra las conexiones persistentes que ya no responden antes de reutilizarlas"""
+    if not getattr(settings, 'DB_HEALTH_CHECKS', False):
+        return
+
+    for connection in connections.all():
+        if (connection.connection is not None and
+                connection.settings_dict.get('CONN_MAX_AGE') and
+                not connection.in_atomic_block and
+                not connection.is_usable()):
+            connection.close()
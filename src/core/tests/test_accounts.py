@@ -3,7 +3,7 @@ from decimal import Decimal
 from django.test import TestCase
 from django.conf import settings
 
-from core.models import User, Account
+from core.models import User, Account, AccountLog, Category
 
 
 class AccountModelTests(TestCase):
@@ -69,3 +69,97 @@ class AccountModelTests(TestCase):
 
         with self.assertRaises(ValueError):
             self.user.add_account(**account_data)
+
+
+class AccountLogTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('test@test.com')
+        self.account = self.user.add_account(
+            name='Cuenta corriente',
+            balance=Decimal('100.00'),
+            type=Account.TYPE.CHECKING_ACCOUNT
+        )
+        self.income = self.user.add_category(name='Sueldo', type=Category.TYPE.INCOME)
+        self.expense = self.user.add_category(name='Comida', type=Category.TYPE.EXPENSE)
+
+    def add_transaction(self, date, amount, category, is_paid=True):
+        return self.account.add_transaction(
+            type=category.type,
+            amount=Decimal(amount),
+            date=date,
+            category=category,
+            is_paid=is_paid
+        )
+
+    def test_get_balance_by_month(self):
+        """Testea que el saldo de cada mes se mantenga al aplicar transacciones"""
+        self.add_transaction('2021-01-15', '50.00', self.income)
+        self.add_transaction('2021-03-10', '30.00', self.expense)
+
+        self.assertEqual(self.account.get_balance(2020, 12), Decimal('100.00'))
+        self.assertEqual(self.account.get_balance(2021, 1), Decimal('150.00'))
+        self.assertEqual(self.account.get_balance(2021, 2), Decimal('150.00'))
+        self.assertEqual(self.account.get_balance(2021, 3), Decimal('120.00'))
+        self.assertEqual(self.account.get_balance(2022, 1), Decimal('120.00'))
+        self.assertEqual(self.account.get_balance(), Decimal('120.00'))
+
+    def test_backdated_transaction_rolls_forward(self):
+        """Testea que una transaccion antigua actualice los meses siguientes"""
+        self.add_transaction('2021-03-10', '30.00', self.expense)
+        self.add_transaction('2021-01-15', '50.00', self.income)
+
+        self.assertEqual(self.account.get_balance(2020, 12), Decimal('100.00'))
+        self.assertEqual(self.account.get_balance(2021, 1), Decimal('150.00'))
+        self.assertEqual(self.account.get_balance(2021, 3), Decimal('120.00'))
+
+    def test_unapply_updates_logs(self):
+        """Testea que desaplicar una transaccion actualice los logs"""
+        self.add_transaction('2021-01-15', '50.00', self.income)
+        transaction = self.add_transaction('2021-02-15', '20.00', self.income)
+
+        transaction.unapply()
+
+        self.assertEqual(self.account.get_balance(2021, 2), Decimal('150.00'))
+        self.assertEqual(self.account.logs.get(year=2021, month=2).change, Decimal('0.00'))
+
+    def test_unpaid_transaction_not_logged(self):
+        """Testea que una transaccion sin pagar no cree logs"""
+        self.add_transaction('2021-01-15', '50.00', self.income, is_paid=False)
+
+        self.assertFalse(self.account.logs.exists())
+        self.assertEqual(self.account.get_balance(2021, 1), Decimal('100.00'))
+
+    def test_get_balance_single_query(self):
+        """Testea que el saldo historico sea una sola lectura"""
+        self.add_transaction('2021-01-15', '50.00', self.income)
+
+        with self.assertNumQueries(1):
+            self.account.get_balance(2021, 6)
+
+    def test_rebuild_logs(self):
+        """Testea que reconstruir los logs de como resultado los mismos saldos"""
+        self.add_transaction('2021-03-10', '30.00', self.expense)
+        self.add_transaction('2021-01-15', '50.00', self.income)
+        self.add_transaction('2021-01-20', '5.00', self.expense)
+        expected = list(self.account.logs.order_by('year', 'month').values_list(
+            'year', 'month', 'balance', 'change'
+        ))
+
+        AccountLog.objects.rebuild(self.account)
+
+        self.assertEqual(list(self.account.logs.order_by('year', 'month').values_list(
+            'year', 'month', 'balance', 'change'
+        )), expected)
+
+    def test_rebuild_logs_stale_account(self):
+        """Testea que reconstruir use el saldo guardado y no el de la instancia"""
+        stale = Account.objects.get(pk=self.account.pk)
+        self.add_transaction('2021-01-15', '50.00', self.income)
+        expected = list(self.account.logs.values_list('year', 'month', 'balance'))
+
+        AccountLog.objects.rebuild(stale)
+
+        self.assertEqual(list(self.account.logs.values_list(
+            'year', 'month', 'balance'
+        )), expected)
@@ -1,7 +1,12 @@
+from datetime import date
+
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+from core.models import Category, RecurringTransaction, Transaction
+from core.tests import utils
+
 
 class AdminTests(TestCase):
 
@@ -31,3 +36,49 @@ class AdminTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+    def add_recurring_transaction(self, **kwargs):
+        account = utils.get_test_account(user=self.user)
+        data = {
+            'account': account.id,
+            'category': utils.get_test_category(
+                user=self.user,
+                type=Category.TYPE.EXPENSE
+            ).id,
+            'amount': '300.00',
+            'type': Transaction.TYPE.EXPENSE,
+            'is_paid': 'on',
+            'frequency': RecurringTransaction.FREQUENCY.MONTHLY,
+            'interval': 1,
+            'start_date': '2021-01-31',
+            **kwargs
+        }
+        return self.client.post(
+            reverse('admin:core_recurringtransaction_add'),
+            data
+        )
+
+    def test_add_recurring_transaction(self):
+        """Testea que una regla creada en el admin tenga su siguiente fecha"""
+        res = self.add_recurring_transaction()
+
+        self.assertEqual(res.status_code, 302)
+        rule = RecurringTransaction.objects.get()
+        self.assertEqual(rule.next_date, date(2021, 1, 31))
+
+    def test_add_invalid_recurring_transaction(self):
+        """Testea que el admin rechace transferencias y categorias ajenas"""
+        other_category = utils.get_test_category(
+            user=utils.get_test_user(),
+            type=Category.TYPE.EXPENSE
+        )
+
+        res = self.add_recurring_transaction(type=Transaction.TYPE.TRANSFER)
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('type', res.context['adminform'].form.errors)
+
+        res = self.add_recurring_transaction(category=other_category.id)
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('category', res.context['adminform'].form.errors)
+
+        self.assertFalse(RecurringTransaction.objects.exists())
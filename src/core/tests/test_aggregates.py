@@ -0,0 +1,116 @@
+import warnings
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import CacheKeyWarning
+from django.test import TestCase
+
+from core import aggregates
+from core.models import Category, Transaction
+from core.tests import utils
+
+
+class AggregateCacheTests(TestCase):
+
+    def setUp(self):
+        aggregates.get_cache().clear()
+        aggregates.reset_stats()
+        self.user = utils.get_test_user()
+        self.account = utils.get_test_account(user=self.user, balance=100.0)
+        self.category = utils.get_test_category(user=self.user, type=Category.TYPE.EXPENSE)
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def get_aggregate(self):
+        return aggregates.get_or_compute(self.user.id, 'test', self.compute, 1)
+
+    def test_hit_and_miss(self):
+        """Testea que un agregado se calcule una sola vez mientras no cambie nada"""
+        self.assertEqual(self.get_aggregate(), 1)
+        self.assertEqual(self.get_aggregate(), 1)
+
+        self.assertEqual(aggregates.get_stats(), {'hits': 1, 'misses': 1})
+
+    def test_arguments_in_key(self):
+        """Testea que argumentos distintos tengan agregados distintos"""
+        aggregates.get_or_compute(self.user.id, 'test', self.compute, 1)
+        aggregates.get_or_compute(self.user.id, 'test', self.compute, 2)
+
+        self.assertEqual(self.calls, 2)
+
+    def test_invalidate_on_transaction(self):
+        """Testea que crear una transaccion invalide los agregados del usuario"""
+        self.get_aggregate()
+        utils.get_test_transaction(
+            account=self.account,
+            type=Transaction.TYPE.EXPENSE,
+            category=self.category
+        )
+
+        self.assertEqual(self.get_aggregate(), 2)
+
+    def test_invalidate_on_apply(self):
+        """Testea que aplicar una transaccion (update en bloque) invalide los agregados"""
+        transaction = self.account.add_transaction(
+            type=Transaction.TYPE.EXPENSE,
+            amount=Decimal('5.00'),
+            date='2021-06-01',
+            category=self.category
+        )
+        self.get_aggregate()
+
+        transaction.apply()
+
+        self.assertEqual(self.get_aggregate(), 2)
+
+    def test_invalidate_on_category_and_budget(self):
+        """Testea que cambiar categorias o presupuestos invalide los agregados"""
+        self.get_aggregate()
+        self.category.name = 'Otra'
+        self.category.save()
+        self.assertEqual(self.get_aggregate(), 2)
+
+        budget = utils.get_test_budget(user=self.user)
+        budget.add_category(self.category, Decimal('10.00'))
+        self.assertEqual(self.get_aggregate(), 3)
+
+    def test_invalidate_on_budget_dates(self):
+        """Testea que cambiar las fechas de un presupuesto invalide los agregados"""
+        budget = utils.get_test_budget(user=self.user)
+        self.get_aggregate()
+
+        budget.end_date = date(2030, 1, 1)
+        budget.save()
+        self.assertEqual(self.get_aggregate(), 2)
+
+        budget.delete()
+        self.assertEqual(self.get_aggregate(), 3)
+
+    def test_valid_keys(self):
+        """Testea que los argumentos con espacios no generen llaves invalidas"""
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            aggregates.get_or_compute(
+                self.user.id, 'test', self.compute, (date(2021, 1, 1), 'a b')
+            )
+
+        self.assertEqual(self.calls, 1)
+
+    def test_other_users_not_invalidated(self):
+        """Testea que los cambios de otro usuario no invaliden los agregados"""
+        self.get_aggregate()
+        utils.get_test_account(user=utils.get_test_user())
+
+        self.assertEqual(self.get_aggregate(), 1)
+
+    def test_cache_is_bounded(self):
+        """Testea que el cache de agregados tenga un limite de entradas"""
+        options = settings.CACHES[aggregates.CACHE_ALIAS]['OPTIONS']
+
+        self.assertGreater(options['MAX_ENTRIES'], 0)
+        # Sin un backend compartido el TIMEOUT acota el atraso de los demas procesos
+        self.assertLessEqual(settings.CACHES[aggregates.CACHE_ALIAS]['TIMEOUT'], 60)
@@ -0,0 +1,79 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core import analytics
+from core.models import Category, Transaction
+from core.tests import utils
+
+
+class CategorySeriesTests(TestCase):
+
+    def setUp(self):
+        self.user = utils.get_test_user()
+        self.account = utils.get_test_account(user=self.user, balance=1000.0)
+        expense = Category.TYPE.EXPENSE
+        self.food = utils.get_test_category(user=self.user, name='Comida', type=expense)
+        self.restaurants = utils.get_test_category(
+            user=self.user, name='Restaurantes', type=expense, parent=self.food
+        )
+        self.fast_food = utils.get_test_category(
+            user=self.user, name='Comida rapida', type=expense, parent=self.restaurants
+        )
+        self.home = utils.get_test_category(user=self.user, name='Casa', type=expense)
+
+        for category, amount, day in (
+            (self.food, '10.00', '2021-06-01'),
+            (self.restaurants, '5.00', '2021-06-02'),
+            (self.fast_food, '2.50', '2021-06-28'),
+            (self.home, '100.00', '2021-07-01'),
+            (self.fast_food, '1.00', '2021-07-05'),
+        ):
+            self.account.add_transaction(
+                type=Transaction.TYPE.EXPENSE,
+                amount=Decimal(amount),
+                date=day,
+                category=category
+            )
+        self.queryset = Transaction.objects.filter(account=self.account)
+
+    def get_series(self, result):
+        return {row['category']: row['values'] for row in result['series']}
+
+    def test_series_by_month(self):
+        """Testea sumar los montos por mes y categoria en una sola consulta"""
+        with self.assertNumQueries(1):
+            result = analytics.get_category_series(self.queryset, analytics.PERIOD.MONTH)
+
+        self.assertEqual(result['buckets'], [date(2021, 6, 1), date(2021, 7, 1)])
+        series = self.get_series(result)
+        self.assertEqual(series[self.food.id], [Decimal('10.00'), Decimal('0.00')])
+        self.assertEqual(series[self.fast_food.id], [Decimal('2.50'), Decimal('1.00')])
+        self.assertEqual(series[self.home.id], [Decimal('0.00'), Decimal('100.00')])
+
+    def test_series_by_week(self):
+        """Testea agrupar por semana desde el lunes"""
+        result = analytics.get_category_series(self.queryset, 'week')
+
+        self.assertEqual(result['buckets'][0], date(2021, 5, 31))
+        self.assertEqual(len(result['buckets']), 3)
+
+    def test_series_rollup(self):
+        """Testea sumar las subcategorias a su ancestro del nivel indicado"""
+        series = self.get_series(
+            analytics.get_category_series(self.queryset, 'month', level=1)
+        )
+        self.assertEqual(set(series), {self.food.id, self.home.id})
+        self.assertEqual(series[self.food.id], [Decimal('17.50'), Decimal('1.00')])
+
+        series = self.get_series(
+            analytics.get_category_series(self.queryset, 'month', level=2)
+        )
+        self.assertEqual(series[self.restaurants.id], [Decimal('7.50'), Decimal('1.00')])
+        self.assertEqual(series[self.food.id], [Decimal('10.00'), Decimal('0.00')])
+
+    def test_unsupported_period(self):
+        """Testea que un periodo desconocido no sea aceptado"""
+        with self.assertRaises(ValueError):
+            analytics.get_category_series(self.queryset, 'year')
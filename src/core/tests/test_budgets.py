@@ -1,4 +1,5 @@
 from datetime import timedelta
+from decimal import Decimal
 
 from django.test import TestCase
 from django.utils import timezone
@@ -73,3 +74,41 @@ class BudgetModelTests(TestCase):
         self.assertEqual(self.budget.get_total_by_category(self.category), 1000.0)
         self.assertEqual(self.budget.get_spent_by_category(self.category), expense.amount)
         self.assertEqual(self.budget.get_left_by_category(self.category), 900.0)
+
+    def test_spent_inside_budget_dates(self):
+        """Tests that only the expenses inside the budget dates are spent"""
+        utils.get_test_transaction(
+            account=self.account,
+            type=Transaction.TYPE.EXPENSE,
+            amount=100.0,
+            category=self.category
+        )
+        self.account.add_transaction(
+            type=Transaction.TYPE.EXPENSE,
+            amount=Decimal('50.00'),
+            date=self.budget.start_date - timedelta(days=1),
+            category=self.category
+        )
+
+        spent = self.budget.get_spent_by_category(self.category)
+        spent2 = self.budget.get_spent_by_category(self.category2)
+        self.assertEqual(self.budget.spent, Decimal('100.00'))
+        self.assertEqual(spent, Decimal('100.00'))
+        self.assertEqual(spent2, Decimal('0.00'))
+
+    def test_get_report(self):
+        """Tests the report of every category of the budget"""
+        utils.get_test_transaction(
+            account=self.account,
+            type=Transaction.TYPE.EXPENSE,
+            amount=100.0,
+            category=self.category
+        )
+
+        with self.assertNumQueries(1):
+            report = {row['category']: row for row in self.budget.get_report()}
+
+        self.assertEqual(report[self.category.id]['planned'], Decimal('1000.00'))
+        self.assertEqual(report[self.category.id]['spent'], Decimal('100.00'))
+        self.assertEqual(report[self.category.id]['left'], Decimal('900.00'))
+        self.assertEqual(report[self.category2.id]['spent'], Decimal('0.00'))
@@ -70,3 +70,72 @@ class CategoryModelTests(TestCase):
 
         with self.assertRaises(ValueError):
             self.user.add_category(**data)
+
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('test@test.com')
+        self.food = self.user.add_category(name='Comida', type=Category.TYPE.EXPENSE)
+        self.restaurants = self.user.add_category(
+            name='Restaurantes',
+            type=Category.TYPE.EXPENSE,
+            parent=self.food
+        )
+        self.pizza = self.user.add_category(
+            name='Pizza',
+            type=Category.TYPE.EXPENSE,
+            parent=self.restaurants
+        )
+        self.games = self.user.add_category(name='Juegos', type=Category.TYPE.EXPENSE)
+
+    def test_category_path(self):
+        """Testea que el path guarde los ancestros de la categoria"""
+        self.assertEqual(self.food.path, '')
+        path = '{}/{}/'.format(self.food.id, self.restaurants.id)
+        self.assertEqual(self.pizza.path, path)
+        self.assertEqual(self.pizza.get_level(), 3)
+
+    def test_get_ancestors(self):
+        """Testea obtener los ancestros en una sola consulta"""
+        with self.assertNumQueries(1):
+            ancestors = list(self.pizza.get_ancestors())
+
+        self.assertEqual(ancestors, [self.food, self.restaurants])
+
+    def test_get_descendants(self):
+        """Testea obtener los descendientes en una sola consulta"""
+        with self.assertNumQueries(1):
+            descendants = set(self.food.get_descendants())
+
+        self.assertEqual(descendants, {self.restaurants, self.pizza})
+        self.assertEqual(
+            set(self.food.get_subtree()),
+            {self.food, self.restaurants, self.pizza}
+        )
+
+    def test_move_subtree(self):
+        """Testea que mover una categoria actualice el path de sus descendientes"""
+        self.restaurants.parent = self.games
+        self.restaurants.save()
+
+        self.pizza.refresh_from_db()
+        path = '{}/{}/'.format(self.games.id, self.restaurants.id)
+        self.assertEqual(self.pizza.path, path)
+        self.assertEqual(set(self.games.get_descendants()), {self.restaurants, self.pizza})
+        self.assertFalse(self.food.get_descendants().exists())
+
+    def test_move_to_root(self):
+        """Testea que mover una categoria a la raiz actualice los niveles"""
+        self.restaurants.parent = None
+        self.restaurants.save()
+
+        self.pizza.refresh_from_db()
+        self.assertEqual(self.restaurants.get_level(), 1)
+        self.assertEqual(self.pizza.get_level(), 2)
+
+    def test_move_inside_itself(self):
+        """Testea que una categoria no pueda moverse dentro de su subarbol"""
+        self.food.parent = self.pizza
+
+        with self.assertRaises(ValueError):
+            self.food.save()
@@ -1,10 +1,27 @@
 
-from unittest.mock import patch
+import datetime
+import os
+import sys
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import Mock, patch
 
-from django.test import TestCase
+from django.core.signals import request_started
+from django.test import TestCase, override_settings
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction as db_transaction
 from django.db.utils import OperationalError
 
+from core import reconcile
+from core.management.commands.seed_synthetic import Command as SeedCommand
+from core.models import (
+    Account, AccountLog, Category, ExchangeRate, LedgerEntry, RecurringTransaction,
+    Transaction
+)
+from core.tests import utils
+
 
 class CommandTests(TestCase):
 
@@ -22,3 +39,261 @@ class CommandTests(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command('wait_for_db')
             self.assertEqual(gi.call_count, 6)
+
+    def test_import_transactions(self):
+        """Testea importar un extracto desde la linea de comandos"""
+        account = utils.get_test_account(user=utils.get_test_user(), balance=10.0)
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as statement:
+            statement.write('date,amount\n2021-06-01,5.00\n2021-06-02,-2.50\n')
+        self.addCleanup(os.remove, statement.name)
+
+        out = StringIO()
+        call_command('import_transactions', account.id, statement.name, stdout=out)
+
+        account.refresh_from_db()
+        self.assertEqual(account.balance, Decimal('12.50'))
+        self.assertIn('Imported 2 rows', out.getvalue())
+
+    def test_import_transactions_unknown_account(self):
+        """Testea que el comando falle con una cuenta inexistente"""
+        with self.assertRaises(CommandError):
+            call_command('import_transactions', 0, 'extracto.csv')
+
+    def test_backfill_account_logs(self):
+        """Testea reconstruir los logs de saldo mensual desde la linea de comandos"""
+        user = utils.get_test_user()
+        account = utils.get_test_account(user=user, balance=10.0)
+        utils.get_test_transaction(account, type=Transaction.TYPE.INCOME, amount='5.00')
+        AccountLog.objects.all().delete()
+
+        out = StringIO()
+        call_command('backfill_account_logs', account.id, stdout=out)
+
+        log = account.logs.get()
+        self.assertEqual(log.balance, Decimal('15.00'))
+        self.assertEqual(log.change, Decimal('5.00'))
+        self.assertIn('Rebuilt logs of 1 accounts', out.getvalue())
+
+    def test_benchmark_balances(self):
+        """Testea que el benchmark verifique el saldo final de la cuenta"""
+        out = StringIO()
+        call_command('benchmark_balances', writers=1, transactions=10, stdout=out)
+
+        self.assertIn('10 writes', out.getvalue())
+        self.assertIn('is correct', out.getvalue())
+
+    def test_checkpoint_ledgers(self):
+        """Testea guardar checkpoints del libro mayor desde la linea de comandos"""
+        account = utils.get_test_account(user=utils.get_test_user(), balance=10.0)
+
+        out = StringIO()
+        call_command('checkpoint_ledgers', account.id, date='2021-06-30', stdout=out)
+
+        checkpoint = account.ledger_checkpoints.get()
+        self.assertEqual(checkpoint.balance, Decimal('10.00'))
+        self.assertIn('Created 1 checkpoints', out.getvalue())
+
+    def test_materialize_recurring_transactions(self):
+        """Testea crear las transacciones recurrentes desde la linea de comandos"""
+        account = utils.get_test_account(user=utils.get_test_user(), balance=10.0)
+        account.add_recurring_transaction(
+            category=utils.get_test_category(user=account.user, type=Category.TYPE.INCOME),
+            amount=Decimal('5.00'),
+            type=Transaction.TYPE.INCOME,
+            frequency=RecurringTransaction.FREQUENCY.WEEKLY,
+            start_date=datetime.date(2021, 6, 1)
+        )
+
+        out = StringIO()
+        call_command('materialize_recurring_transactions', date='2021-06-30', stdout=out)
+
+        account.refresh_from_db()
+        self.assertEqual(account.balance, Decimal('35.00'))
+        self.assertIn('Created 5 transactions from 1 recurring', out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('materialize_recurring_transactions', date='30/06/2021')
+
+    def test_load_exchange_rates(self):
+        """Testea cargar tipos de cambio desde un CSV"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as rates_file:
+            rates_file.write(
+                'date,base_currency,quote_currency,rate\n'
+                '2021-06-01,USD,PEN,3.80\n'
+                '2021-06-02,usd,PEN,3.85\n'
+            )
+        self.addCleanup(os.remove, rates_file.name)
+
+        out = StringIO()
+        call_command('load_exchange_rates', rates_file.name, stdout=out)
+
+        self.assertEqual(ExchangeRate.objects.count(), 2)
+        self.assertIn('Loaded 2 exchange rates', out.getvalue())
+
+    def test_load_invalid_exchange_rates(self):
+        """Testea que un tipo de cambio invalido cancele la carga"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as rates_file:
+            rates_file.write(
+                'date,base_currency,quote_currency,rate\n'
+                '2021-06-01,USD,PEN,0\n'
+            )
+        self.addCleanup(os.remove, rates_file.name)
+
+        with self.assertRaisesRegex(CommandError, 'line 2'):
+            call_command('load_exchange_rates', rates_file.name)
+        self.assertFalse(ExchangeRate.objects.exists())
+
+    def test_load_non_finite_exchange_rates(self):
+        """Testea que un tipo de cambio no finito o demasiado grande sea invalido"""
+        for rate in ('NaN', 'Infinity', '1e400', '10000000000'):
+            with tempfile.NamedTemporaryFile(
+                'w', suffix='.csv', delete=False
+            ) as rates_file:
+                rates_file.write(
+                    'date,base_currency,quote_currency,rate\n'
+                    '2021-06-01,USD,PEN,3.80\n'
+                    '2021-06-02,USD,PEN,{}\n'.format(rate)
+                )
+            self.addCleanup(os.remove, rates_file.name)
+
+            with self.assertRaisesRegex(CommandError, 'line 3', msg=rate):
+                call_command('load_exchange_rates', rates_file.name)
+        self.assertFalse(ExchangeRate.objects.exists())
+
+    def seed_synthetic(self, seed):
+        call_command(
+            'seed_synthetic',
+            users=2,
+            transactions=60,
+            seed=seed,
+            months=3,
+            end=datetime.date(2021, 6, 30),
+            batch_size=25,
+            stdout=StringIO()
+        )
+        return list(Transaction.objects.filter(
+            account__user__email__startswith='synthetic-{}-'.format(seed)
+        ).order_by('id').values_list('amount', 'date', 'type', 'is_paid'))
+
+    def test_seed_synthetic(self):
+        """Testea generar datos sinteticos con saldos consistentes"""
+        transactions = self.seed_synthetic(seed=1)
+
+        self.assertEqual(len(transactions), 120)
+        for account in Account.objects.all():
+            self.assertEqual(account.get_ledger_balance(), account.balance)
+            self.assertEqual(
+                account.logs.order_by('-year', '-month').first().balance,
+                account.balance
+            )
+        self.assertTrue(LedgerEntry.objects.filter(date=LedgerEntry.OPENING_DATE).exists())
+
+    def test_seed_synthetic_zero_balance(self):
+        """Testea que las cuentas con saldo inicial cero tengan asiento de apertura"""
+        get_amount = SeedCommand.get_amount
+
+        def zero_balance(command, low, high):
+            amount = get_amount(command, low, high)
+            return Decimal('0.00') if (low, high) == (0, 5000) else amount
+
+        with patch.object(SeedCommand, 'get_amount', zero_balance):
+            self.seed_synthetic(seed=1)
+
+        self.assertFalse(reconcile.get_accounts_without_ledger().exists())
+        for account in Account.objects.all():
+            self.assertEqual(account.get_ledger_balance(), account.balance)
+
+    def test_seed_synthetic_deterministic(self):
+        """Testea que la misma semilla genere los mismos datos"""
+        with db_transaction.atomic():
+            transactions = self.seed_synthetic(seed=1)
+            db_transaction.set_rollback(True)
+
+        self.assertEqual(self.seed_synthetic(seed=1), transactions)
+        self.assertNotEqual(self.seed_synthetic(seed=2), transactions)
+
+    def test_seed_synthetic_repeated_seed(self):
+        """Testea que no se genere dos veces la misma semilla"""
+        self.seed_synthetic(seed=1)
+        with self.assertRaises(CommandError):
+            self.seed_synthetic(seed=1)
+
+
+class ServeTests(TestCase):
+
+    def test_serve(self):
+        """Testea arrancar el servidor sin migrar si las migraciones estan al dia"""
+        out = StringIO()
+        with patch('core.management.commands.serve.call_command') as migrate:
+            call_command('serve', dry_run=True, workers=3, stdout=out)
+
+        migrate.assert_not_called()
+        self.assertIn('Migrations are up to date', out.getvalue())
+        self.assertIn('--workers 3 Platero.asgi:application', out.getvalue())
+
+    @patch('os.execv')
+    @patch('django.db.connections.close_all')
+    @patch('importlib.util.find_spec', return_value=None)
+    def test_serve_without_gunicorn(self, find_spec, close_all, execv):
+        """Testea fallar con un error claro si gunicorn no esta instalado"""
+        with self.assertRaises(CommandError):
+            call_command('serve', stdout=StringIO())
+
+        find_spec.assert_called_once_with('gunicorn')
+        execv.assert_not_called()
+
+    @patch('os.execv')
+    @patch('django.db.connections.close_all')
+    def test_serve_exec(self, close_all, execv):
+        """Testea reemplazar el proceso por gunicorn con el interprete actual"""
+        with patch('importlib.util.find_spec', return_value=object()):
+            call_command('serve', stdout=StringIO())
+
+        executable, command = execv.call_args.args
+        self.assertEqual(executable, sys.executable)
+        self.assertEqual(command[:3], [sys.executable, '-m', 'gunicorn'])
+
+    @patch('os.execv')
+    @patch('django.db.connections.close_all')
+    def test_serve_threads(self, close_all, execv):
+        """Testea que --threads dimensione el pool de consultas de las vistas async"""
+        with patch('importlib.util.find_spec', return_value=object()), \
+                patch.dict('os.environ'):
+            call_command('serve', threads=8, stdout=StringIO())
+            self.assertEqual(os.environ['DASHBOARD_QUERY_THREADS'], '8')
+
+    @patch('core.management.commands.serve.Command.has_pending_migrations',
+           return_value=True)
+    def test_serve_pending_migrations(self, has_pending_migrations):
+        """Testea migrar antes de arrancar si hay migraciones pendientes"""
+        with patch('core.management.commands.serve.call_command') as migrate:
+            call_command('serve', dry_run=True, stdout=StringIO())
+
+        migrate.assert_called_once_with('migrate', database='default', interactive=False)
+
+    @patch('time.sleep', return_value=True)
+    def test_serve_database_unavailable(self, sleep):
+        """Testea reintentar con esperas crecientes y fallar si la db no responde"""
+        wrapper = 'django.db.backends.base.base.BaseDatabaseWrapper'
+        with patch(wrapper + '.ensure_connection', side_effect=OperationalError), \
+                patch(wrapper + '.close'):
+            with self.assertRaises(CommandError):
+                call_command('serve', dry_run=True, wait=3, stdout=StringIO())
+
+        delays = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(delays, [0.5, 1, 2])
+
+    @override_settings(DB_HEALTH_CHECKS=True)
+    def test_health_check_persistent_connections(self):
+        """Testea cerrar las conexiones persistentes que no responden"""
+        connection = Mock(
+            settings_dict={'CONN_MAX_AGE': 60},
+            in_atomic_block=False
+        )
+        connection.is_usable.return_value = False
+
+        with patch('core.signals.connections') as connections:
+            connections.all.return_value = [connection]
+            request_started.send(sender=None)
+
+        connection.close.assert_called_once_with()
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core import exporters, importers
+from core.models import Account, Category, Transaction
+from core.tests import utils
+
+
+CSV_STATEMENT = """date,amount,description,category
+2021-06-02,-20.50,Almuerzo,Comida
+2021-06-01,1500.00,Sueldo,Sueldo
+"""
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.user = utils.get_test_user()
+        self.account = utils.get_test_account(
+            user=self.user,
+            name='Corriente',
+            balance=100.0,
+            _type=Account.TYPE.CHECKING_ACCOUNT
+        )
+        utils.get_test_category(user=self.user, name='Sueldo', type=Category.TYPE.INCOME)
+        utils.get_test_category(user=self.user, name='Comida', type=Category.TYPE.EXPENSE)
+        importers.import_transactions(
+            self.account,
+            importers.parse_csv(io.StringIO(CSV_STATEMENT))
+        )
+        self.queryset = Transaction.objects.filter(account=self.account)
+
+    def test_export_csv(self):
+        """Testea exportar las transacciones como CSV ordenadas por fecha"""
+        lines = exporters.export_transactions(self.queryset, exporters.FORMAT.CSV)
+        rows = list(csv.DictReader(io.StringIO(''.join(lines))))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['date'], '2021-06-01')
+        self.assertEqual(rows[0]['account'], 'Corriente')
+        self.assertEqual(rows[0]['category'], 'Sueldo')
+        self.assertEqual(rows[1]['amount'], '20.50')
+
+    def test_export_ndjson(self):
+        """Testea exportar las transacciones como un objeto JSON por linea"""
+        lines = list(exporters.export_transactions(self.queryset, 'NDJSON', chunk_size=1))
+        rows = [json.loads(line) for line in lines]
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]['description'], 'Almuerzo')
+        self.assertEqual(Decimal(rows[1]['amount']), Decimal('20.50'))
+        self.assertEqual(rows[1]['category'], 'Comida')
+
+    def test_export_is_lazy(self):
+        """Testea que no se consulte la base de datos hasta leer las lineas"""
+        with self.assertNumQueries(0):
+            lines = exporters.export_transactions(self.queryset, exporters.FORMAT.CSV)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(lines)), 3)
+
+    def test_unsupported_format(self):
+        """Testea que un formato desconocido no sea aceptado"""
+        with self.assertRaises(ValueError):
+            exporters.get_exporter('xls')
@@ -0,0 +1,206 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core import importers
+from core.models import Account, Category, Transaction
+from core.tests import utils
+
+
+CSV_STATEMENT = """date,amount,description,category
+2021-06-01,1500.00,Sueldo,Sueldo
+2021-06-02,-20.50,Almuerzo,Comida
+2021-06-03,-10.00,Cajero,
+"""
+
+OFX_STATEMENT = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20210601120000
+<TRNAMT>1500.00
+<NAME>Sueldo
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20210602
+<TRNAMT>-20.50
+<NAME>Restaurante
+<MEMO>Almuerzo
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+QIF_STATEMENT = """!Type:Bank
+D06/01/2021
+T1,500.00
+PSueldo
+LSueldo
+^
+D6/ 2'21
+T-20.50
+PRestaurante
+MAlmuerzo
+^
+"""
+
+
+class ParserTests(TestCase):
+
+    def test_parse_csv(self):
+        """Testea leer un extracto CSV"""
+        rows = list(importers.parse_csv(io.StringIO(CSV_STATEMENT)))
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['date'], date(2021, 6, 1))
+        self.assertEqual(rows[0]['amount'], Decimal('1500.00'))
+        self.assertEqual(rows[1]['category'], 'Comida')
+        self.assertEqual(rows[2]['category'], None)
+
+    def test_parse_ofx(self):
+        """Testea leer un extracto OFX"""
+        rows = list(importers.parse_ofx(io.StringIO(OFX_STATEMENT)))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['date'], date(2021, 6, 1))
+        self.assertEqual(rows[1]['amount'], Decimal('-20.50'))
+        self.assertEqual(rows[1]['description'], 'Almuerzo')
+
+    def test_parse_qif(self):
+        """Testea leer un extracto QIF"""
+        rows = list(importers.parse_qif(io.StringIO(QIF_STATEMENT)))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['amount'], Decimal('1500.00'))
+        self.assertEqual(rows[0]['category'], 'Sueldo')
+        self.assertEqual(rows[1]['date'], date(2021, 6, 2))
+
+    def test_parse_invalid_amount(self):
+        """Testea que un monto invalido indique la linea del error"""
+        statement = 'date,amount\n2021-06-01,abc\n'
+
+        with self.assertRaisesRegex(ValueError, 'line 2'):
+            list(importers.parse_csv(io.StringIO(statement)))
+
+    def test_parse_out_of_range_amount(self):
+        """Testea que un monto no finito o que no cabe en la transaccion sea invalido"""
+        for amount in ('NaN', 'Infinity', '-inf', '1e400', '10000000.00', '1.005'):
+            statement = 'date,amount\n2021-06-01,1.00\n2021-06-02,{}\n'.format(amount)
+
+            with self.assertRaisesRegex(ValueError, 'line 3', msg=amount):
+                list(importers.parse_csv(io.StringIO(statement)))
+
+        statement = 'date,amount\n2021-06-01,-9999999.99\n2021-06-02,1.50\n'
+        rows = list(importers.parse_csv(io.StringIO(statement)))
+        self.assertEqual(rows[0]['amount'], Decimal('-9999999.99'))
+
+    def test_unsupported_format(self):
+        """Testea que un formato desconocido no sea aceptado"""
+        with self.assertRaises(ValueError):
+            importers.get_parser('xls')
+
+
+class ImportTests(TestCase):
+
+    def setUp(self):
+        self.user = utils.get_test_user()
+        self.account = utils.get_test_account(
+            user=self.user,
+            balance=100.0,
+            _type=Account.TYPE.CHECKING_ACCOUNT
+        )
+        utils.get_test_category(user=self.user, name='Sueldo', type=Category.TYPE.INCOME)
+        utils.get_test_category(user=self.user, name='Comida', type=Category.TYPE.EXPENSE)
+
+    def test_import_transactions(self):
+        """Testea importar un extracto y actualizar el saldo de la cuenta"""
+        rows = importers.parse_csv(io.StringIO(CSV_STATEMENT))
+        result = importers.import_transactions(self.account, rows, batch_size=2)
+
+        self.assertEqual(result['rows'], 3)
+        self.assertEqual(self.account.balance, Decimal('1569.50'))
+        self.assertEqual(self.account.transactions.filter(is_paid=True).count(), 3)
+
+        expense = self.account.transactions.get(description='Almuerzo')
+        self.assertEqual(expense.amount, Decimal('20.50'))
+        self.assertEqual(expense.logic_type, Transaction.LOGIC_TYPE.EXPENSE)
+        self.assertEqual(expense.category.name, 'Comida')
+
+    def test_import_query_count(self):
+        """Testea que un lote cueste lo mismo sin importar cuantas filas tenga"""
+        def get_rows(count):
+            return [
+                importers._get_row(date(2021, 6, 1), Decimal('-1.00'), category='Comida')
+                for i in range(count)
+            ]
+
+        # El primer lote del mes crea el log mensual de la cuenta
+        importers.import_transactions(self.account, get_rows(1))
+
+        with CaptureQueriesContext(connection) as small:
+            importers.import_transactions(self.account, get_rows(5))
+        # Menos de 999 parametros, el limite de un INSERT en SQLite
+        with CaptureQueriesContext(connection) as large:
+            importers.import_transactions(self.account, get_rows(80))
+
+        self.assertEqual(len(small), len(large))
+
+    def test_import_unknown_category(self):
+        """Testea que una categoria desconocida cancele toda la importacion"""
+        statement = CSV_STATEMENT + '2021-06-04,-5.00,Cine,Entretenimiento\n'
+        rows = importers.parse_csv(io.StringIO(statement))
+
+        with self.assertRaises(ValueError):
+            importers.import_transactions(self.account, rows, batch_size=2)
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('100.00'))
+        self.assertFalse(self.account.transactions.exists())
+
+    def test_import_wrong_category_type(self):
+        """Testea que un egreso no pueda usar una categoria de ingreso"""
+        statement = 'date,amount,category\n2021-06-01,-5.00,Sueldo\n'
+        rows = importers.parse_csv(io.StringIO(statement))
+
+        with self.assertRaises(ValueError):
+            importers.import_transactions(self.account, rows)
+
+    def test_import_category_by_type(self):
+        """Testea elegir entre categorias con el mismo nombre segun el tipo"""
+        income = utils.get_test_category(
+            user=self.user,
+            name='Comida',
+            type=Category.TYPE.INCOME
+        )
+        statement = (
+            'date,amount,category\n'
+            '2021-06-01,5.00,Comida\n'
+            '2021-06-02,-5.00,Comida\n'
+        )
+        importers.import_transactions(self.account, importers.parse_csv(
+            io.StringIO(statement)
+        ))
+
+        self.assertEqual(
+            self.account.transactions.get(date=date(2021, 6, 1)).category,
+            income
+        )
+        self.assertEqual(
+            self.account.transactions.get(date=date(2021, 6, 2)).category.type,
+            Category.TYPE.EXPENSE
+        )
+
+    def test_import_ambiguous_category(self):
+        """Testea rechazar un nombre con varias categorias del mismo tipo"""
+        utils.get_test_category(user=self.user, name='Comida', type=Category.TYPE.EXPENSE)
+        statement = 'date,amount,category\n2021-06-01,-5.00,Comida\n'
+
+        with self.assertRaisesRegex(ValueError, 'ambiguous'):
+            importers.import_transactions(self.account, importers.parse_csv(
+                io.StringIO(statement)
+            ))
+        self.assertFalse(self.account.transactions.exists())
@@ -0,0 +1,149 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import (
+    User, Account, Category, Transaction, LedgerEntry, LedgerCheckpoint
+)
+
+
+class LedgerTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('test@test.com')
+        self.account = self.user.add_account(
+            name='Cuenta corriente',
+            balance=Decimal('100.00'),
+            type=Account.TYPE.CHECKING_ACCOUNT
+        )
+        self.income = self.user.add_category(name='Sueldo', type=Category.TYPE.INCOME)
+        self.expense = self.user.add_category(name='Comida', type=Category.TYPE.EXPENSE)
+
+    def add_transaction(self, date, amount, category, is_paid=True):
+        return self.account.add_transaction(
+            type=category.type,
+            amount=Decimal(amount),
+            date=date,
+            category=category,
+            is_paid=is_paid
+        )
+
+    def test_opening_entry(self):
+        """Testea que el saldo inicial quede registrado en el libro mayor"""
+        entry = self.account.ledger_entries.get()
+
+        self.assertEqual(entry.amount, Decimal('100.00'))
+        self.assertEqual(self.account.get_ledger_balance(), Decimal('100.00'))
+
+    def test_apply_unapply_entries(self):
+        """Testea que aplicar y desaplicar agreguen asientos en vez de modificarlos"""
+        transaction = self.add_transaction('2021-06-10', '30.00', self.expense)
+        transaction.unapply()
+
+        amounts = list(self.account.ledger_entries.filter(
+            transaction=transaction
+        ).order_by('id').values_list('amount', flat=True))
+        self.assertEqual(amounts, [Decimal('-30.00'), Decimal('30.00')])
+        self.assertEqual(self.account.get_ledger_balance(), Decimal('100.00'))
+
+    def test_transfer_entries(self):
+        """Testea que una transferencia agregue un asiento en cada cuenta"""
+        destination = self.user.add_account(name='Ahorros', type=Account.TYPE.SAVINGS)
+        self.account.add_transaction(
+            type=Transaction.TYPE.TRANSFER,
+            amount=Decimal('40.00'),
+            date='2021-06-10',
+            destination_account=destination,
+            is_paid=True
+        )
+
+        self.assertEqual(self.account.get_ledger_balance(), Decimal('60.00'))
+        self.assertEqual(destination.get_ledger_balance(), Decimal('40.00'))
+
+    def test_balance_by_date(self):
+        """Testea el saldo a una fecha, antes y despues de un checkpoint"""
+        self.add_transaction('2021-06-10', '50.00', self.income)
+        self.add_transaction('2021-07-10', '20.00', self.expense)
+        LedgerCheckpoint.objects.create_checkpoint(self.account, date(2021, 6, 30))
+        # Asientos posteriores al checkpoint, uno de ellos con fecha anterior
+        self.add_transaction('2021-06-20', '5.00', self.expense)
+        self.add_transaction('2021-08-01', '10.00', self.income)
+
+        balance = self.account.get_ledger_balance
+        self.assertEqual(balance(date(2021, 6, 1)), Decimal('100.00'))
+        self.assertEqual(balance(date(2021, 6, 30)), Decimal('145.00'))
+        self.assertEqual(balance(date(2021, 7, 31)), Decimal('125.00'))
+        self.assertEqual(balance(), Decimal('135.00'))
+
+        self.account.refresh_from_db()
+        self.assertEqual(balance(), self.account.balance)
+
+    def test_checkpoint_bounds_tail(self):
+        """Testea que el checkpoint guarde el saldo con todos los asientos previos"""
+        self.add_transaction('2021-06-10', '50.00', self.income)
+
+        checkpoint = LedgerCheckpoint.objects.create_checkpoint(
+            self.account,
+            date(2021, 6, 30)
+        )
+
+        self.assertEqual(checkpoint.balance, Decimal('150.00'))
+        self.assertEqual(checkpoint.entry_id, self.account.ledger_entries.latest('id').id)
+
+    def test_entries_are_append_only(self):
+        """Testea que los asientos no se puedan modificar ni borrar"""
+        entry = self.account.ledger_entries.get()
+        entry.amount = Decimal('1.00')
+
+        with self.assertRaises(ValueError):
+            entry.save()
+        with self.assertRaises(ValueError):
+            entry.delete()
+
+    def test_backfill(self):
+        """Testea crear el libro mayor de una cuenta que no lo tiene"""
+        self.add_transaction('2021-06-10', '50.00', self.income)
+        self.add_transaction('2021-06-11', '10.00', self.expense, is_paid=False)
+        LedgerEntry.objects.filter(account=self.account).delete()
+
+        count = LedgerEntry.objects.backfill(self.account)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(self.account.get_ledger_balance(), Decimal('150.00'))
+        balance = self.account.get_ledger_balance(date(2021, 6, 1))
+        self.assertEqual(balance, Decimal('100.00'))
+        self.assertEqual(LedgerEntry.objects.backfill(self.account), 0)
+
+    def test_backfill_partial_ledger(self):
+        """Testea completar el libro mayor de una cuenta usada antes de tenerlo"""
+        before = self.add_transaction('2021-06-10', '50.00', self.income)
+        unpaid = self.add_transaction('2021-06-11', '20.00', self.expense)
+        LedgerEntry.objects.filter(account=self.account).delete()
+        # Despues del libro mayor: una transaccion nueva y otra deja de estar pagada
+        self.add_transaction('2021-06-12', '5.00', self.income)
+        unpaid.unapply()
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('155.00'))
+
+        LedgerEntry.objects.backfill(self.account)
+
+        self.assertEqual(self.account.get_ledger_balance(), Decimal('155.00'))
+        self.assertEqual(
+            self.account.get_ledger_balance(date(2021, 6, 10)),
+            Decimal('150.00')
+        )
+        opening = LedgerEntry.objects.get_openings().get(account=self.account)
+        self.assertEqual(opening.amount, Decimal('100.00'))
+        self.assertEqual(before.ledger_entries.get().amount, Decimal('50.00'))
+        self.assertEqual(
+            sum(unpaid.ledger_entries.values_list('amount', flat=True)),
+            Decimal('0.00')
+        )
+
+    def test_opening_entry_without_balance(self):
+        """Testea que una cuenta sin saldo inicial tambien tenga su apertura"""
+        account = self.user.add_account(name='Billetera', type=Account.TYPE.WALLET)
+
+        self.assertEqual(account.ledger_entries.get().amount, Decimal('0.00'))
+        self.assertEqual(LedgerEntry.objects.backfill(account), 0)
@@ -0,0 +1,49 @@
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import middleware
+from core.tests import utils
+
+
+LIST_ACCOUNT_URL = reverse('accounts:account-list')
+
+
+class QueryStatsMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.user = utils.get_test_user()
+        utils.get_test_account(user=self.user)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(QUERY_STATS=True)
+    def test_query_stats(self):
+        """Testea que se reporten las consultas del request en headers y logs"""
+        with self.assertLogs('core.middleware', level='INFO') as logs:
+            with self.assertNumQueries(1):
+                res = self.client.get(LIST_ACCOUNT_URL)
+
+        self.assertEqual(res[middleware.HEADER_QUERY_COUNT], '1')
+        self.assertGreaterEqual(float(res[middleware.HEADER_QUERY_TIME]), 0)
+        self.assertGreaterEqual(
+            float(res[middleware.HEADER_RESPONSE_TIME]),
+            float(res[middleware.HEADER_SLOWEST_QUERY_TIME])
+        )
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['path'], LIST_ACCOUNT_URL)
+        self.assertEqual(line['status'], 200)
+        self.assertEqual(line['queries'], 1)
+        self.assertIn('core_account', line['slowest_query'])
+
+    @override_settings(QUERY_STATS=False)
+    def test_query_stats_disabled(self):
+        """Testea que el middleware no haga nada si no esta activado"""
+        res = self.client.get(LIST_ACCOUNT_URL)
+
+        self.assertFalse(res.has_header(middleware.HEADER_QUERY_COUNT))
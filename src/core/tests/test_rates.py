@@ -0,0 +1,99 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core import rates
+from core.globals import CURRENCY
+from core.models import Account, ExchangeRate
+from core.tests import utils
+
+
+class ExchangeRateTests(TestCase):
+
+    def setUp(self):
+        rates.clear_cache()
+        self.addCleanup(rates.clear_cache)
+        ExchangeRate.objects.load([
+            {
+                'date': date(2021, 6, 1),
+                'base_currency': CURRENCY.USD,
+                'quote_currency': CURRENCY.PEN,
+                'rate': Decimal('3.80')
+            },
+            {
+                'date': date(2021, 7, 1),
+                'base_currency': CURRENCY.USD,
+                'quote_currency': CURRENCY.PEN,
+                'rate': Decimal('4.00')
+            },
+        ])
+
+    def test_get_rates(self):
+        """Testea obtener el ultimo tipo de cambio hasta la fecha y su inverso"""
+        with self.assertNumQueries(1):
+            exchange_rates = ExchangeRate.objects.get_rates(date(2021, 6, 15))
+
+        self.assertEqual(exchange_rates[CURRENCY.USD, CURRENCY.PEN], Decimal('3.80'))
+        self.assertEqual(
+            ExchangeRate.objects.get_rates(date(2021, 8, 1))[CURRENCY.PEN, CURRENCY.USD],
+            Decimal('0.25')
+        )
+        self.assertEqual(ExchangeRate.objects.get_rates(date(2021, 5, 1)), {})
+
+    def test_rates_cached(self):
+        """Testea que las conversiones no consulten la base de datos una vez en cache"""
+        rates.get_rates(date(2021, 7, 1))
+
+        with self.assertNumQueries(0):
+            converted = rates.convert(Decimal('10.00'), 'USD', 'PEN', date(2021, 7, 1))
+        self.assertEqual(converted, Decimal('40.00'))
+
+    def test_cache_cleared_on_save(self):
+        """Testea que guardar un tipo de cambio limpie el cache del proceso"""
+        rates.get_rates(date(2021, 7, 1))
+        ExchangeRate.objects.filter(date=date(2021, 7, 1)).get().delete()
+
+        self.assertEqual(
+            rates.convert(Decimal('10.00'), 'USD', 'PEN', date(2021, 7, 1)),
+            Decimal('38.00')
+        )
+
+    def test_load_replaces_rates(self):
+        """Testea que cargar un par y fecha existentes reemplace el tipo de cambio"""
+        count = ExchangeRate.objects.load([{
+            'date': date(2021, 7, 1),
+            'base_currency': CURRENCY.USD,
+            'quote_currency': CURRENCY.PEN,
+            'rate': Decimal('4.10')
+        }])
+
+        self.assertEqual(count, 1)
+        self.assertEqual(ExchangeRate.objects.count(), 2)
+        self.assertEqual(
+            ExchangeRate.objects.get(date=date(2021, 7, 1)).rate,
+            Decimal('4.10')
+        )
+
+    def test_convert_without_rate(self):
+        """Testea que convertir sin tipo de cambio falle"""
+        with self.assertRaises(ValueError):
+            rates.convert(Decimal('10.00'), 'USD', 'PEN', date(2021, 1, 1))
+
+    def test_net_worth(self):
+        """Testea sumar saldos en distintas monedas con una sola consulta"""
+        user = utils.get_test_user()
+        for currency, balance in (('PEN', 100.0), ('PEN', 50.5), ('USD', 10.0)):
+            utils.get_test_account(
+                user=user,
+                currency=currency,
+                balance=balance,
+                _type=Account.TYPE.SAVINGS
+            )
+        rates.get_rates()
+
+        with self.assertNumQueries(1):
+            net_worth = rates.get_net_worth(user.accounts.all(), CURRENCY.PEN)
+
+        self.assertEqual(net_worth['total'], Decimal('190.50'))
+        self.assertEqual(net_worth['balances'][1]['converted'], Decimal('40.00'))
@@ -0,0 +1,221 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core import reconcile
+from core.models import Account, Category, LedgerEntry, Transaction
+from core.tests import utils
+
+
+class InlineExecutor:
+    """Reemplaza el pool de procesos, ejecuta las tareas en el mismo proceso"""
+
+    def __init__(self, max_workers=None, initializer=None):
+        initializer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def map(self, function, *iterables):
+        return map(function, *iterables)
+
+
+class ReconcileTests(TestCase):
+
+    def setUp(self):
+        self.user = utils.get_test_user()
+        self.account = utils.get_test_account(
+            user=self.user,
+            balance=100.0,
+            _type=Account.TYPE.CHECKING_ACCOUNT
+        )
+        self.other_account = utils.get_test_account(
+            user=self.user,
+            balance=50.0,
+            _type=Account.TYPE.SAVINGS
+        )
+        self.account.add_transaction(
+            amount=Decimal('30.00'),
+            date=date(2021, 6, 1),
+            category=utils.get_test_category(user=self.user, type=Category.TYPE.INCOME),
+            type=Transaction.TYPE.INCOME,
+            is_paid=True
+        )
+        self.account.add_transaction(
+            amount=Decimal('12.50'),
+            date=date(2021, 6, 2),
+            category=utils.get_test_category(user=self.user, type=Category.TYPE.EXPENSE),
+            type=Transaction.TYPE.EXPENSE,
+            is_paid=True
+        )
+        self.transfer = self.account.add_transaction(
+            amount=Decimal('20.00'),
+            date=date(2021, 6, 3),
+            destination_account=self.other_account,
+            type=Transaction.TYPE.TRANSFER,
+            is_paid=True
+        )
+
+    def reconcile(self, **kwargs):
+        return reconcile.reconcile_range(self.user.id, self.user.id + 1, **kwargs)
+
+    def test_reconcile_without_drift(self):
+        """Testea que las cuentas consistentes no se reporten"""
+        result = self.reconcile()
+
+        self.assertEqual(result['accounts'], 2)
+        self.assertEqual(result['drifts'], [])
+        self.assertEqual(result['broken_transfers'], [])
+
+    def test_reconcile_drift(self):
+        """Testea reportar y corregir un saldo que no coincide con sus transacciones"""
+        Account.objects.filter(pk=self.account.pk).update(balance=Decimal('999.00'))
+
+        result = self.reconcile()
+
+        self.assertEqual(
+            result['drifts'],
+            [(self.account.pk, Decimal('999.00'), Decimal('97.50'))]
+        )
+        self.assertEqual(result['repaired'], 0)
+
+        result = self.reconcile(repair=True)
+
+        self.assertEqual(result['repaired'], 1)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('97.50'))
+        self.assertEqual(self.account.get_ledger_balance(), self.account.balance)
+        self.assertEqual(self.reconcile()['drifts'], [])
+
+    def test_reconcile_other_users(self):
+        """Testea que solo se revisen las cuentas de los usuarios del rango"""
+        other_user = utils.get_test_user(email='other@test.com')
+        other_account = utils.get_test_account(user=other_user, balance=10.0)
+        Account.objects.filter(pk=other_account.pk).update(balance=Decimal('0.00'))
+
+        self.assertEqual(self.reconcile()['drifts'], [])
+
+    def remove_ledger(self, account):
+        """Deja la cuenta como las creadas antes del libro mayor"""
+        account.ledger_entries.all()._raw_delete(account.ledger_entries.db)
+
+    def test_reconcile_without_ledger(self):
+        """Testea que las cuentas sin libro mayor se reporten aparte"""
+        account = utils.get_test_account(user=self.user, balance=10.0)
+        self.remove_ledger(account)
+
+        result = self.reconcile(repair=True)
+
+        self.assertEqual(result['without_ledger'], [account.pk])
+        self.assertEqual(result['drifts'], [])
+        account.refresh_from_db()
+        self.assertEqual(account.balance, Decimal('10.00'))
+
+    def test_reconcile_partial_ledger(self):
+        """
+        Testea que una cuenta anterior al libro mayor, con asientos de transacciones
+        posteriores pero sin apertura, no se corrija con un saldo esperado incompleto
+        """
+        account = utils.get_test_account(user=self.user, balance=110.0)
+        self.remove_ledger(account)
+        account.add_transaction(
+            amount=Decimal('5.00'),
+            date=date(2021, 6, 4),
+            category=utils.get_test_category(user=self.user, type=Category.TYPE.INCOME),
+            type=Transaction.TYPE.INCOME,
+            is_paid=True
+        )
+
+        result = self.reconcile(repair=True)
+
+        self.assertEqual(result['without_ledger'], [account.pk])
+        self.assertEqual(result['drifts'], [])
+        account.refresh_from_db()
+        self.assertEqual(account.balance, Decimal('115.00'))
+
+        LedgerEntry.objects.backfill(account)
+
+        self.assertEqual(self.reconcile()['without_ledger'], [])
+        self.assertEqual(self.reconcile()['drifts'], [])
+
+    def test_broken_transfers(self):
+        """Testea detectar transferencias sin pierna enlazada o con otro monto"""
+        output = self.transfer
+        input = output.linked_transaction
+        Transaction.objects.filter(pk=input.pk).update(amount=Decimal('21.00'))
+
+        self.assertEqual(self.reconcile()['broken_transfers'], [output.pk, input.pk])
+
+        Transaction.objects.filter(pk=input.pk).update(amount=Decimal('20.00'))
+        Transaction.objects.filter(pk=output.pk).update(linked_transaction=None)
+
+        self.assertEqual(self.reconcile()['broken_transfers'], [output.pk, input.pk])
+
+    def test_get_user_ranges(self):
+        """Testea dividir los ids de usuario en rangos"""
+        last_user = utils.get_test_user(email='last@test.com')
+        utils.get_test_account(user=last_user)
+
+        ranges = reconcile.get_user_ranges(users_per_range=1)
+
+        self.assertEqual(ranges[0], (self.user.id, self.user.id + 1))
+        self.assertEqual(ranges[-1], (last_user.id, last_user.id + 1))
+
+    def test_reconcile_balances_command(self):
+        """Testea conciliar y corregir los saldos desde la linea de comandos"""
+        Account.objects.filter(pk=self.account.pk).update(balance=Decimal('0.00'))
+
+        out = StringIO()
+        call_command('reconcile_balances', workers=1, stdout=out)
+
+        self.assertIn('Account {}: balance 0.00'.format(self.account.pk), out.getvalue())
+        self.assertIn('1 drifted', out.getvalue())
+
+        out = StringIO()
+        call_command('reconcile_balances', workers=1, repair=True, stdout=out)
+
+        self.assertIn('1 repaired', out.getvalue())
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('97.50'))
+
+        with self.assertRaises(CommandError):
+            call_command('reconcile_balances', workers=0)
+
+    def test_reconcile_balances_command_without_ledger(self):
+        """Testea que el comando no corra hasta completar los libros mayores"""
+        self.remove_ledger(self.account)
+        Account.objects.filter(pk=self.account.pk).update(balance=Decimal('0.00'))
+
+        with self.assertRaisesRegex(CommandError, 'backfill'):
+            call_command('reconcile_balances', workers=1, repair=True, stdout=StringIO())
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('0.00'))
+
+    @patch('django.db.connections.close_all')
+    @patch(
+        'core.management.commands.reconcile_balances.ProcessPoolExecutor',
+        InlineExecutor
+    )
+    def test_reconcile_balances_command_workers(self, close_all):
+        """Testea repartir los rangos de usuarios entre varios procesos"""
+        Account.objects.filter(pk=self.other_account.pk).update(balance=Decimal('1.00'))
+
+        out = StringIO()
+        call_command(
+            'reconcile_balances', workers=2, users_per_range=1, repair=True, stdout=out
+        )
+
+        self.assertIn('Checked 2 accounts', out.getvalue())
+        self.assertIn('1 repaired', out.getvalue())
+        self.other_account.refresh_from_db()
+        self.assertEqual(self.other_account.balance, Decimal('70.00'))
+        self.assertTrue(close_all.called)
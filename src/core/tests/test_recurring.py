@@ -0,0 +1,311 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import (
+    Account, Category, RecurringTransaction, Transaction, add_months
+)
+from core.tests import utils
+
+
+class RecurringTransactionTests(TestCase):
+
+    def setUp(self):
+        self.user = utils.get_test_user()
+        self.account = utils.get_test_account(
+            user=self.user,
+            balance=1000.0,
+            _type=Account.TYPE.CHECKING_ACCOUNT
+        )
+        self.rent = utils.get_test_category(
+            user=self.user,
+            name='Alquiler',
+            type=Category.TYPE.EXPENSE
+        )
+        self.salary = utils.get_test_category(
+            user=self.user,
+            name='Sueldo',
+            type=Category.TYPE.INCOME
+        )
+
+    def add_rent(self, **kwargs):
+        data = {
+            'category': self.rent,
+            'amount': Decimal('300.00'),
+            'type': Transaction.TYPE.EXPENSE,
+            'frequency': RecurringTransaction.FREQUENCY.MONTHLY,
+            'start_date': date(2021, 1, 31),
+            **kwargs
+        }
+        return self.account.add_recurring_transaction(**data)
+
+    def test_add_months(self):
+        """Testea sumar meses limitando el dia al fin de mes"""
+        self.assertEqual(add_months(date(2021, 1, 31), 1), date(2021, 2, 28))
+        self.assertEqual(add_months(date(2020, 1, 31), 1), date(2020, 2, 29))
+        self.assertEqual(add_months(date(2021, 11, 15), 3), date(2022, 2, 15))
+
+    def test_occurrence_dates(self):
+        """Testea las fechas de cada frecuencia"""
+        rent = self.add_rent()
+        weekly = self.add_rent(
+            frequency=RecurringTransaction.FREQUENCY.WEEKLY,
+            interval=2,
+            start_date=date(2021, 1, 1)
+        )
+        yearly = self.add_rent(
+            frequency=RecurringTransaction.FREQUENCY.YEARLY,
+            start_date=date(2020, 2, 29)
+        )
+
+        self.assertEqual(
+            [rent.get_occurrence_date(i) for i in range(3)],
+            [date(2021, 1, 31), date(2021, 2, 28), date(2021, 3, 31)]
+        )
+        self.assertEqual(weekly.get_occurrence_date(2), date(2021, 1, 29))
+        self.assertEqual(yearly.get_occurrence_date(1), date(2021, 2, 28))
+        self.assertEqual(rent.next_date, date(2021, 1, 31))
+
+    def test_invalid_recurring_transaction(self):
+        """Testea que se validen el tipo, la categoria y el calendario"""
+        for kwargs in (
+            {'amount': None},
+            {'type': Transaction.TYPE.TRANSFER},
+            {'category': self.salary},
+            {'category': utils.get_test_category(
+                user=utils.get_test_user('other@test.com'),
+                type=Category.TYPE.EXPENSE
+            )},
+            {'frequency': 'X'},
+            {'interval': 0},
+            {'end_date': date(2020, 1, 1)},
+            {'count': 0},
+        ):
+            with self.assertRaises(ValueError, msg=kwargs):
+                self.add_rent(**kwargs)
+
+    def test_save_next_date(self):
+        """Testea que guardar la regla sin el manager calcule la siguiente fecha"""
+        rent = RecurringTransaction.objects.create(
+            account=self.account,
+            category=self.rent,
+            amount=Decimal('300.00'),
+            type=Transaction.TYPE.EXPENSE,
+            frequency=RecurringTransaction.FREQUENCY.MONTHLY,
+            start_date=date(2021, 1, 31)
+        )
+        self.assertEqual(rent.next_date, date(2021, 1, 31))
+
+        rent.start_date = date(2021, 2, 15)
+        rent.save()
+        rent.refresh_from_db()
+        self.assertEqual(rent.next_date, date(2021, 2, 15))
+
+    def test_clean(self):
+        """Testea validar la regla como lo hace el admin"""
+        rent = RecurringTransaction(
+            account=self.account,
+            category=self.rent,
+            amount=Decimal('300.00'),
+            type=Transaction.TYPE.EXPENSE,
+            frequency=RecurringTransaction.FREQUENCY.MONTHLY,
+            start_date=date(2021, 1, 31)
+        )
+        rent.full_clean(exclude=['next_date'])
+
+        other_category = utils.get_test_category(
+            user=utils.get_test_user('other@test.com'),
+            type=Category.TYPE.EXPENSE
+        )
+        for field, value in (
+            ('type', Transaction.TYPE.TRANSFER),
+            ('type', Transaction.TYPE.INCOME),
+            ('category', other_category),
+            ('amount', Decimal('0.00')),
+            ('interval', 0),
+            ('end_date', date(2020, 1, 1)),
+        ):
+            invalid = RecurringTransaction(**{
+                'account': self.account,
+                'category': self.rent,
+                'amount': Decimal('300.00'),
+                'type': Transaction.TYPE.EXPENSE,
+                'frequency': RecurringTransaction.FREQUENCY.MONTHLY,
+                'start_date': date(2021, 1, 31),
+                field: value
+            })
+            with self.assertRaises(ValidationError, msg=field):
+                invalid.full_clean(exclude=['next_date'])
+
+    def test_clean_schedule_with_occurrences(self):
+        """Testea que no se pueda cambiar el calendario de una regla con ocurrencias"""
+        rent = self.add_rent(start_date=date(2026, 1, 1))
+        RecurringTransaction.objects.materialize(date(2026, 3, 1))
+        rent.refresh_from_db()
+
+        for field, value in (
+            ('start_date', date(2025, 12, 1)),
+            ('interval', 2),
+            ('frequency', RecurringTransaction.FREQUENCY.WEEKLY),
+        ):
+            rent.refresh_from_db()
+            setattr(rent, field, value)
+            with self.assertRaises(ValidationError, msg=field):
+                rent.full_clean(exclude=['next_date'])
+
+        # Terminarla antes o cambiar el monto no mueve las fechas
+        rent.refresh_from_db()
+        rent.end_date = date(2026, 6, 1)
+        rent.amount = Decimal('350.00')
+        rent.full_clean(exclude=['next_date'])
+
+    def add_other_rule(self):
+        user = utils.get_test_user('other@test.com')
+        account = utils.get_test_account(user=user, balance=1000.0)
+        category = utils.get_test_category(user=user, type=Category.TYPE.EXPENSE)
+        return account.add_recurring_transaction(
+            category=category,
+            amount=Decimal('100.00'),
+            type=Transaction.TYPE.EXPENSE,
+            frequency=RecurringTransaction.FREQUENCY.MONTHLY,
+            start_date=date(2026, 1, 1)
+        )
+
+    def test_materialize_after_schedule_edit(self):
+        """
+        Testea que una regla editada sin clean() no repita fechas ya creadas ni frene
+        al resto del lote
+        """
+        rent = self.add_rent(start_date=date(2026, 1, 1))
+        other = self.add_other_rule()
+        RecurringTransaction.objects.materialize(date(2026, 3, 1))
+
+        rent.refresh_from_db()
+        rent.start_date = date(2025, 12, 1)
+        rent.save()
+        self.assertEqual(rent.next_date, date(2026, 3, 1))
+
+        result = RecurringTransaction.objects.materialize(date(2026, 4, 1))
+
+        self.assertEqual(result, {'rules': 2, 'transactions': 2})
+        rent.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(rent.occurrences, 5)
+        self.assertEqual(rent.next_date, date(2026, 5, 1))
+        self.assertEqual(
+            list(rent.transactions.order_by('date').values_list('date', flat=True)),
+            [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1), date(2026, 4, 1)]
+        )
+        self.assertEqual(other.occurrences, 4)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.get_ledger_balance(), self.account.balance)
+
+    def test_materialize_failing_rule(self):
+        """Testea que una regla que no se puede crear no frene al resto del lote"""
+        rent = self.add_rent(start_date=date(2026, 1, 1))
+        other = self.add_other_rule()
+        RecurringTransaction.objects.materialize(date(2026, 3, 1))
+
+        rent.refresh_from_db()
+        rent.start_date = date(2025, 12, 1)
+        rent.save()
+
+        # Sin descartar las fechas ya creadas la regla choca con su restriccion unica
+        with patch.object(
+            RecurringTransaction.objects, '_exclude_materialized',
+            side_effect=lambda occurrences: occurrences
+        ):
+            result = RecurringTransaction.objects.materialize(date(2026, 4, 1))
+
+        self.assertEqual(result, {'rules': 1, 'transactions': 1})
+        rent.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(rent.occurrences, 3)
+        self.assertEqual(rent.transactions.count(), 3)
+        self.assertEqual(other.occurrences, 4)
+        self.assertEqual(other.account.get_ledger_balance(), Decimal('600.00'))
+
+    def test_materialize(self):
+        """Testea crear las ocurrencias pendientes y aplicar el saldo"""
+        self.add_rent()
+        self.account.add_recurring_transaction(
+            category=self.salary,
+            amount=Decimal('1000.00'),
+            type=Transaction.TYPE.INCOME,
+            frequency=RecurringTransaction.FREQUENCY.MONTHLY,
+            start_date=date(2021, 2, 1)
+        )
+
+        result = RecurringTransaction.objects.materialize(date(2021, 3, 31))
+
+        self.assertEqual(result, {'rules': 2, 'transactions': 5})
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('1000.00') - 900 + 2000)
+        self.assertEqual(self.account.get_ledger_balance(), self.account.balance)
+        self.assertEqual(
+            list(Transaction.objects.filter(category=self.rent).order_by(
+                'date'
+            ).values_list('date', flat=True)),
+            [date(2021, 1, 31), date(2021, 2, 28), date(2021, 3, 31)]
+        )
+
+    def test_materialize_idempotent(self):
+        """Testea que correrlo otra vez no duplique ocurrencias"""
+        rent = self.add_rent()
+
+        RecurringTransaction.objects.materialize(date(2021, 2, 28))
+        result = RecurringTransaction.objects.materialize(date(2021, 2, 28))
+
+        self.assertEqual(result, {'rules': 0, 'transactions': 0})
+        self.assertEqual(rent.transactions.count(), 2)
+        rent.refresh_from_db()
+        self.assertEqual(rent.occurrences, 2)
+        self.assertEqual(rent.next_date, date(2021, 3, 31))
+
+    def test_materialize_until_end(self):
+        """Testea que la regla termine por fecha final o por cantidad"""
+        by_date = self.add_rent(end_date=date(2021, 3, 1))
+        by_count = self.add_rent(count=3)
+
+        RecurringTransaction.objects.materialize(date(2021, 12, 31))
+
+        by_date.refresh_from_db()
+        by_count.refresh_from_db()
+        self.assertEqual(by_date.transactions.count(), 2)
+        self.assertIsNone(by_date.next_date)
+        self.assertEqual(by_count.transactions.count(), 3)
+        self.assertIsNone(by_count.next_date)
+
+    def test_materialize_unpaid(self):
+        """Testea que las ocurrencias sin pagar no cambien el saldo"""
+        self.add_rent(is_paid=False)
+
+        RecurringTransaction.objects.materialize(date(2021, 2, 28))
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('1000.00'))
+        self.assertFalse(Transaction.objects.filter(is_paid=True).exists())
+
+    def test_materialize_constant_queries(self):
+        """Testea que un lote cueste lo mismo sin importar cuantas reglas tenga"""
+        def add_rules(count, start_date):
+            for i in range(count):
+                self.add_rent(start_date=start_date)
+
+        # El primer lote del mes crea el log mensual de la cuenta
+        add_rules(1, date(2021, 1, 1))
+        RecurringTransaction.objects.materialize(date(2021, 1, 1))
+
+        add_rules(2, date(2021, 1, 2))
+        with CaptureQueriesContext(connection) as small:
+            RecurringTransaction.objects.materialize(date(2021, 1, 2))
+        add_rules(40, date(2021, 1, 3))
+        with CaptureQueriesContext(connection) as large:
+            RecurringTransaction.objects.materialize(date(2021, 1, 3))
+
+        self.assertEqual(len(small), len(large))
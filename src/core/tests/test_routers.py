@@ -0,0 +1,130 @@
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.core.cache.backends import locmem
+from django.db import router, transaction as db_transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core import routers
+from core.models import Category, Transaction
+from core.tests import utils
+
+
+LIST_CREATE_TRANSACTION_URL = reverse('transactions:transaction-list')
+
+
+class ReplicaRouterTests(TestCase):
+
+    def setUp(self):
+        caches[routers.PIN_CACHE_ALIAS].clear()
+
+    @override_settings(DB_REPLICA_READS=True)
+    def test_read_replica(self):
+        """Testea que solo se lea de la replica dentro de use_replica"""
+        self.assertEqual(Transaction.objects.all().db, 'default')
+        with routers.use_replica():
+            self.assertEqual(Transaction.objects.all().db, 'replica')
+            with routers.use_replica(False):
+                self.assertEqual(Transaction.objects.all().db, 'default')
+
+    @override_settings(DB_REPLICA_READS=True)
+    def test_read_replica_in_transaction(self):
+        """Testea que dentro de una transaccion se lea de 'default'"""
+        with routers.use_replica(), db_transaction.atomic():
+            self.assertEqual(Transaction.objects.all().db, 'default')
+
+    @override_settings(DB_REPLICA_READS=False)
+    def test_read_replica_disabled(self):
+        """Testea que sin DB_REPLICA_READS todo vaya a 'default'"""
+        with routers.use_replica():
+            self.assertEqual(Transaction.objects.all().db, 'default')
+
+    @override_settings(DB_REPLICA_READS=True)
+    def test_write_default(self):
+        """Testea que las escrituras siempre vayan a 'default'"""
+        with routers.use_replica():
+            self.assertEqual(Transaction.objects.select_for_update().db, 'default')
+            self.assertEqual(router.db_for_write(Transaction), 'default')
+
+    @override_settings(DB_REPLICA_READS=True)
+    def test_pin_user(self):
+        """Testea que un usuario que escribio no lea de la replica"""
+        user = utils.get_test_user()
+        self.assertTrue(routers.can_use_replica(user))
+
+        routers.pin_user(user.pk)
+
+        self.assertFalse(routers.can_use_replica(user))
+
+    @override_settings(DB_REPLICA_READS=True)
+    def test_pin_user_other_process(self):
+        """Testea que la marca de un usuario la vean los demas procesos"""
+        user = utils.get_test_user()
+        routers.pin_user(user.pk)
+
+        # Otro worker: sin la memoria local de este proceso
+        with patch.dict(locmem._caches, clear=True), \
+                patch.dict(locmem._locks, clear=True):
+            other = caches.create_connection(routers.PIN_CACHE_ALIAS)
+            with patch.object(routers, 'caches', {routers.PIN_CACHE_ALIAS: other}):
+                self.assertTrue(routers.is_pinned(user.pk))
+
+    @override_settings(DB_REPLICA_READS=True)
+    def test_pin_cache_reads_default(self):
+        """Testea que el cache compartido se lea de 'default' aun con la replica"""
+        model = caches[routers.PIN_CACHE_ALIAS].cache_model_class
+        with routers.use_replica():
+            self.assertEqual(router.db_for_read(model), 'default')
+
+
+class ReplicaRequestTests(TestCase):
+
+    def setUp(self):
+        caches[routers.PIN_CACHE_ALIAS].clear()
+        self.user = utils.get_test_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.account = utils.get_test_account(user=self.user, balance=100.0)
+
+    def test_list_reads_replica(self):
+        """Testea que el listado de transacciones lea de la replica"""
+        utils.get_test_transaction(self.account, type=Transaction.TYPE.INCOME)
+
+        with utils.replica_reads() as aliases:
+            res = self.client.get(LIST_CREATE_TRANSACTION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(set(aliases), {'replica'})
+
+    def test_read_your_writes(self):
+        """Testea que despues de escribir el usuario lea de 'default'"""
+        category = utils.get_test_category(user=self.user, type=Category.TYPE.EXPENSE)
+
+        with utils.replica_reads() as aliases:
+            res = self.client.post(LIST_CREATE_TRANSACTION_URL, {
+                'amount': 10,
+                'date': '2021-07-06',
+                'account': self.account.id,
+                'category': category.id,
+                'type': Transaction.TYPE.EXPENSE
+            })
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertNotIn('replica', aliases)
+
+            del aliases[:]
+            res = self.client.get(LIST_CREATE_TRANSACTION_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(set(aliases), {'default'})
+
+        # Otro usuario sigue leyendo de la replica
+        self.client.force_authenticate(user=utils.get_test_user('other@test.com'))
+        with utils.replica_reads() as aliases:
+            self.client.get(LIST_CREATE_TRANSACTION_URL)
+
+        self.assertEqual(set(aliases), {'replica'})
@@ -0,0 +1,129 @@
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core import search
+from core.models import Account, Category, Transaction
+from core.tests import utils
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        self.user = utils.get_test_user()
+        self.account = utils.get_test_account(
+            user=self.user,
+            name='Corriente',
+            balance=1000.0,
+            _type=Account.TYPE.CHECKING_ACCOUNT
+        )
+        self.category = utils.get_test_category(
+            user=self.user,
+            name='Restaurantes',
+            type=Category.TYPE.EXPENSE
+        )
+        self.queryset = Transaction.objects.filter(account__user=self.user)
+
+    def add_expense(self, description, category=None, account=None):
+        return (account or self.account).add_transaction(
+            amount=10,
+            description=description,
+            date=date(2021, 6, 1),
+            category=category or self.category,
+            type=Transaction.TYPE.EXPENSE
+        )
+
+    def search(self, text):
+        return list(search.search_transactions(self.queryset, text, self.user))
+
+    def test_search_description(self):
+        """Testea buscar por todas las palabras de la descripcion"""
+        lunch = self.add_expense('Almuerzo en el centro')
+        self.add_expense('Almuerzo en casa')
+        self.add_expense('Taxi al centro')
+
+        self.assertEqual(self.search('almuerzo centro'), [lunch])
+
+    def test_search_prefix_and_accents(self):
+        """Testea que se encuentren prefijos de palabras sin importar las tildes"""
+        coffee = self.add_expense('Café de la mañana')
+
+        self.assertEqual(self.search('cafe'), [coffee])
+        self.assertEqual(self.search('manan'), [coffee])
+
+    def test_search_ranked(self):
+        """Testea que las transacciones mas relevantes vayan primero"""
+        once = self.add_expense('Pizza con amigos y bebidas para todos')
+        twice = self.add_expense('Pizza y pizza')
+
+        results = self.search('pizza')
+
+        self.assertEqual(results, [twice, once])
+        self.assertGreater(results[0].rank, results[1].rank)
+
+    def test_search_category_and_account_names(self):
+        """Testea encontrar transacciones por el nombre de su categoria o cuenta"""
+        dinner = self.add_expense('Cena')
+        savings = utils.get_test_account(
+            user=self.user,
+            name='Ahorros',
+            balance=100.0,
+            _type=Account.TYPE.SAVINGS
+        )
+        groceries = self.add_expense(
+            'Mercado',
+            category=utils.get_test_category(
+                user=self.user,
+                name='Comida',
+                type=Category.TYPE.EXPENSE
+            ),
+            account=savings
+        )
+
+        self.assertEqual(self.search('restaurant'), [dinner])
+        self.assertEqual(self.search('ahorros'), [groceries])
+
+    def test_search_updated_and_deleted(self):
+        """Testea que el indice siga los cambios y borrados de la descripcion"""
+        transaction = self.add_expense('Gimnasio')
+        other = self.add_expense('Cine')
+
+        Transaction.objects.filter(pk=transaction.pk).update(description='Piscina')
+        other.delete()
+
+        self.assertEqual(self.search('gimnasio'), [])
+        self.assertEqual(self.search('piscina'), [transaction])
+        self.assertEqual(self.search('cine'), [])
+
+    def test_search_other_users(self):
+        """Testea que no se encuentren transacciones ni categorias de otros usuarios"""
+        other_user = utils.get_test_user(email='other@test.com')
+        other_account = utils.get_test_account(user=other_user, name='Restaurantes')
+        self.add_expense(
+            'Restaurantes',
+            category=utils.get_test_category(
+                user=other_user,
+                type=Category.TYPE.EXPENSE
+            ),
+            account=other_account
+        )
+
+        self.assertEqual(self.search('restaurantes'), [])
+
+    def test_search_empty(self):
+        """Testea que un texto sin palabras no encuentre nada"""
+        self.add_expense('Almuerzo')
+
+        self.assertEqual(self.search('  ¿?  '), [])
+
+    def test_search_single_query(self):
+        """Testea que la busqueda sea una sola consulta"""
+        for i in range(5):
+            self.add_expense('Almuerzo {}'.format(i))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(self.search('almuerzo')), 5)
+
+        self.assertEqual(len(queries), 1)
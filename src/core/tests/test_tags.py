@@ -1,28 +1,36 @@
+from datetime import date
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from core.models import Tag
+from core.models import Category, Tag, Transaction
+from core.tests import utils
 
 
 class TagModelTests(TestCase):
 
+    def setUp(self):
+        self.user = utils.get_test_user()
+
     def test_create_tag(self):
         """Tests creating a new tag"""
         name = 'comida'
         tag = Tag.objects.create_tag(
+            user=self.user,
             name=name
         )
 
         self.assertEqual(tag.name, name)
+        self.assertEqual(tag.user, self.user)
 
     def test_get_existing_tag(self):
         """Tests that gets a tag instead of creating a new one"""
-        name = 'comida'
-        old_tag = Tag(name=name)
-        old_tag.save()
+        old_tag = utils.get_test_tag(user=self.user)
 
-        tag = Tag.objects.get_or_create_tag(name=name)
+        tag = Tag.objects.get_or_create_tag(user=self.user, name=old_tag.name)
 
-        self.assertEqual(tag.name, name)
+        self.assertEqual(tag.name, old_tag.name)
         self.assertEqual(tag.id, old_tag.id)
 
     def test_get_created_tag(self):
@@ -30,7 +38,73 @@ class TagModelTests(TestCase):
         name = 'comida'
 
         self.assertEqual(Tag.objects.count(), 0)
-        tag = Tag.objects.get_or_create_tag(name=name)
-        tag.save()
+        tag = Tag.objects.get_or_create_tag(user=self.user, name=name)
         self.assertEqual(Tag.objects.count(), 1)
         self.assertEqual(tag.name, name)
+
+    def test_tags_unique_per_user(self):
+        """Tests that two users can have a tag with the same name"""
+        other_user = utils.get_test_user(email='other@test.com')
+        tag = utils.get_test_tag(user=self.user)
+
+        other_tag = Tag.objects.get_or_create_tag(user=other_user, name=tag.name)
+
+        self.assertNotEqual(tag.id, other_tag.id)
+
+    def test_upsert_tags(self):
+        """Tests creating only the missing tags and getting all of them"""
+        existing = utils.get_test_tag(user=self.user)
+
+        tags = Tag.objects.upsert_tags(self.user, [existing.name, ' viaje ', 'viaje', ''])
+
+        self.assertEqual([tag.name for tag in tags], [existing.name, 'viaje'])
+        self.assertEqual(tags[0].id, existing.id)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+
+class TagTransactionsTests(TestCase):
+
+    def setUp(self):
+        self.user = utils.get_test_user()
+        self.account = utils.get_test_account(user=self.user, balance=100.0)
+        self.category = utils.get_test_category(
+            user=self.user,
+            type=Category.TYPE.EXPENSE
+        )
+
+    def add_expenses(self, count):
+        return [
+            self.account.add_transaction(
+                amount=1,
+                date=date(2021, 6, 1),
+                category=self.category,
+                type=Transaction.TYPE.EXPENSE
+            )
+            for i in range(count)
+        ]
+
+    def test_tag_transactions(self):
+        """Tests tagging transactions, ignoring the tags they already have"""
+        transactions = self.add_expenses(2)
+        Tag.objects.tag_transactions(self.user, transactions[:1], ['viaje'])
+
+        tags = Tag.objects.tag_transactions(self.user, transactions, ['viaje', 'playa'])
+
+        self.assertEqual([tag.name for tag in tags], ['playa', 'viaje'])
+        for transaction in transactions:
+            self.assertEqual(
+                sorted(transaction.tags.values_list('name', flat=True)),
+                ['playa', 'viaje']
+            )
+
+    def test_tag_transactions_constant_queries(self):
+        """Tests that tagging costs the same regardless of the number of rows"""
+        transactions = self.add_expenses(21)
+        with CaptureQueriesContext(connection) as small:
+            Tag.objects.tag_transactions(self.user, transactions[:1], ['a'])
+        with CaptureQueriesContext(connection) as large:
+            Tag.objects.tag_transactions(
+                self.user, transactions[1:], ['b{}'.format(i) for i in range(10)]
+            )
+
+        self.assertEqual(len(small), len(large))
@@ -1,6 +1,8 @@
 from decimal import Decimal
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from core import globals
 from core.tests import utils
@@ -189,6 +191,71 @@ class TransferTests(TransactionTests):
             transaction
         )
 
+    def test_create_transfers(self):
+        """Testea crear varias transferencias enlazadas en una sola llamada"""
+        transfers = [
+            {**self.transaction_data, 'amount': Decimal('10.00')},
+            {
+                **self.transaction_data,
+                'account': self.account2,
+                'destination_account': self.account,
+                'amount': Decimal('3.00')
+            },
+            {**self.transaction_data, 'amount': Decimal('5.00'), 'is_paid': False},
+        ]
+        outputs = Transaction.objects.create_transfers(transfers)
+
+        self.assertEqual(len(outputs), 3)
+        self.assertEqual(self.account.balance, Decimal('993.00'))
+        self.assertEqual(self.account2.balance, Decimal('1007.00'))
+        for output in outputs:
+            output.refresh_from_db()
+            self.assertEqual(output.linked_transaction.linked_transaction, output)
+            self.assertEqual(output.linked_transaction.amount, output.amount)
+            self.assertEqual(output.linked_transaction.is_paid, output.is_paid)
+        self.assertEqual(outputs[1].linked_transaction.account, self.account)
+
+    def test_create_transfers_constant_queries(self):
+        """Testea que el numero de consultas no dependa del numero de transferencias"""
+        def get_transfers(count):
+            return [self.transaction_data.copy() for i in range(count)]
+        Transaction.objects.create_transfers(get_transfers(1))
+
+        with CaptureQueriesContext(connection) as small:
+            Transaction.objects.create_transfers(get_transfers(2))
+        with CaptureQueriesContext(connection) as large:
+            Transaction.objects.create_transfers(get_transfers(50))
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            self.assertEqual(len(small), len(large))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('470.00'))
+
+    def test_create_transfers_rollback(self):
+        """Testea que una transferencia invalida cancele todo el lote"""
+        transfers = [
+            self.transaction_data.copy(),
+            {**self.transaction_data, 'amount': None},
+        ]
+        with self.assertRaises(ValueError):
+            Transaction.objects.create_transfers(transfers)
+
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_unapply_transfer(self):
+        """Testea deshacer las dos piernas de una transferencia juntas"""
+        transaction = Transaction.objects.create_transfer(**self.transaction_data)
+
+        Transaction.objects.unapply_transactions(
+            [transaction, transaction.linked_transaction]
+        )
+
+        self.assertEqual(self.account.balance, Decimal('1000.00'))
+        self.assertEqual(self.account2.balance, Decimal('1000.00'))
+        self.assertFalse(Transaction.objects.filter(is_paid=True).exists())
+        with self.assertRaises(ValueError):
+            Transaction.objects.unapply_transactions([transaction])
+
 
 class IncomeTests(TransactionTests):
     def test_create_new_income(self):
@@ -218,3 +285,50 @@ class ExpenseTests(TransactionTests):
         )
 
         self.assertEqual(self.account.balance, Decimal('990.0'))
+
+
+class ConcurrentBalanceTests(TransactionTests):
+    def setUp(self):
+        super().setUp()
+        self.transaction_data['type'] = Transaction.TYPE.EXPENSE
+        self.transaction_data['logic_type'] = Transaction.LOGIC_TYPE.EXPENSE
+        self.transaction_data['is_paid'] = False
+
+    def test_apply_with_stale_account(self):
+        """Testea que aplicar con cuentas obsoletas no pierda actualizaciones"""
+        transaction1 = Transaction.objects.create_transaction(**self.transaction_data)
+        transaction2 = Transaction.objects.create_transaction(**self.transaction_data)
+        transaction1 = Transaction.objects.get(pk=transaction1.pk)
+        transaction2 = Transaction.objects.get(pk=transaction2.pk)
+        # Ambas cuentas se leen antes de cualquier escritura
+        transaction1.account
+        transaction2.account
+
+        transaction1.apply()
+        transaction2.apply()
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('980.0'))
+        self.assertEqual(transaction2.account.balance, Decimal('980.0'))
+
+    def test_apply_twice_from_stale_instance(self):
+        """Testea que una transaccion no pueda aplicarse dos veces desde otra instancia"""
+        transaction = Transaction.objects.create_transaction(**self.transaction_data)
+        stale_transaction = Transaction.objects.get(pk=transaction.pk)
+
+        transaction.apply()
+        with self.assertRaises(ValueError):
+            stale_transaction.apply()
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('990.0'))
+
+    def test_apply_only_writes_balance(self):
+        """Testea que aplicar no reescriba las demas columnas de la cuenta"""
+        transaction = Transaction.objects.create_transaction(**self.transaction_data)
+        Account.objects.filter(pk=self.account.pk).update(name='Renombrada')
+
+        transaction.apply()
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.name, 'Renombrada')
@@ -1,12 +1,24 @@
 import random
 import string
+from contextlib import contextmanager
 from decimal import Decimal
 from datetime import timedelta
+from unittest.mock import patch
+from urllib.parse import urlencode
 
+from asgiref.sync import async_to_sync
+from django.core import signals
+from django.core.handlers.asgi import ASGIHandler
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection, connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework_simplejwt.tokens import AccessToken
 
 from core.globals import CURRENCY
+from core.routers import CACHE_APP_LABEL, REPLICA_DB_ALIAS, ReplicaRouter
 from core.models import Category, Account, Transaction, Tag
 
 
@@ -86,8 +98,10 @@ def get_test_expense(account=None):
     pass
 
 
-def get_test_tag():
-    return Tag(name='comida')
+def get_test_tag(user=None):
+    if not user:
+        raise TestObjectException('Tag creation requires a user')
+    return Tag.objects.create_tag(user=user, name='comida')
 
 
 def get_test_budget(user=None):
@@ -98,3 +112,88 @@ def get_test_budget(user=None):
         start_date=now,
         end_date=now + timedelta(days=30)
     )
+
+
+def assert_query_budget(testcase, budget, request, *args, **kwargs):
+    """
+    Hace el request y falla si usa mas consultas que el presupuesto, mostrando las
+    consultas ejecutadas. Retorna la respuesta.
+    """
+    with CaptureQueriesContext(connection) as context:
+        response = request(*args, **kwargs)
+
+    queries = [query['sql'] for query in context.captured_queries]
+    testcase.assertLessEqual(
+        len(queries),
+        budget,
+        'Request used {} queries, the budget is {}:\n{}'.format(
+            len(queries), budget, '\n'.join(queries)
+        )
+    )
+
+    return response
+
+
+@contextmanager
+def replica_reads():
+    """
+    Activa las lecturas de la replica usando la conexion 'default' como replica, para
+    que vea los datos del test. Retorna la lista de alias que elige el router al leer,
+    sin contar las lecturas del cache compartido.
+    """
+    aliases = []
+    db_for_read = ReplicaRouter.db_for_read
+
+    def spy(router, model, **hints):
+        alias = db_for_read(router, model, **hints)
+        if model._meta.app_label != CACHE_APP_LABEL:
+            aliases.append(alias or DEFAULT_DB_ALIAS)
+        return alias
+
+    replica = connections[REPLICA_DB_ALIAS]
+    connections[REPLICA_DB_ALIAS] = connections[DEFAULT_DB_ALIAS]
+    try:
+        with override_settings(DB_REPLICA_READS=True), \
+                patch.object(ReplicaRouter, 'db_for_read', spy):
+            yield aliases
+    finally:
+        connections[REPLICA_DB_ALIAS] = replica
+
+
+def asgi_get(path, params=None, user=None):
+    """
+    Hace un GET a traves del handler ASGI de Django, como lo sirve uvicorn, y retorna
+    el status, los headers y el cuerpo. Las vistas sincronas corren en este hilo, asi
+    que ven los datos del test.
+    """
+    headers = []
+    if user:
+        token = AccessToken.for_user(user)
+        headers.append((b'authorization', 'Bearer {}'.format(token).encode()))
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': urlencode(params or {}).encode(),
+        'headers': headers,
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    # Como el cliente de pruebas, sin cerrar la conexion que tiene abierta el test
+    signals.request_started.disconnect(close_old_connections)
+    signals.request_finished.disconnect(close_old_connections)
+    try:
+        async_to_sync(ASGIHandler())(scope, receive, send)
+    finally:
+        signals.request_started.connect(close_old_connections)
+        signals.request_finished.connect(close_old_connections)
+
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return start['status'], dict(start['headers']), body
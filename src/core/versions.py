@@ -0,0 +1,27 @@
+"""
+Numeros de version guardados en un cache. Todo lo que se guarda con la version en la
+llave se descarta con un solo incremento, sin borrar cada entrada.
+"""
+import time
+
+
+def _new_version():
+    # Si la version fue desalojada no puede volver a un valor usado antes
+    return time.time_ns()
+
+
+def get_version(cache, key):
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+
+    return version
+
+
+def bump_version(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), timeout=None)
@@ -2,8 +2,36 @@ from django.core.exceptions import PermissionDenied
 
 from rest_framework import viewsets, permissions
 
+from core import routers
 
-class UserObjectViewSet(viewsets.ModelViewSet):
+
+class ReplicaReadMixin:
+    """
+    Lee de la replica en los requests GET, HEAD y OPTIONS, salvo que el usuario haya
+    escrito hace poco. Las escrituras exitosas fijan al usuario a 'default'.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in permissions.SAFE_METHODS:
+            self.replica_token = routers.start_replica_reads(
+                routers.can_use_replica(request.user)
+            )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, 'replica_token', None)
+        if token is not None:
+            routers.stop_replica_reads(token)
+            self.replica_token = None
+        elif (request.method not in permissions.SAFE_METHODS and
+                response.status_code < 400 and
+                request.user and request.user.is_authenticated):
+            routers.pin_user(request.user.pk)
+
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class UserObjectViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_queryset(self):
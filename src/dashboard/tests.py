@@ -0,0 +1,246 @@
+import json
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core import aggregates, rates, routers
+from dashboard import views
+from core.tests import utils
+from accounts.views import AccountViewSet
+from core.models import Category, Transaction
+from core.globals import CURRENCY
+
+
+DASHBOARD_URL = reverse('dashboard:dashboard')
+ACCOUNTS_URL = reverse('dashboard:accounts')
+TRANSACTIONS_URL = reverse('dashboard:transactions')
+
+
+def get_budget_report_url(lookup=None):
+    return reverse('dashboard:budget-report', kwargs={'pk': lookup})
+
+
+class PublicTests(TestCase):
+    """Testea el API del dashboard (publico)"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_dashboard_unauthorized(self):
+        """Testea que necesita estar autenticado para ver el dashboard"""
+        res = self.client.get(DASHBOARD_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_async_views_unauthorized(self):
+        """Testea que las versiones async de los listados necesiten autenticacion"""
+        for url in (ACCOUNTS_URL, TRANSACTIONS_URL, get_budget_report_url(1)):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED, msg=url)
+
+    def test_dashboard_invalid_token(self):
+        """Testea que un token invalido sea rechazado"""
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer invalido')
+
+        res = self.client.get(DASHBOARD_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class DashboardTestsMixin:
+
+    def setUp(self):
+        aggregates.get_cache().clear()
+        rates.clear_cache()
+        self.user = utils.get_test_user()
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.account = utils.get_test_account(
+            user=self.user,
+            currency=CURRENCY.PEN,
+            balance=100.0
+        )
+        self.category = utils.get_test_category(user=self.user, type=Category.TYPE.EXPENSE)
+        self.account.add_transaction(
+            type=Transaction.TYPE.EXPENSE,
+            amount=Decimal('10.00'),
+            date=timezone.localtime(timezone.now()).date(),
+            category=self.category,
+            is_paid=True
+        )
+        self.budget = utils.get_test_budget(user=self.user)
+        self.budget.add_category(self.category, Decimal('50.00'))
+        # Presupuesto que ya termino
+        self.user.add_budget(
+            start_date=timezone.now() - timedelta(days=60),
+            end_date=timezone.now() - timedelta(days=31)
+        )
+
+    def assertDashboard(self, data):
+        self.assertEqual(data['accounts'][0]['id'], self.account.id)
+        self.assertEqual(data['accounts'][0]['balance'], 90)
+        self.assertEqual(len(data['transactions']), 1)
+        self.assertEqual(data['net_worth']['total'], '90.00')
+        self.assertEqual(len(data['budgets']), 1)
+        self.assertEqual(data['budgets'][0]['spent'], '10.00')
+
+
+@override_settings(DASHBOARD_CONCURRENT_QUERIES=False)
+class PrivateTests(DashboardTestsMixin, TestCase):
+    """Testea el API del dashboard (privado)"""
+
+    def setUp(self):
+        super().setUp()
+        self.user.favorite_currency = CURRENCY.PEN
+        self.user.save()
+
+    def test_dashboard(self):
+        """Testea obtener todas las secciones del dashboard"""
+        res = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertDashboard(res.json())
+
+    def test_dashboard_sections(self):
+        """Testea pedir solo algunas secciones del dashboard"""
+        res = self.client.get(DASHBOARD_URL, {'sections': 'accounts,net_worth'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.json()), {'accounts', 'net_worth'})
+
+    def test_dashboard_unknown_section(self):
+        """Testea que una seccion desconocida sea rechazada"""
+        res = self.client.get(DASHBOARD_URL, {'sections': 'accounts,tags'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_dashboard_without_exchange_rate(self):
+        """Testea que falte el tipo de cambio solo afecte al patrimonio neto"""
+        utils.get_test_account(user=self.user, currency=CURRENCY.USD, balance=5.0)
+
+        res = self.client.get(DASHBOARD_URL, {'sections': 'accounts,net_worth'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('error', res.json()['net_worth'])
+        self.assertEqual(len(res.json()['accounts']), 2)
+
+    def test_async_accounts(self):
+        """Testea que la version async del listado de cuentas responda como la de DRF"""
+        res = self.client.get(ACCOUNTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.json(), self.client.get(reverse('accounts:account-list')).json()
+        )
+
+    def test_async_transactions(self):
+        """Testea que la version async del listado de transacciones acepte sus filtros"""
+        params = {'type': Transaction.TYPE.EXPENSE}
+        res = self.client.get(TRANSACTIONS_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()['results']), 1)
+        self.assertEqual(
+            res.json(),
+            self.client.get(reverse('transactions:transaction-list'), params).json()
+        )
+
+    def test_async_budget_report(self):
+        """Testea el reporte async de un presupuesto"""
+        res = self.client.get(get_budget_report_url(self.budget.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['categories'][0]['spent'], '10.00')
+
+        other_budget = utils.get_test_budget(user=utils.get_test_user('other@test.com'))
+        res = self.client.get(get_budget_report_url(other_budget.id))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_async_views_read_only(self):
+        """Testea que las versiones async solo acepten lecturas"""
+        res = self.client.post(ACCOUNTS_URL, {'name': 'Cuenta'})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_dashboard_reads_replica(self):
+        """Testea que los reportes del dashboard lean de la replica"""
+        caches[routers.PIN_CACHE_ALIAS].clear()
+
+        with utils.replica_reads() as aliases:
+            res = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertDashboard(res.json())
+        self.assertEqual(set(aliases), {'replica'})
+
+    def test_dashboard_method_not_allowed(self):
+        """Testea que el dashboard sea de solo lectura"""
+        res = self.client.post(DASHBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+@override_settings(DASHBOARD_CONCURRENT_QUERIES=True)
+class ConcurrentTests(DashboardTestsMixin, TransactionTestCase):
+    """Testea el dashboard consultando cada seccion en su propio hilo"""
+
+    def setUp(self):
+        super().setUp()
+        self.user.favorite_currency = CURRENCY.PEN
+        self.user.save()
+        views.shutdown_executor()
+
+    def tearDown(self):
+        views.shutdown_executor()
+        super().tearDown()
+
+    def test_dashboard(self):
+        """Testea obtener todas las secciones a la vez"""
+        res = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertDashboard(res.json())
+
+    @override_settings(DASHBOARD_QUERY_THREADS=1)
+    def test_dashboard_reuses_connections(self):
+        """Testea que los hilos de las secciones reutilicen su conexion entre requests"""
+        def get_connection():
+            return connections[DEFAULT_DB_ALIAS].connection
+
+        with patch('django.db.connections.close_all') as close_all:
+            self.client.get(DASHBOARD_URL)
+            first = views.get_executor().submit(get_connection).result()
+            res = self.client.get(DASHBOARD_URL)
+            second = views.get_executor().submit(get_connection).result()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(close_all.called)
+        self.assertIsNotNone(first)
+        self.assertIs(first, second)
+
+    def test_async_accounts(self):
+        """Testea que el listado async corra en el pool y no en el hilo de Django"""
+        threads = []
+        list_accounts = AccountViewSet.list
+
+        def spy(view, request, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return list_accounts(view, request, *args, **kwargs)
+
+        with patch.object(AccountViewSet, 'list', spy):
+            code, headers, body = utils.asgi_get(ACCOUNTS_URL, user=self.user)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(body)[0]['id'], self.account.id)
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('dashboard'))
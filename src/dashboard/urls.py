@@ -0,0 +1,13 @@
+from django.urls import path
+
+from dashboard import views
+
+app_name = 'dashboard'
+
+urlpatterns = [
+    path('', views.dashboard, name='dashboard'),
+    # Versiones async de los listados y reportes, ver views.executor_view
+    path('accounts/', views.accounts, name='accounts'),
+    path('transactions/', views.transactions, name='transactions'),
+    path('budgets/<int:pk>/report/', views.budget_report, name='budget-report'),
+]
@@ -0,0 +1,198 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse
+from django.utils import timezone
+
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from accounts.serializers import AccountSerializer
+from accounts.views import AccountViewSet, get_net_worth_data
+from budgets.views import BudgetViewSet, get_report_data
+from core import routers
+from core.models import Transaction
+from transactions.serializers import IncomeExpenseSerializer
+from transactions.views import TransactionViewSet
+
+
+RECENT_TRANSACTIONS = 20
+
+
+def get_accounts(user):
+    return AccountSerializer(user.accounts.order_by('id'), many=True).data
+
+
+def get_transactions(user):
+    transactions = Transaction.objects.filter(
+        account__user=user
+    ).order_by('-date', '-id')[:RECENT_TRANSACTIONS]
+
+    return IncomeExpenseSerializer(transactions, many=True).data
+
+
+def get_net_worth(user):
+    try:
+        return get_net_worth_data(user, user.favorite_currency)
+    except ValueError as e:
+        return {'currency': user.favorite_currency, 'error': str(e)}
+
+
+def get_budgets(user):
+    today = timezone.localtime(timezone.now()).date()
+    budgets = user.budgets.filter(start_date__lte=today, end_date__gte=today)
+
+    return [get_report_data(budget) for budget in budgets.order_by('start_date', 'id')]
+
+
+SECTIONS = {
+    'accounts': get_accounts,
+    'transactions': get_transactions,
+    'net_worth': get_net_worth,
+    'budgets': get_budgets,
+}
+
+
+def _get_section(section, user, replica):
+    with routers.use_replica(replica):
+        return SECTIONS[section](user)
+
+
+def _run_section(section, user, replica):
+    """
+    Calcula una seccion en un hilo del pool. Cada hilo conserva su conexion entre
+    requests, como los hilos del servidor, y se cierra segun CONN_MAX_AGE
+    """
+    try:
+        return _get_section(section, user, replica)
+    finally:
+        close_old_connections()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Pool de hilos de las secciones, con una conexion por hilo como maximo"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'DASHBOARD_QUERY_THREADS', len(SECTIONS)),
+                thread_name_prefix='dashboard'
+            )
+
+    return _executor
+
+
+def shutdown_executor():
+    """Termina los hilos del pool, y con ellos sus conexiones"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def _get_user(request):
+    """Autentica el request con las clases de autenticacion de DRF"""
+    return Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    ).user
+
+
+async def dashboard(request):
+    """
+    Retorna en una sola respuesta las cuentas, las ultimas transacciones, el patrimonio
+    neto y los presupuestos vigentes del usuario (o solo las secciones de ?sections=).
+    Con DASHBOARD_CONCURRENT_QUERIES las secciones consultan a la vez en un pool de
+    hilos que reutilizan sus conexiones, en lugar de ocupar un hilo del servidor por
+    reporte.
+    """
+    if request.method != 'GET':
+        return JsonResponse(
+            {'detail': 'Method "{}" not allowed.'.format(request.method)},
+            status=status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+    try:
+        user = await sync_to_async(_get_user)(request)
+    except exceptions.APIException as e:
+        return JsonResponse({'detail': str(e.detail)}, status=e.status_code)
+    if not user or not user.is_authenticated:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    sections = request.GET.get('sections')
+    sections = sections.split(',') if sections else list(SECTIONS)
+    unknown = [section for section in sections if section not in SECTIONS]
+    if unknown:
+        return JsonResponse(
+            {'sections': 'Unknown sections: {}'.format(', '.join(unknown))},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    replica = await sync_to_async(routers.can_use_replica)(user)
+    if getattr(settings, 'DASHBOARD_CONCURRENT_QUERIES', True):
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(get_executor(), _run_section, section, user, replica)
+            for section in sections
+        ))
+    else:
+        results = [
+            await sync_to_async(_get_section)(section, user, replica)
+            for section in sections
+        ]
+
+    return JsonResponse(dict(zip(sections, results)), encoder=JSONEncoder)
+
+
+def _get_view_response(view, request, args, kwargs):
+    response = view(request, *args, **kwargs)
+    # Se serializa en el mismo hilo que hizo las consultas
+    response.render()
+    return response
+
+
+def _run_view(view, request, args, kwargs):
+    """Corre la vista en un hilo del pool, que conserva su conexion como las secciones"""
+    try:
+        return _get_view_response(view, request, args, kwargs)
+    finally:
+        close_old_connections()
+
+
+def executor_view(view):
+    """
+    Version async de una vista de solo lectura de DRF. Bajo ASGI Django 3.2 corre
+    todas las vistas sincronas de un worker de a una en el mismo hilo; esta corre en el
+    pool de las secciones del dashboard, asi varios reportes lentos avanzan a la vez.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not getattr(settings, 'DASHBOARD_CONCURRENT_QUERIES', True):
+            return await sync_to_async(_get_view_response)(view, request, args, kwargs)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_executor(), _run_view, view, request, args, kwargs
+        )
+
+    return wrapper
+
+
+accounts = executor_view(AccountViewSet.as_view({'get': 'list'}))
+transactions = executor_view(TransactionViewSet.as_view({'get': 'list'}))
+budget_report = executor_view(BudgetViewSet.as_view({'get': 'report'}, detail=True))
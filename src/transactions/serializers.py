@@ -1,10 +1,52 @@
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from core.models import Transaction, Account, Category, Tag
 
-from core.models import Transaction, Account
+
+MAX_BATCH_SIZE = 1000
+MAX_TAGS = 50
 
 
 class TransactionSerializer(serializers.ModelSerializer):
-    pass
+
+    def update(self, instance, validated_data):
+        """
+        Deshace el saldo de la transaccion antes de editarla y luego lo reaplica. En una
+        transferencia se editan las dos piernas juntas: el monto, la fecha y si esta
+        pagada son de ambas, y destination_account es la cuenta de la enlazada.
+        """
+        is_paid = validated_data.pop('is_paid', instance.is_paid)
+        destination_account = validated_data.pop('destination_account', None)
+        linked = None
+        if instance.type == Transaction.TYPE.TRANSFER:
+            linked = instance.linked_transaction
+        transactions = [instance] + ([linked] if linked else [])
+
+        with db_transaction.atomic():
+            # Ambas piernas se deshacen y reaplican juntas para bloquear sus cuentas
+            # en orden
+            Transaction.objects.unapply_transactions(
+                transaction for transaction in transactions if transaction.is_paid
+            )
+
+            instance = super().update(instance, validated_data)
+            if linked:
+                for field in ('amount', 'date'):
+                    if field in validated_data:
+                        setattr(linked, field, validated_data[field])
+                if destination_account:
+                    linked.account = destination_account
+                linked.save()
+
+            if is_paid:
+                Transaction.objects.apply_transactions(transactions)
+
+        return instance
 
 
 class TransferSerializer(TransactionSerializer):
@@ -55,3 +97,105 @@ class IncomeExpenseSerializer(TransactionSerializer):
         transaction = account.add_transaction(**validated_data)
 
         return transaction
+
+
+class BatchTransactionListSerializer(serializers.ListSerializer):
+    """Valida y crea un lote de ingresos y egresos: se crean todos o ninguno"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > MAX_BATCH_SIZE:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'A batch can have at most {} transactions'.format(MAX_BATCH_SIZE)
+                ]
+            })
+        items = super().to_internal_value(data)
+
+        # Una sola consulta de cuentas y otra de categorias para todo el lote
+        user = self.context['request'].user
+        accounts = user.accounts.in_bulk({item['account_id'] for item in items})
+        categories = Category.objects.filter(user=user).in_bulk(
+            {item['category_id'] for item in items}
+        )
+
+        errors = []
+        for item in items:
+            error = {}
+            item['account'] = accounts.get(item.pop('account_id'))
+            item['category'] = categories.get(item.pop('category_id'))
+            if item['account'] is None:
+                error['account'] = ['You don\'t have access to that account']
+            if item['category'] is None:
+                error['category'] = ['You don\'t have access to that category']
+            elif item['category'].type != item['type']:
+                error['category'] = ['Category doesn\'t match the transaction type']
+            errors.append(error)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return items
+
+    def create(self, validated_data):
+        return Transaction.objects.bulk_create_transactions([
+            Transaction.objects.build_transaction(**item, logic_type=item['type'])
+            for item in validated_data
+        ])
+
+
+class BatchTransactionSerializer(serializers.ModelSerializer):
+    """Serializer de cada ingreso o egreso de un lote"""
+    account = serializers.IntegerField(source='account_id')
+    category = serializers.IntegerField(source='category_id')
+    type = serializers.ChoiceField(
+        choices=(Transaction.TYPE.INCOME, Transaction.TYPE.EXPENSE)
+    )
+    amount = serializers.DecimalField(
+        max_digits=9,
+        decimal_places=2,
+        min_value=Decimal('0.01')
+    )
+
+    class Meta:
+        model = Transaction
+        list_serializer_class = BatchTransactionListSerializer
+        fields = (
+            'id', 'amount', 'description', 'date', 'category',
+            'account', 'type', 'is_paid'
+        )
+        extra_kwargs = {
+            'date': {'required': True}
+        }
+
+
+class TagTransactionsSerializer(serializers.Serializer):
+    """Agrega etiquetas por nombre a una lista de transacciones del usuario"""
+    transactions = serializers.ListField(
+        child=serializers.IntegerField(),
+        min_length=1,
+        max_length=MAX_BATCH_SIZE
+    )
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        min_length=1,
+        max_length=MAX_TAGS
+    )
+
+    def validate_transactions(self, value):
+        user = self.context['request'].user
+        transactions = Transaction.objects.filter(
+            account__user=user,
+            pk__in=value
+        ).only('id')
+        if len(transactions) != len(set(value)):
+            raise serializers.ValidationError(
+                'You don\'t have access to some of the transactions'
+            )
+
+        return transactions
+
+    def create(self, validated_data):
+        return Tag.objects.tag_transactions(
+            self.context['request'].user,
+            validated_data['transactions'],
+            validated_data['tags']
+        )
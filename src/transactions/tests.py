@@ -1,15 +1,32 @@
+import json
+from datetime import date
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core import aggregates, reconcile
 from core.tests import utils
 from core.models import Category, Account, Transaction
 from core.globals import CURRENCY
 
 
 LIST_CREATE_TRANSACTION_URL = reverse('transactions:transaction-list')
+IMPORT_TRANSACTIONS_URL = reverse('transactions:transaction-import-statement')
+BATCH_TRANSACTIONS_URL = reverse('transactions:transaction-batch')
+EXPORT_TRANSACTIONS_URL = reverse('transactions:transaction-export')
+ANALYTICS_URL = reverse('transactions:transaction-analytics')
+SEARCH_URL = reverse('transactions:transaction-search')
+TAG_TRANSACTIONS_URL = reverse('transactions:transaction-tag')
+SPENDING_BY_TAG_URL = reverse('transactions:transaction-spending-by-tag')
+
+# Consultas maximas de una pagina del listado
+LIST_QUERY_BUDGET = 1
 
 
 def get_retrieve_update_destroy_transaction_url(lookup=None):
@@ -101,7 +118,55 @@ class PrivateTests(TestCase):
         res = self.client.get(LIST_CREATE_TRANSACTION_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        # self.assertEqual(len(res.data), self.account.transaction.count())
+        self.assertEqual(
+            len(res.data['results']),
+            Transaction.objects.filter(account__user=self.user).count()
+        )
+        self.assertIsNone(res.data['next'])
+
+    def test_list_transactions_query_budget(self):
+        """Testea que el listado de transacciones no pase su presupuesto de consultas"""
+        for i in range(20):
+            utils.get_test_transaction(self.account, amount='1.00')
+
+        res = utils.assert_query_budget(
+            self, LIST_QUERY_BUDGET, self.client.get, LIST_CREATE_TRANSACTION_URL
+        )
+        self.assertEqual(
+            len(res.data['results']),
+            Transaction.objects.filter(account__user=self.user).count()
+        )
+
+    def test_list_transactions_cursor(self):
+        """Testea recorrer las transacciones por cursor, de la mas reciente a la antigua"""
+        for day in range(1, 6):
+            payload = self.expense_payload.copy()
+            payload['date'] = '2021-07-0{}'.format(day)
+            self.client.post(LIST_CREATE_TRANSACTION_URL, payload)
+        expected = list(Transaction.objects.filter(
+            account__user=self.user
+        ).order_by('-date', '-id').values_list('id', flat=True))
+
+        newer_payload = self.expense_payload.copy()
+        newer_payload['date'] = '2100-01-01'
+
+        ids = []
+        url = LIST_CREATE_TRANSACTION_URL + '?page_size=2'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(transaction['id'] for transaction in res.data['results'])
+            url = res.data['next']
+            # Las inserciones nuevas no mueven las paginas siguientes
+            self.client.post(LIST_CREATE_TRANSACTION_URL, newer_payload)
+
+        self.assertEqual(ids, expected)
+
+    def test_list_transactions_invalid_cursor(self):
+        """Testea que un cursor invalido sea rechazado"""
+        res = self.client.get(LIST_CREATE_TRANSACTION_URL, {'cursor': 'invalido'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_create_transfer(self):
         """Testea que un usuario pueda crear una transferencia"""
@@ -123,3 +188,577 @@ class PrivateTests(TestCase):
         res = self.client.post(LIST_CREATE_TRANSACTION_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_list_transactions_filters(self):
+        """Testea filtrar el listado por fechas, cuenta y categoria"""
+        payload = {**self.income_payload, 'date': '2020-01-15'}
+        self.client.post(LIST_CREATE_TRANSACTION_URL, payload)
+        self.client.post(LIST_CREATE_TRANSACTION_URL, {**payload, 'date': '2020-02-15'})
+
+        res = self.client.get(LIST_CREATE_TRANSACTION_URL, {
+            'start': '2020-01-01',
+            'end': '2020-01-31',
+            'account': self.account.id,
+            'category': payload['category']
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['date'], '2020-01-15')
+
+    def test_list_transactions_type_paid_amount_filters(self):
+        """Testea filtrar el listado por tipo, pago y rango de montos"""
+        account = utils.get_test_account(user=self.user, balance=100.0)
+        payload = {**self.expense_payload, 'account': account.id}
+        self.client.post(LIST_CREATE_TRANSACTION_URL, {**payload, 'amount': 5})
+        self.client.post(LIST_CREATE_TRANSACTION_URL, {**payload, 'amount': 15})
+        self.client.post(LIST_CREATE_TRANSACTION_URL, {
+            **payload, 'amount': 20, 'is_paid': False
+        })
+        self.client.post(LIST_CREATE_TRANSACTION_URL, {
+            **self.income_payload, 'account': account.id, 'amount': 12
+        })
+
+        res = self.client.get(LIST_CREATE_TRANSACTION_URL, {
+            'account': account.id,
+            'type': Transaction.TYPE.EXPENSE,
+            'is_paid': 'true',
+            'min_amount': '10',
+            'max_amount': '30'
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['amount'] for row in res.data['results']], ['15.00'])
+
+        res = self.client.get(LIST_CREATE_TRANSACTION_URL, {
+            'account': account.id,
+            'type': '{},{}'.format(Transaction.TYPE.INCOME, Transaction.TYPE.EXPENSE),
+            'is_paid': 'false'
+        })
+
+        self.assertEqual([row['amount'] for row in res.data['results']], ['20.00'])
+
+    def test_list_transactions_category_tree(self):
+        """Testea filtrar el listado por una categoria y sus subcategorias"""
+        root = utils.get_test_category(user=self.user, type=Category.TYPE.EXPENSE)
+        child = utils.get_test_category(
+            user=self.user, type=Category.TYPE.EXPENSE, parent=root
+        )
+        grandchild = utils.get_test_category(
+            user=self.user, type=Category.TYPE.EXPENSE, parent=child
+        )
+        other = utils.get_test_category(user=self.user, type=Category.TYPE.EXPENSE)
+        for category in (root, child, grandchild, other):
+            self.client.post(LIST_CREATE_TRANSACTION_URL, {
+                **self.expense_payload, 'category': category.id
+            })
+
+        res = self.client.get(LIST_CREATE_TRANSACTION_URL, {'category_tree': child.id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {row['category'] for row in res.data['results']},
+            {child.id, grandchild.id}
+        )
+
+        res = self.client.get(LIST_CREATE_TRANSACTION_URL, {'category_tree': root.id})
+
+        self.assertEqual(len(res.data['results']), 3)
+
+    def test_list_transactions_filters_query_budget(self):
+        """Testea que filtrar no agregue consultas por fila"""
+        utils.assert_query_budget(
+            self,
+            LIST_QUERY_BUDGET,
+            self.client.get,
+            LIST_CREATE_TRANSACTION_URL,
+            {
+                'type': 'I,E',
+                'is_paid': 'true',
+                'min_amount': '1',
+                'account': self.account.id
+            }
+        )
+
+    def test_list_transactions_invalid_filters(self):
+        """Testea que los valores invalidos de los nuevos filtros sean rechazados"""
+        other_category = utils.get_test_category(user=utils.get_test_user('o@test.com'))
+        for param, value in (
+            ('type', 'X'),
+            ('is_paid', 'maybe'),
+            ('min_amount', 'abc'),
+            ('max_amount', 'NaN'),
+            ('category_tree', 'abc'),
+            ('category_tree', other_category.id),
+        ):
+            res = self.client.get(LIST_CREATE_TRANSACTION_URL, {param: value})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, param)
+            self.assertIn(param, res.data)
+
+    def test_list_transactions_invalid_filter(self):
+        """Testea que un filtro invalido sea rechazado"""
+        res = self.client.get(LIST_CREATE_TRANSACTION_URL, {'start': '15/01/2020'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('start', res.data)
+
+    def test_search(self):
+        """Testea buscar transacciones del usuario paginadas por relevancia"""
+        for i in range(3):
+            self.client.post(LIST_CREATE_TRANSACTION_URL, {
+                **self.expense_payload,
+                'description': 'Almuerzo {}'.format(i)
+            })
+
+        res = self.client.get(SEARCH_URL, {'q': 'almuerzo', 'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIn('rank', res.data['results'][0])
+        self.assertIsNotNone(res.data['next'])
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertIsNone(res.data['next'])
+
+    def test_search_filters(self):
+        """Testea que la busqueda respete los filtros del listado"""
+        self.client.post(LIST_CREATE_TRANSACTION_URL, {
+            **self.expense_payload,
+            'description': 'Almuerzo',
+            'date': '2020-01-15'
+        })
+
+        res = self.client.get(SEARCH_URL, {'q': 'almuerzo', 'start': '2020-02-01'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [])
+
+    def test_search_invalid_params(self):
+        """Testea que la busqueda necesite un texto y una pagina valida"""
+        res = self.client.get(SEARCH_URL, {'q': ' '})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('q', res.data)
+
+        res = self.client.get(SEARCH_URL, {'q': 'almuerzo', 'page': 'x'})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def create_expenses(self, amounts):
+        ids = []
+        for amount in amounts:
+            res = self.client.post(LIST_CREATE_TRANSACTION_URL, {
+                **self.expense_payload, 'amount': amount
+            })
+            ids.append(res.data['id'])
+        return ids
+
+    def test_tag_transactions(self):
+        """Testea etiquetar varias transacciones y filtrar por etiqueta"""
+        ids = self.create_expenses([5, 7])
+
+        res = self.client.post(
+            TAG_TRANSACTIONS_URL,
+            {'transactions': ids, 'tags': ['viaje', 'playa']},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['transactions'], 2)
+        self.assertEqual([tag['name'] for tag in res.data['tags']], ['playa', 'viaje'])
+
+        res = self.client.get(LIST_CREATE_TRANSACTION_URL, {'tag': 'viaje'})
+
+        self.assertEqual({row['id'] for row in res.data['results']}, set(ids))
+
+    def test_tag_transactions_another_user(self):
+        """Testea que no se puedan etiquetar transacciones de otro usuario"""
+        other_account = utils.get_test_account(user=utils.get_test_user('o@test.com'))
+        other = utils.get_test_transaction(other_account, type=Transaction.TYPE.INCOME)
+
+        res = self.client.post(
+            TAG_TRANSACTIONS_URL,
+            {'transactions': [other.id], 'tags': ['viaje']},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('transactions', res.data)
+        self.assertFalse(other.tags.exists())
+
+    def test_spending_by_tag(self):
+        """Testea los egresos por etiqueta, de mayor a menor"""
+        aggregates.get_cache().clear()
+        food, trip, both = self.create_expenses([5, 20, 3])
+        self.client.post(
+            TAG_TRANSACTIONS_URL,
+            {'transactions': [food, both], 'tags': ['comida']},
+            format='json'
+        )
+        self.client.post(
+            TAG_TRANSACTIONS_URL,
+            {'transactions': [trip, both], 'tags': ['viaje']},
+            format='json'
+        )
+
+        res = self.client.get(SPENDING_BY_TAG_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['name'], row['total'], row['count']) for row in res.data['tags']],
+            [('viaje', '23.00', 2), ('comida', '8.00', 2)]
+        )
+
+        # Etiquetar invalida el agregado en cache
+        self.client.post(
+            TAG_TRANSACTIONS_URL,
+            {'transactions': [food], 'tags': ['viaje']},
+            format='json'
+        )
+        res = self.client.get(SPENDING_BY_TAG_URL)
+
+        self.assertEqual(res.data['tags'][0]['total'], '28.00')
+
+    def test_analytics(self):
+        """Testea los montos por mes y categoria raiz de los egresos del usuario"""
+        aggregates.get_cache().clear()
+        parent = Category.objects.get(pk=self.expense_payload['category'])
+        child = utils.get_test_category(
+            user=self.user,
+            type=Category.TYPE.EXPENSE,
+            parent=parent
+        )
+        for category, amount, day in (
+            (parent, '10.00', '2020-01-15'),
+            (child, '5.00', '2020-01-20'),
+            (child, '2.50', '2020-03-01'),
+        ):
+            self.client.post(LIST_CREATE_TRANSACTION_URL, {
+                **self.expense_payload,
+                'category': category.id,
+                'amount': amount,
+                'date': day
+            })
+        params = {'start': '2020-01-01', 'end': '2020-12-31', 'level': 1}
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ANALYTICS_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['period'], 'month')
+        self.assertEqual(res.data['buckets'], [date(2020, 1, 1), date(2020, 3, 1)])
+        self.assertEqual(res.data['series'], [
+            {'category': parent.id, 'values': ['15.00', '2.50']}
+        ])
+
+        with self.assertNumQueries(0):
+            self.client.get(ANALYTICS_URL, params)
+
+    def test_analytics_invalid_params(self):
+        """Testea que un periodo, tipo o nivel invalido sea rechazado"""
+        for params in ({'period': 'year'}, {'type': 'T'}, {'level': '0'}):
+            res = self.client.get(ANALYTICS_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(list(params)[0], res.data)
+
+    def test_export_transactions(self):
+        """Testea exportar las transacciones filtradas como CSV"""
+        self.client.post(LIST_CREATE_TRANSACTION_URL, {**self.expense_payload})
+        utils.get_test_transaction(utils.get_test_account(user=utils.get_test_user()))
+
+        res = self.client.get(EXPORT_TRANSACTIONS_URL, {'account': self.account.id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), self.account.transactions.count() + 1)
+        self.assertIn(self.account.name, lines[-1])
+
+    def test_export_transactions_ndjson(self):
+        """Testea exportar las transacciones como NDJSON"""
+        self.client.post(LIST_CREATE_TRANSACTION_URL, {**self.expense_payload})
+
+        res = self.client.get(EXPORT_TRANSACTIONS_URL, {
+            'output': 'ndjson',
+            'start': self.expense_payload['date'],
+            'end': self.expense_payload['date']
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['description'], 'descripcion test')
+
+    def test_export_transactions_asgi(self):
+        """Testea exportar a traves del handler ASGI, que recorre la respuesta async"""
+        self.client.post(LIST_CREATE_TRANSACTION_URL, {**self.expense_payload})
+
+        status_code, headers, body = utils.asgi_get(
+            EXPORT_TRANSACTIONS_URL,
+            {'output': 'ndjson'},
+            user=self.user
+        )
+
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(headers[b'Content-Type'], b'application/x-ndjson')
+        lines = body.decode().splitlines()
+        self.assertEqual(
+            len(lines),
+            Transaction.objects.filter(account__user=self.user).count()
+        )
+        descriptions = [json.loads(line)['description'] for line in lines]
+        self.assertIn('descripcion test', descriptions)
+
+    def test_export_transactions_invalid_output(self):
+        """Testea que un formato de exportacion desconocido sea rechazado"""
+        res = self.client.get(EXPORT_TRANSACTIONS_URL, {'output': 'xls'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def get_batch(self, count):
+        return [
+            {**self.income_payload, 'amount': '2.00'}
+            if i % 2 else {**self.expense_payload, 'amount': '1.00'}
+            for i in range(count)
+        ]
+
+    def test_create_batch(self):
+        """Testea crear un lote de ingresos y egresos en un solo request"""
+        self.account.refresh_from_db()
+        balance = self.account.balance
+        count = self.account.transactions.count()
+
+        res = self.client.post(BATCH_TRANSACTIONS_URL, self.get_batch(10), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 10)
+        self.assertEqual(res.data[0]['category'], self.expense_payload['category'])
+        self.assertEqual(self.account.transactions.count(), count + 10)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, balance + 5)
+        self.assertEqual(self.account.get_ledger_balance(), self.account.balance)
+
+        ids = [item['id'] for item in res.data]
+        self.assertEqual(
+            set(Transaction.objects.filter(pk__in=ids).values_list('id', flat=True)),
+            set(ids)
+        )
+        self.assertEqual(
+            set(self.account.ledger_entries.filter(
+                transaction__in=ids
+            ).values_list('transaction_id', flat=True)),
+            set(ids)
+        )
+
+    def test_create_batch_unpaid_invalidates_aggregates(self):
+        """Testea que un lote sin transacciones pagadas invalide los agregados"""
+        calls = []
+
+        def get_aggregate():
+            return aggregates.get_or_compute(
+                self.user.id, 'test', lambda: calls.append(1) or len(calls)
+            )
+
+        get_aggregate()
+        batch = [{**item, 'is_paid': False} for item in self.get_batch(2)]
+        res = self.client.post(BATCH_TRANSACTIONS_URL, batch, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(get_aggregate(), 2)
+
+    def test_create_batch_constant_queries(self):
+        """Testea que el lote haga las mismas consultas sin importar su tamano"""
+        self.client.post(BATCH_TRANSACTIONS_URL, self.get_batch(1), format='json')
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(BATCH_TRANSACTIONS_URL, self.get_batch(2), format='json')
+        # Menos de 999 parametros, el limite de un INSERT en SQLite
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(BATCH_TRANSACTIONS_URL, self.get_batch(80), format='json')
+
+        self.assertEqual(len(small), len(large))
+
+    def test_create_batch_all_or_nothing(self):
+        """Testea que un item invalido cancele todo el lote"""
+        count = Transaction.objects.count()
+        another_account = utils.get_test_account(user=utils.get_test_user())
+        batch = self.get_batch(3)
+        batch[1]['account'] = another_account.id
+        batch[2]['category'] = self.income_payload['category']
+
+        res = self.client.post(BATCH_TRANSACTIONS_URL, batch, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('account', res.data[1])
+        self.assertIn('category', res.data[2])
+        self.assertEqual(Transaction.objects.count(), count)
+
+    def test_create_batch_invalid_item(self):
+        """Testea que un lote con un item sin monto no cree ninguna transaccion"""
+        count = Transaction.objects.count()
+        batch = self.get_batch(2)
+        del batch[1]['amount']
+
+        res = self.client.post(BATCH_TRANSACTIONS_URL, batch, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('amount', res.data[1])
+        self.assertEqual(Transaction.objects.count(), count)
+
+    def test_import_statement(self):
+        """Testea que un usuario pueda importar un extracto a su cuenta"""
+        statement = SimpleUploadedFile(
+            'extracto.csv',
+            b'date,amount,description\n'
+            b'2021-06-01,50.00,Deposito\n'
+            b'2021-06-02,-20.00,Retiro\n'
+        )
+        res = self.client.post(
+            IMPORT_TRANSACTIONS_URL,
+            {'account': self.account.id, 'file': statement},
+            format='multipart'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data.get('rows'), 2)
+        self.assertIn('rows_per_second', res.data)
+        self.assertEqual(self.account.transactions.filter(description='Retiro').count(), 1)
+
+    def test_import_statement_invalid_amount(self):
+        """Testea que un monto no finito o demasiado grande sea rechazado"""
+        for amount in (b'NaN', b'1e400', b'123456789.00'):
+            statement = SimpleUploadedFile(
+                'extracto.csv', b'date,amount\n2021-06-01,' + amount + b'\n'
+            )
+            res = self.client.post(
+                IMPORT_TRANSACTIONS_URL,
+                {'account': self.account.id, 'file': statement},
+                format='multipart'
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, msg=amount)
+
+    def test_import_statement_another_user_account(self):
+        """Testea que un usuario no pueda importar a la cuenta de otro usuario"""
+        account = utils.get_test_account(user=utils.get_test_user())
+        statement = SimpleUploadedFile('extracto.csv', b'date,amount\n2021-06-01,50.00\n')
+        res = self.client.post(
+            IMPORT_TRANSACTIONS_URL,
+            {'account': account.id, 'file': statement},
+            format='multipart'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(account.transactions.exists())
+
+    def test_import_statement_invalid_rows(self):
+        """Testea que un extracto invalido sea rechazado"""
+        statement = SimpleUploadedFile('extracto.qif', b'!Type:Bank\nD06/01/2021\n^\n')
+        res = self.client.post(
+            IMPORT_TRANSACTIONS_URL,
+            {'account': self.account.id, 'file': statement},
+            format='multipart'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_paid_transaction(self):
+        """Testea que editar una transaccion pagada corrija el saldo de la cuenta"""
+        payload = self.expense_payload.copy()
+        res = self.client.post(LIST_CREATE_TRANSACTION_URL, payload)
+        self.account.refresh_from_db()
+        balance = self.account.balance
+
+        payload['amount'] = 25.0
+        url = get_retrieve_update_destroy_transaction_url(res.data['id'])
+        res = self.client.put(url, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, balance - 15)
+        self.assertEqual(self.account.logs.get(year=2021, month=7).change, -25)
+
+    def test_update_paid_transfer(self):
+        """Testea que editar una transferencia pagada edite y reaplique ambas piernas"""
+        destination_account = Account.objects.get(
+            pk=self.transfer_payload['destination_account']
+        )
+        self.account.refresh_from_db()
+        balance = self.account.balance
+        destination_balance = destination_account.balance
+        res = self.client.post(LIST_CREATE_TRANSACTION_URL, self.transfer_payload.copy())
+
+        url = get_retrieve_update_destroy_transaction_url(res.data['id'])
+        res = self.client.patch(url, {'amount': 25.0, 'date': '2021-07-08'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.account.refresh_from_db()
+        destination_account.refresh_from_db()
+        self.assertEqual(self.account.balance, balance - 25)
+        self.assertEqual(destination_account.balance, destination_balance + 25)
+        self.assertEqual(self.account.get_ledger_balance(), self.account.balance)
+        self.assertEqual(
+            destination_account.get_ledger_balance(), destination_account.balance
+        )
+        linked = Transaction.objects.get(pk=res.data['id']).linked_transaction
+        self.assertEqual(linked.amount, 25)
+        self.assertEqual(linked.date, date(2021, 7, 8))
+        self.assertEqual(reconcile.get_broken_transfers(Transaction.objects.all()), [])
+
+    def test_update_transfer_unpaid(self):
+        """Testea que marcar una transferencia como no pagada deshaga ambas piernas"""
+        destination_account = Account.objects.get(
+            pk=self.transfer_payload['destination_account']
+        )
+        self.account.refresh_from_db()
+        balance = self.account.balance
+        destination_balance = destination_account.balance
+        res = self.client.post(LIST_CREATE_TRANSACTION_URL, self.transfer_payload.copy())
+
+        url = get_retrieve_update_destroy_transaction_url(res.data['id'])
+        res = self.client.patch(url, {'is_paid': False})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.account.refresh_from_db()
+        destination_account.refresh_from_db()
+        self.assertEqual(self.account.balance, balance)
+        self.assertEqual(destination_account.balance, destination_balance)
+        self.assertEqual(reconcile.get_broken_transfers(Transaction.objects.all()), [])
+
+    def test_delete_paid_transaction(self):
+        """Testea que borrar una transaccion pagada deshaga su efecto en el saldo"""
+        self.account.refresh_from_db()
+        balance = self.account.balance
+        res = self.client.post(LIST_CREATE_TRANSACTION_URL, self.income_payload.copy())
+
+        url = get_retrieve_update_destroy_transaction_url(res.data['id'])
+        res = self.client.delete(url)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, balance)
+
+    def test_delete_paid_transfer(self):
+        """Testea que borrar una transferencia pagada deshaga ambas piernas"""
+        destination_account = Account.objects.get(
+            pk=self.transfer_payload['destination_account']
+        )
+        self.account.refresh_from_db()
+        balance = self.account.balance
+        destination_balance = destination_account.balance
+        res = self.client.post(LIST_CREATE_TRANSACTION_URL, self.transfer_payload.copy())
+
+        url = get_retrieve_update_destroy_transaction_url(res.data['id'])
+        res = self.client.delete(url)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.account.refresh_from_db()
+        destination_account.refresh_from_db()
+        self.assertEqual(self.account.balance, balance)
+        self.assertEqual(destination_account.balance, destination_balance)
+        self.assertFalse(destination_account.transactions.exists())
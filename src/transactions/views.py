@@ -1,16 +1,107 @@
+import io
+import os
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
 from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction as db_transaction
+from django.db.models import Count, Sum
+from django.http import StreamingHttpResponse
+
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.response import Response
+
+from transactions.serializers import (
+    TransferSerializer, IncomeExpenseSerializer, BatchTransactionSerializer,
+    TagTransactionsSerializer
+)
+from core import aggregates, analytics, exporters, importers, search
+from core.pagination import DateCursorPagination, PageNumberNoCountPagination
+from core.models import Account, Category, Transaction
+from core.views import ReplicaReadMixin
+
+
+def parse_types(value):
+    types = value.split(',')
+    if not set(types) <= {type for type, name in Transaction.TYPE.CHOICES}:
+        raise ValueError('Unknown transaction type')
+
+    return types
 
-from rest_framework import viewsets, permissions
 
-from transactions.serializers import TransferSerializer, IncomeExpenseSerializer
-from core.models import Transaction
+def parse_bool(value):
+    try:
+        return {'true': True, '1': True, 'false': False, '0': False}[value.lower()]
+    except KeyError:
+        raise ValueError('Invalid boolean')
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+def parse_amount(value):
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise ValueError('Invalid amount')
+    if not amount.is_finite():
+        raise ValueError('Invalid amount')
+
+    return amount
+
+
+class TransactionViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = DateCursorPagination
 
     def get_queryset(self):
-        return Transaction.objects.filter(account__user=self.request.user)
+        queryset = Transaction.objects.filter(account__user=self.request.user)
+        if self.action in (
+            'list', 'export', 'analytics', 'search', 'spending_by_tag'
+        ):
+            queryset = self.filter_transactions(queryset)
+
+        return queryset
+
+    def filter_transactions(self, queryset):
+        """
+        Filtra por start y end (YYYY-MM-DD), account, category, category_tree (la
+        categoria y sus subcategorias), tag (nombre), type (uno o varios separados por
+        comas), is_paid (true o false) y min_amount y max_amount
+        """
+        params = self.request.query_params
+        filters = {}
+        for param, lookup, parse in (
+            ('start', 'date__gte', date.fromisoformat),
+            ('end', 'date__lte', date.fromisoformat),
+            ('account', 'account_id', int),
+            ('category', 'category_id', int),
+            ('category_tree', 'category__in', self.get_category_tree),
+            ('tag', 'tags__name', str),
+            ('type', 'type__in', parse_types),
+            ('is_paid', 'is_paid', parse_bool),
+            ('min_amount', 'amount__gte', parse_amount),
+            ('max_amount', 'amount__lte', parse_amount),
+        ):
+            value = params.get(param)
+            if not value:
+                continue
+            try:
+                filters[lookup] = parse(value)
+            except ValueError:
+                raise ValidationError({param: 'Invalid value {!r}'.format(value)})
+
+        return queryset.filter(**filters)
+
+    def get_category_tree(self, value):
+        """Retorna la consulta de la categoria del usuario y sus descendientes"""
+        try:
+            category = self.request.user.categories.only('id', 'path').get(pk=int(value))
+        except Category.DoesNotExist:
+            raise ValueError('Unknown category')
+
+        return category.get_subtree().values('id')
 
     def get_object(self):
         queryset = self.get_queryset()
@@ -21,10 +112,209 @@ class TransactionViewSet(viewsets.ModelViewSet):
 
         return obj
 
+    def perform_destroy(self, instance):
+        """Deshace el saldo de la transaccion y de su enlazada antes de borrarla"""
+        with db_transaction.atomic():
+            # Ambas piernas se deshacen juntas para bloquear sus cuentas en orden
+            Transaction.objects.unapply_transactions(
+                transaction for transaction in (instance, instance.linked_transaction)
+                if transaction and transaction.is_paid
+            )
+
+            instance.delete()
+
     def get_serializer_class(self):
+        if self.action == 'batch':
+            return BatchTransactionSerializer
+        if self.action == 'tag':
+            return TagTransactionsSerializer
+
         type = self.request.data.get('type')
 
         if type == Transaction.TYPE.TRANSFER:
             return TransferSerializer
 
         return IncomeExpenseSerializer
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Crea una lista de ingresos y egresos del usuario en un solo request"""
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def tag(self, request):
+        """
+        Agrega etiquetas a varias transacciones del usuario: {"transactions": [id, ...],
+        "tags": [nombre, ...]}. Las etiquetas que no existan se crean.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tags = serializer.save()
+
+        return Response({
+            'transactions': len(serializer.validated_data['transactions']),
+            'tags': [{'id': tag.id, 'name': tag.name} for tag in tags]
+        })
+
+    @action(detail=False, url_path='spending-by-tag')
+    def spending_by_tag(self, request):
+        """
+        Retorna el total y la cantidad de transacciones filtradas de un tipo (?type=E
+        por defecto) por etiqueta, de mayor a menor total
+        """
+        type = request.query_params.get('type', Transaction.TYPE.EXPENSE)
+        if type not in (Transaction.TYPE.INCOME, Transaction.TYPE.EXPENSE):
+            raise ValidationError({'type': 'Only incomes and expenses are supported'})
+
+        queryset = self.get_queryset().filter(type=type)
+        rows = aggregates.get_or_compute(
+            request.user.id,
+            'spending_by_tag',
+            lambda: list(
+                queryset.filter(tags__isnull=False).values(
+                    'tags__id', 'tags__name'
+                ).annotate(
+                    total=Sum('amount'),
+                    count=Count('id')
+                ).order_by('-total', 'tags__name')
+            ),
+            *sorted(request.query_params.items())
+        )
+
+        return Response({
+            'type': type,
+            'tags': [
+                {
+                    'tag': row['tags__id'],
+                    'name': row['tags__name'],
+                    'total': str(row['total'].quantize(Decimal('0.01'))),
+                    'count': row['count']
+                }
+                for row in rows
+            ]
+        })
+
+    @action(detail=False)
+    def analytics(self, request):
+        """
+        Retorna los montos por periodo (?period=day|week|month) y categoria de las
+        transacciones filtradas, de un tipo (?type=E por defecto). Con ?level=1 las
+        subcategorias se suman a su categoria raiz.
+        """
+        params = request.query_params
+        period = params.get('period', analytics.PERIOD.MONTH).lower()
+        type = params.get('type', Transaction.TYPE.EXPENSE)
+        try:
+            analytics.get_trunc(period)
+        except ValueError as e:
+            raise ValidationError({'period': str(e)})
+        if type not in (Transaction.TYPE.INCOME, Transaction.TYPE.EXPENSE):
+            raise ValidationError({'type': 'Only incomes and expenses are supported'})
+        level = params.get('level')
+        if level is not None:
+            if not level.isdigit() or int(level) < 1:
+                raise ValidationError({'level': 'The level must be a positive integer'})
+            level = int(level)
+
+        queryset = self.get_queryset().filter(type=type)
+        result = aggregates.get_or_compute(
+            request.user.id,
+            'analytics',
+            lambda: analytics.get_category_series(queryset, period, level),
+            *sorted(params.items())
+        )
+
+        return Response({
+            'period': period,
+            'type': type,
+            'buckets': result['buckets'],
+            'series': [
+                {
+                    'category': row['category'],
+                    'values': [str(value) for value in row['values']]
+                }
+                for row in result['series']
+            ]
+        })
+
+    @action(detail=False)
+    def search(self, request):
+        """
+        Busca el texto (?q=) en la descripcion, la categoria y la cuenta de las
+        transacciones filtradas. Los resultados van de mas a menos relevantes, paginados
+        por numero de pagina (?page=) sin contar el total.
+        """
+        text = request.query_params.get('q', '').strip()
+        if not search.get_terms(text):
+            raise ValidationError({'q': 'A search text is required'})
+
+        queryset = search.search_transactions(self.get_queryset(), text, request.user)
+        paginator = PageNumberNoCountPagination()
+        results = paginator.paginate_queryset(queryset, request, view=self)
+        data = self.get_serializer(results, many=True).data
+        for row, transaction in zip(data, results):
+            row['rank'] = round(transaction.rank, 6)
+
+        return paginator.get_paginated_response(data)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporta las transacciones filtradas del usuario como CSV o NDJSON (?output=).
+        La respuesta se genera mientras se lee la base de datos, por lotes.
+        """
+        output = request.query_params.get('output', exporters.FORMAT.CSV).lower()
+        try:
+            lines = exporters.export_transactions(self.get_queryset(), output)
+        except ValueError as e:
+            raise ValidationError({'output': str(e)})
+
+        if isinstance(request._request, ASGIRequest):
+            # Django 3.2 recorre el contenido en el event loop de ASGI, donde no se puede
+            # consultar la base de datos: el archivo se genera antes, en este hilo
+            lines = exporters.spool(lines)
+
+        response = StreamingHttpResponse(
+            lines,
+            content_type=exporters.FORMAT.CONTENT_TYPES[output]
+        )
+        response['Content-Disposition'] = 'attachment; filename="transactions.{}"'.format(
+            output
+        )
+
+        return response
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        parser_classes=(MultiPartParser, FormParser)
+    )
+    def import_statement(self, request):
+        """Importa un extracto bancario (CSV, OFX o QIF) a una cuenta del usuario"""
+        statement = request.FILES.get('file')
+        if not statement:
+            raise ValidationError({'file': 'A statement file is required'})
+
+        try:
+            account = request.user.accounts.get(pk=request.data.get('account'))
+        except (Account.DoesNotExist, ValueError):
+            raise PermissionDenied('You don\'t have access to that account')
+
+        format = request.data.get('format')
+        if not format:
+            format = os.path.splitext(statement.name)[1].lstrip('.')
+        try:
+            parser = importers.get_parser(format)
+            result = importers.import_transactions(
+                account,
+                parser(io.TextIOWrapper(statement, encoding='utf-8', newline=''))
+            )
+        except ValueError as e:
+            raise ValidationError({'detail': str(e)})
+
+        return Response(result, status=status.HTTP_201_CREATED)
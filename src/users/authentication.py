@@ -0,0 +1,60 @@
+"""
+Autenticacion JWT que resuelve el usuario del token desde el cache 'auth' en lugar de
+consultar la base de datos en cada request.
+
+La llave incluye un numero de version por usuario que se incrementa cada vez que el
+usuario se guarda o se borra (ver users.signals), asi que un usuario editado o
+desactivado deja de servirse del cache del proceso que hizo el cambio de inmediato.
+El cache 'auth' es por proceso (LocMemCache): los demas procesos siguen usando el
+usuario anterior hasta que expire, como maximo el TIMEOUT del cache
+(AUTH_CACHE_TIMEOUT). Para invalidar en todos a la vez hay que usar un backend
+compartido. Por lo mismo request.user no se debe guardar: las escrituras leen el
+usuario de la base (ver users.views.ManageUserView).
+"""
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from core import versions
+
+CACHE_ALIAS = 'auth'
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _get_version_key(user_id):
+    return 'user-version:{}'.format(user_id)
+
+
+def get_version(user_id):
+    return versions.get_version(get_cache(), _get_version_key(user_id))
+
+
+def invalidate(user_id):
+    """Descarta el usuario cacheado"""
+    versions.bump_version(get_cache(), _get_version_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que guarda el usuario del token en cache"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        cache = get_cache()
+        key = 'user:{}:{}'.format(user_id, get_version(user_id))
+        user = cache.get(key)
+        if user is None:
+            # Valida que exista y este activo; los errores no se guardan en cache
+            user = super().get_user(validated_token)
+            cache.set(key, user)
+
+        return user
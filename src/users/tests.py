@@ -1,3 +1,7 @@
+import time
+from unittest.mock import Mock, patch
+
+from django.conf import settings
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -5,9 +9,12 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from users import authentication
+
 
 CREATE_USER_URL = reverse('users:create')
 ME_URL = reverse('users:me')
+TOKEN_URL = reverse('users:token')
 
 
 def create_user(**params):
@@ -86,3 +93,93 @@ class PrivateTests(TestCase):
         res = self.client.post(ME_URL, {})
 
         self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class TokenAuthenticationTests(TestCase):
+    """Testea la autenticacion con tokens JWT y el usuario en cache"""
+
+    def setUp(self):
+        authentication.get_cache().clear()
+        self.user = create_user(email='test@mail.com', password='123456', name='Bob')
+
+        self.client = APIClient()
+        res = self.client.post(TOKEN_URL, {'email': 'test@mail.com', 'password': '123456'})
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + res.data['access'])
+
+    def test_cached_user(self):
+        """Testea que el usuario del token se lea de la base de datos una sola vez"""
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_cached_user_updated(self):
+        """Testea que editar el perfil invalide el usuario en cache"""
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'name': 'Ross'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data['name'], 'Ross')
+
+    def test_cached_user_deactivated(self):
+        """Testea que un usuario desactivado no pueda autenticarse desde el cache"""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_other_process(self):
+        """
+        Testea que otro proceso, que no recibe la invalidacion, deje de autenticar a
+        un usuario desactivado cuando el usuario expira de su cache
+        """
+        self.client.get(ME_URL)
+
+        # Sin senales, como un cambio hecho desde otro proceso
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        timeout = settings.CACHES[authentication.CACHE_ALIAS]['TIMEOUT']
+        clock = Mock(time=Mock(return_value=time.time() + timeout + 1))
+        with patch('django.core.cache.backends.locmem.time', clock):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_update_cached_user_other_process(self):
+        """
+        Testea que editar el perfil no guarde el usuario en cache con datos viejos
+        sobre los cambios hechos desde otro proceso
+        """
+        self.client.get(ME_URL)
+
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+
+        res = self.client.patch(ME_URL, {'name': 'Ross'})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(self.user.name, 'Bob')
+
+    def test_update_cached_user_password(self):
+        """Testea que editar el perfil no revierta un password cambiado en otro proceso"""
+        self.client.get(ME_URL)
+
+        self.user.set_password('654321')
+        users = get_user_model().objects.filter(pk=self.user.pk)
+        users.update(password=self.user.password)
+
+        res = self.client.patch(ME_URL, {'name': 'Ross'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('654321'))
+        self.assertEqual(self.user.name, 'Ross')
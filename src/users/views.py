@@ -1,3 +1,7 @@
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
 from rest_framework import generics
 from rest_framework import permissions
 
@@ -15,4 +19,15 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+
+        # request.user puede venir del cache 'auth' con datos viejos; guardarlo
+        # revertiria lo que se cambio desde otro proceso
+        user = get_user_model().objects.get(pk=self.request.user.pk)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+
+        return user